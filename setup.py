@@ -26,11 +26,20 @@ if build:
     network_isolation_i = os.path.join(network_isolation_dir, 'network_isolation.i')
     network_isolation_wrap_cxx = os.path.join(network_isolation_dir, 'network_isolation_wrap.cpp')
 
+    # the evaluator uses std::thread to split constraint evaluation across threads
+    if os.name in ['nt', 'dos']:
+        evaluator_compile_args = []
+        evaluator_link_args = []
+    else:
+        evaluator_compile_args = ['-std=c++11', '-pthread']
+        evaluator_link_args = ['-pthread']
+
     if use_swig:
         aml_core_ext = Extension("wntr.sim.aml._evaluator",
                                  sources=[evaluator_i, evaluator_cxx],
                                  language="c++",
-                                 extra_compile_args=[],
+                                 extra_compile_args=evaluator_compile_args,
+                                 extra_link_args=evaluator_link_args,
                                  include_dirs=[numpy_include, src_files],
                                  library_dirs=[],
                                  libraries=[],
@@ -45,7 +54,8 @@ if build:
         aml_core_ext = Extension("wntr.sim.aml._evaluator",
                                  sources=[evaluator_cxx, evaluator_wrap_cxx],
                                  language="c++",
-                                 extra_compile_args=[],
+                                 extra_compile_args=evaluator_compile_args,
+                                 extra_link_args=evaluator_link_args,
                                  include_dirs=[numpy_include, src_files],
                                  library_dirs=[],
                                  libraries=[])
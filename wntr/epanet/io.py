@@ -6,6 +6,7 @@ The wntr.epanet.io module contains methods for reading/writing EPANET input and
 .. autosummary::
 
     InpFile
+    ToolkitWriter
     BinFile
 
 ----
@@ -39,6 +40,7 @@ from wntr.network.model import (Curve, Demands, LinkStatus, Pattern, Source,
                                 WaterNetworkModel)
 from wntr.network.options import Options
 
+from .toolkit import EpanetException
 from .util import (EN, FlowUnits, HydParam, MassUnits, MixType, PressureUnits,
                    QualParam, QualType, ResultType, StatisticsType, from_si,
                    to_si)
@@ -2421,6 +2423,590 @@ class _EpanetRule(object):
         return Rule(final_condition, then_acts, else_acts, priority=self.priority, name=self.ruleID)
 
 
+# Result blocks of each report period of an EPANET binary output file, in the order in which they are stored
+_BIN_RESULT_BLOCKS = ['demand', 'head', 'pressure', 'quality', 'flow', 'velocity', 'headloss', 'linkquality',
+                      'linkstatus', 'linksetting', 'reactionrate', 'frictionfactor']
+# (element, WNTR results name) of each result block
+_BIN_RESULT_NAMES = {'demand': ('node', 'demand'),
+                     'head': ('node', 'head'),
+                     'pressure': ('node', 'pressure'),
+                     'quality': ('node', 'quality'),
+                     'flow': ('link', 'flowrate'),
+                     'velocity': ('link', 'velocity'),
+                     'headloss': ('link', 'headloss'),
+                     'linkquality': ('link', 'quality'),
+                     'linkstatus': ('link', 'status'),
+                     'linksetting': ('link', 'setting'),
+                     'reactionrate': ('link', 'reaction_rate'),
+                     'frictionfactor': ('link', 'friction_factor')}
+
+
+class ToolkitWriter(object):
+    """
+    Write a water network model into an EPANET toolkit project.
+
+    The project is built with the EPANET 2.2 toolkit functions (ENinit, ENaddnode,
+    ENaddlink and the setters) instead of being read from an INP file, so no files are
+    written. The values passed to the toolkit are the same as the values :class:`InpFile`
+    writes, so the project is equivalent to the one EPANET reads from the INP file.
+
+    .. note::
+
+        Simple controls cannot set the status (open/closed) of a valve with ENaddcontrol;
+        these controls are added as rules with ENaddrule instead. The headloss curve of a
+        general purpose valve is set with EN_GPV_CURVE, which requires EPANET 2.3 or later.
+
+    """
+    def __init__(self):
+        self.flow_units = None
+        self.mass_units = None
+        self.node_names = None
+        self.link_names = None
+        self.link_types = None
+
+    def write(self, en, wn, units=None):
+        """
+        Write a water network model into an EPANET toolkit project.
+
+        Parameters
+        ----------
+        en : wntr.epanet.toolkit.ENepanet
+            The toolkit object (loaded with the EPANET 2.2 library); any open project is closed
+            and a new project is initialized with ENinit
+        wn : WaterNetworkModel
+            The water network model
+        units : str, int or FlowUnits
+            Name of the flow units used in the project (defaults to the INP file units of the model)
+        """
+        if not isinstance(wn, WaterNetworkModel):
+            raise ValueError('Must pass a WaterNetworkModel object')
+        if units is not None and isinstance(units, str):
+            self.flow_units = FlowUnits[units.upper()]
+        elif units is not None and isinstance(units, FlowUnits):
+            self.flow_units = units
+        elif units is not None and isinstance(units, int):
+            self.flow_units = FlowUnits(units)
+        elif isinstance(wn.options.hydraulic.inpfile_units, str):
+            self.flow_units = FlowUnits[wn.options.hydraulic.inpfile_units.upper()]
+        else:
+            self.flow_units = FlowUnits.GPM
+        if self.mass_units is None:
+            self.mass_units = MassUnits.mg
+
+        headloss = {'H-W': EN.HW, 'D-W': EN.DW, 'C-M': EN.CM}[wn.options.hydraulic.headloss.upper()]
+        en.ENinit(os.devnull, '', int(self.flow_units), headloss)
+
+        self._write_patterns(en, wn)
+        self._write_curves(en, wn)
+        self._write_nodes(en, wn)
+        self._write_links(en, wn)
+        self._write_demands(en, wn)
+        self._write_energy(en, wn)
+        self._write_quality(en, wn)
+        self._write_reactions(en, wn)
+        self._write_controls(en, wn)
+        self._write_rules(en, wn)
+        self._write_times(en, wn)
+        self._write_options(en, wn)
+
+    def _write_patterns(self, en, wn):
+        self._pattern_index = dict()
+        for pattern_name in wn.pattern_name_list:
+            pattern = wn.get_pattern(pattern_name)
+            index = en.ENaddpattern(pattern_name)
+            en.ENsetpattern(index, [float(m) for m in pattern.multipliers])
+            self._pattern_index[pattern_name] = index
+        # EPANET assigns its default pattern to demands that do not have a pattern
+        default_pattern = wn.options.hydraulic.pattern
+        if default_pattern is None:
+            default_pattern = '1'
+        if default_pattern not in self._pattern_index:
+            default_pattern = None
+        self._default_pattern = default_pattern
+
+    def _write_curves(self, en, wn):
+        self._curve_index = dict()
+        for curve_name in wn.curve_name_list:
+            curve = wn.get_curve(curve_name)
+            if curve.curve_type == 'VOLUME':
+                x = [from_si(self.flow_units, point[0], HydParam.Length) for point in curve.points]
+                y = [from_si(self.flow_units, point[1], HydParam.Volume) for point in curve.points]
+            elif curve.curve_type == 'HEAD':
+                x = [from_si(self.flow_units, point[0], HydParam.Flow) for point in curve.points]
+                y = [from_si(self.flow_units, point[1], HydParam.HydraulicHead) for point in curve.points]
+            elif curve.curve_type == 'EFFICIENCY':
+                x = [from_si(self.flow_units, point[0], HydParam.Flow) for point in curve.points]
+                y = [point[1] for point in curve.points]
+            elif curve.curve_type == 'HEADLOSS':
+                x = [from_si(self.flow_units, point[0], HydParam.Flow) for point in curve.points]
+                y = [from_si(self.flow_units, point[1], HydParam.HeadLoss) for point in curve.points]
+            else:
+                x = [point[0] for point in curve.points]
+                y = [point[1] for point in curve.points]
+            index = en.ENaddcurve(curve_name)
+            en.ENsetcurve(index, x, y)
+            self._curve_index[curve_name] = index
+
+    def _write_nodes(self, en, wn):
+        # Junctions are added first so that the node indices are not shifted by later additions
+        self.node_names = list()
+        self._node_index = dict()
+        for junction_name, junction in wn.junctions():
+            index = en.ENaddnode(junction_name, EN.JUNCTION)
+            en.ENsetnodevalue(index, EN.ELEVATION, from_si(self.flow_units, junction.elevation, HydParam.Elevation))
+            if junction.emitter_coefficient:
+                en.ENsetnodevalue(index, EN.EMITTER,
+                                  from_si(self.flow_units, junction.emitter_coefficient, HydParam.EmitterCoeff))
+            self.node_names.append(junction_name)
+            self._node_index[junction_name] = index
+        for reservoir_name, reservoir in wn.reservoirs():
+            index = en.ENaddnode(reservoir_name, EN.RESERVOIR)
+            en.ENsetnodevalue(index, EN.ELEVATION,
+                              from_si(self.flow_units, reservoir.head_timeseries.base_value, HydParam.HydraulicHead))
+            if reservoir.head_timeseries.pattern is not None:
+                en.ENsetnodevalue(index, EN.PATTERN, self._pattern_index[reservoir.head_timeseries.pattern.name])
+            self.node_names.append(reservoir_name)
+            self._node_index[reservoir_name] = index
+        for tank_name, tank in wn.tanks():
+            index = en.ENaddnode(tank_name, EN.TANK)
+            en.ENsettankdata(index,
+                             from_si(self.flow_units, tank.elevation, HydParam.Elevation),
+                             from_si(self.flow_units, tank.init_level, HydParam.HydraulicHead),
+                             from_si(self.flow_units, tank.min_level, HydParam.HydraulicHead),
+                             from_si(self.flow_units, tank.max_level, HydParam.HydraulicHead),
+                             from_si(self.flow_units, tank.diameter, HydParam.TankDiameter),
+                             from_si(self.flow_units, tank.min_vol, HydParam.Volume),
+                             tank.vol_curve.name if tank.vol_curve is not None else '')
+            if tank.vol_curve is None:
+                # ENsettankdata computes the minimum volume from the minimum head instead of the
+                # minimum level, so it is set again as EPANET sets it when it reads an INP file
+                # (a minimum volume of 0 is ignored by the toolkit, so a negligible volume is used instead)
+                min_vol = from_si(self.flow_units, tank.min_vol, HydParam.Volume)
+                if min_vol <= 0:
+                    diameter = from_si(self.flow_units, tank.diameter, HydParam.TankDiameter)
+                    min_level = from_si(self.flow_units, tank.min_level, HydParam.HydraulicHead)
+                    min_vol = np.pi * diameter ** 2 / 4.0 * min_level
+                en.ENsetnodevalue(index, EN.MINVOLUME, max(min_vol, 1e-6))
+            if tank.overflow:
+                en.ENsetnodevalue(index, EN.CANOVERFLOW, 1)
+            self.node_names.append(tank_name)
+            self._node_index[tank_name] = index
+
+    def _write_links(self, en, wn):
+        self.link_names = list()
+        self.link_types = list()
+        self._link_index = dict()
+        for pipe_name, pipe in wn.pipes():
+            link_type = EN.CVPIPE if pipe.check_valve else EN.PIPE
+            index = en.ENaddlink(pipe_name, link_type, pipe.start_node_name, pipe.end_node_name)
+            en.ENsetpipedata(index,
+                             from_si(self.flow_units, pipe.length, HydParam.Length),
+                             from_si(self.flow_units, pipe.diameter, HydParam.PipeDiameter),
+                             pipe.roughness, pipe.minor_loss)
+            if not pipe.check_valve and pipe.initial_status == LinkStatus.Closed:
+                en.ENsetlinkvalue(index, EN.INITSTATUS, 0)
+            self.link_names.append(pipe_name)
+            self.link_types.append(link_type)
+            self._link_index[pipe_name] = index
+        for pump_name, pump in wn.pumps():
+            index = en.ENaddlink(pump_name, EN.PUMP, pump.start_node_name, pump.end_node_name)
+            if pump.pump_type == 'HEAD':
+                en.ENsetheadcurveindex(index, self._curve_index[pump.pump_curve_name])
+            elif pump.pump_type == 'POWER':
+                en.ENsetlinkvalue(index, EN.PUMP_POWER, from_si(self.flow_units, pump.power, HydParam.Power))
+            else:
+                raise RuntimeError('Only head or power info is supported of pumps.')
+            if pump.speed_timeseries.base_value != 1:
+                en.ENsetlinkvalue(index, EN.INITSETTING, pump.speed_timeseries.base_value)
+            if pump.speed_timeseries.pattern is not None:
+                en.ENsetlinkvalue(index, EN.LINKPATTERN, self._pattern_index[pump.speed_timeseries.pattern.name])
+            if pump.initial_status in (LinkStatus.Closed,):
+                en.ENsetlinkvalue(index, EN.INITSTATUS, 0)
+            else:
+                setting = pump.initial_setting
+                if type(setting) is float and setting != 1.0:
+                    en.ENsetlinkvalue(index, EN.INITSETTING, setting)
+            self.link_names.append(pump_name)
+            self.link_types.append(EN.PUMP)
+            self._link_index[pump_name] = index
+        for valve_name, valve in wn.valves():
+            link_type = EN[valve.valve_type]
+            index = en.ENaddlink(valve_name, link_type, valve.start_node_name, valve.end_node_name)
+            en.ENsetlinkvalue(index, EN.DIAMETER, from_si(self.flow_units, valve.diameter, HydParam.PipeDiameter))
+            if valve.minor_loss > 0:
+                en.ENsetlinkvalue(index, EN.MINORLOSS, valve.minor_loss)
+            if valve.valve_type == 'GPV':
+                try:
+                    en.ENsetlinkvalue(index, EN.GPV_CURVE, self._curve_index[valve.headloss_curve_name])
+                except EpanetException:
+                    if en.errcode != 251:  # illegal parameter code
+                        raise
+                    raise EpanetException('Setting the curve of general purpose valve {} requires an EPANET '
+                                          'toolkit library with EN_GPV_CURVE (EPANET 2.3 or later)'.format(valve_name))
+            else:
+                en.ENsetlinkvalue(index, EN.INITSETTING, self._valve_setting(valve, valve.initial_setting))
+            if valve.initial_status not in (LinkStatus.Active,):
+                en.ENsetlinkvalue(index, EN.INITSTATUS, 0 if valve.initial_status == LinkStatus.Closed else 1)
+            self.link_names.append(valve_name)
+            self.link_types.append(link_type)
+            self._link_index[valve_name] = index
+
+    def _valve_setting(self, valve, value):
+        if valve.valve_type in ['PRV', 'PSV', 'PBV']:
+            return from_si(self.flow_units, value, HydParam.Pressure)
+        elif valve.valve_type == 'FCV':
+            return from_si(self.flow_units, value, HydParam.Flow)
+        return value
+
+    def _write_demands(self, en, wn):
+        for junction_name, junction in wn.junctions():
+            index = self._node_index[junction_name]
+            for ct, demand in enumerate(junction.demand_timeseries_list):
+                pattern_name = demand.pattern_name
+                if pattern_name not in self._pattern_index:
+                    pattern_name = self._default_pattern
+                base_demand = from_si(self.flow_units, demand.base_value, HydParam.Demand)
+                if ct == 0:
+                    # new junctions have a single (zero) demand category
+                    en.ENsetbasedemand(index, 1, base_demand)
+                    en.ENsetdemandpattern(index, 1, self._pattern_index.get(pattern_name, 0))
+                else:
+                    category = demand.category
+                    if category is None or str(category).lower() == 'none':
+                        category = ''
+                    en.ENadddemand(index, base_demand, pattern_name if pattern_name is not None else '',
+                                   str(category))
+
+    def _write_energy(self, en, wn):
+        if wn.options.energy.global_efficiency is not None:
+            en.ENsetoption(EN.GLOBALEFFIC, wn.options.energy.global_efficiency)
+        if wn.options.energy.global_price is not None:
+            en.ENsetoption(EN.GLOBALPRICE, to_si(self.flow_units, wn.options.energy.global_price, HydParam.Energy))
+        if wn.options.energy.demand_charge is not None:
+            en.ENsetoption(EN.DEMANDCHARGE, wn.options.energy.demand_charge)
+        if wn.options.energy.global_pattern is not None:
+            en.ENsetoption(EN.GLOBALPATTERN, self._pattern_index[wn.options.energy.global_pattern])
+        for pump_name, pump in wn.pumps():
+            index = self._link_index[pump_name]
+            if pump.efficiency is not None:
+                en.ENsetlinkvalue(index, EN.PUMP_ECURVE, self._curve_index[pump.efficiency.name])
+            if pump.energy_price is not None:
+                en.ENsetlinkvalue(index, EN.PUMP_ECOST, to_si(self.flow_units, pump.energy_price, HydParam.Energy))
+            if pump.energy_pattern is not None:
+                en.ENsetlinkvalue(index, EN.PUMP_EPAT, self._pattern_index[pump.energy_pattern])
+
+    def _write_quality(self, en, wn):
+        parameter = wn.options.quality.parameter.upper()
+        if parameter == 'NONE':
+            en.ENsetqualtype(EN.NONE, '', '', '')
+        elif parameter == 'AGE':
+            en.ENsetqualtype(EN.AGE, '', '', '')
+        elif parameter == 'TRACE':
+            en.ENsetqualtype(EN.TRACE, '', '', wn.options.quality.trace_node)
+        else:
+            en.ENsetqualtype(EN.CHEM, wn.options.quality.chemical_name, wn.options.quality.inpfile_units, '')
+        for node_name, node in wn.nodes():
+            if node.initial_quality:
+                if parameter == 'CHEMICAL':
+                    quality = from_si(self.flow_units, node.initial_quality, QualParam.Concentration,
+                                      mass_units=self.mass_units)
+                elif parameter == 'AGE':
+                    quality = from_si(self.flow_units, node.initial_quality, QualParam.WaterAge)
+                else:
+                    quality = node.initial_quality
+                en.ENsetnodevalue(self._node_index[node_name], EN.INITQUAL, quality)
+        for source_name, source in wn._sources.items():
+            index = self._node_index[source.node_name]
+            source_type = source.source_type.upper()
+            if source_type == 'MASS':
+                strength = from_si(self.flow_units, source.strength_timeseries.base_value,
+                                   QualParam.SourceMassInject, self.mass_units)
+            else:  # CONC, SETPOINT, FLOWPACED
+                strength = from_si(self.flow_units, source.strength_timeseries.base_value,
+                                   QualParam.Concentration, self.mass_units)
+            source_type = {'CONC': 'CONCEN', 'CONCEN': 'CONCEN'}.get(source_type, source_type)
+            en.ENsetnodevalue(index, EN.SOURCETYPE, EN[source_type])
+            en.ENsetnodevalue(index, EN.SOURCEQUAL, strength)
+            if source.strength_timeseries.pattern_name is not None:
+                en.ENsetnodevalue(index, EN.SOURCEPAT, self._pattern_index[source.strength_timeseries.pattern_name])
+        for tank_name, tank in wn.tanks():
+            if tank._mixing_model is None:
+                continue
+            index = self._node_index[tank_name]
+            if tank._mixing_model in [MixType.Mixed, MixType.Mix1, 0]:
+                en.ENsetnodevalue(index, EN.MIXMODEL, EN.MIX1)
+            elif tank._mixing_model in [MixType.TwoComp, MixType.Mix2, '2comp', '2COMP', 1]:
+                en.ENsetnodevalue(index, EN.MIXMODEL, EN.MIX2)
+                en.ENsetnodevalue(index, EN.MIXFRACTION, tank.mixing_fraction)
+            elif tank._mixing_model in [MixType.FIFO, 2]:
+                en.ENsetnodevalue(index, EN.MIXMODEL, EN.FIFO)
+            elif tank._mixing_model in [MixType.LIFO, 3]:
+                en.ENsetnodevalue(index, EN.MIXMODEL, EN.LIFO)
+            else:
+                logger.warning('Unknown mixing model: %s', tank._mixing_model)
+
+    def _write_reactions(self, en, wn):
+        reaction = wn.options.reaction
+        en.ENsetoption(EN.BULKORDER, reaction.bulk_order)
+        en.ENsetoption(EN.TANKORDER, reaction.tank_order)
+        en.ENsetoption(EN.WALLORDER, reaction.wall_order)
+        if reaction.limiting_potential is not None:
+            en.ENsetoption(EN.CONCENLIMIT, reaction.limiting_potential)
+        global_bulk = from_si(self.flow_units, reaction.bulk_coeff, QualParam.BulkReactionCoeff,
+                              mass_units=self.mass_units, reaction_order=reaction.bulk_order)
+        global_wall = from_si(self.flow_units, reaction.wall_coeff, QualParam.WallReactionCoeff,
+                              mass_units=self.mass_units, reaction_order=reaction.wall_order)
+        # The toolkit does not apply the global coefficients (or the roughness correlation) to the
+        # pipes and tanks that do not have their own coefficient, so they are set here as EPANET does
+        # when it reads an INP file
+        for tank_name, tank in wn.tanks():
+            bulk = global_bulk
+            if tank.bulk_coeff is not None:
+                bulk = from_si(self.flow_units, tank.bulk_coeff, QualParam.BulkReactionCoeff,
+                               mass_units=self.mass_units, reaction_order=reaction.bulk_order)
+            if bulk != 0:
+                en.ENsetnodevalue(self._node_index[tank_name], EN.TANK_KBULK, bulk)
+        headloss = wn.options.hydraulic.headloss.upper()
+        for pipe_name, pipe in wn.pipes():
+            index = self._link_index[pipe_name]
+            bulk = global_bulk
+            if pipe.bulk_coeff is not None:
+                bulk = from_si(self.flow_units, pipe.bulk_coeff, QualParam.BulkReactionCoeff,
+                               mass_units=self.mass_units, reaction_order=reaction.bulk_order)
+            if pipe.wall_coeff is not None:
+                wall = from_si(self.flow_units, pipe.wall_coeff, QualParam.WallReactionCoeff,
+                               mass_units=self.mass_units, reaction_order=reaction.wall_order)
+            elif reaction.roughness_correl:
+                diameter = from_si(self.flow_units, pipe.diameter, HydParam.PipeDiameter)
+                if pipe.roughness <= 0 or diameter <= 0:
+                    wall = 0.0
+                elif headloss == 'H-W':
+                    wall = reaction.roughness_correl / pipe.roughness
+                elif headloss == 'D-W':
+                    wall = reaction.roughness_correl / abs(np.log(pipe.roughness / diameter))
+                else:
+                    wall = reaction.roughness_correl * pipe.roughness
+            else:
+                wall = global_wall
+            if bulk != 0:
+                en.ENsetlinkvalue(index, EN.KBULK, bulk)
+            if wall != 0:
+                en.ENsetlinkvalue(index, EN.KWALL, wall)
+
+    def _write_controls(self, en, wn):
+        for text, all_control in wn.controls():
+            if all_control.epanet_control_type is _ControlType.rule:
+                continue
+            if len(all_control._then_actions) != 1 or len(all_control._else_actions) != 0:
+                logger.error('Too many actions on CONTROL "%s"'%text)
+                raise RuntimeError('Too many actions on CONTROL "%s"'%text)
+            control_action = all_control._then_actions[0]
+            link = control_action.target()[0]
+            if not isinstance(link, Link):
+                continue
+            if control_action._attribute.lower() == 'status' and isinstance(link, Valve):
+                # ENaddcontrol would make the valve active; open/closed is only possible with a rule
+                rule = _EpanetRule('blah', self.flow_units, self.mass_units)
+                rule.from_if_then_else(all_control)
+                rule.ruleID = '_'.join(text.split())
+                en.ENaddrule(str(rule))
+                continue
+            setting = self._control_setting(control_action, text)
+            if setting is None:
+                continue
+            condition = all_control._condition
+            if isinstance(condition, (SimTimeCondition, TimeOfDayCondition)):
+                control_type = EN.TIMEOFDAY if isinstance(condition, TimeOfDayCondition) else EN.TIMER
+                en.ENaddcontrol(control_type, self._link_index[link.name], setting, 0, condition._threshold)
+            elif isinstance(condition, ValueCondition):
+                control_type = EN.HILEVEL
+                if condition._relation in [np.less, np.less_equal, Comparison.le, Comparison.lt]:
+                    control_type = EN.LOWLEVEL
+                if isinstance(condition._source_obj, Tank):
+                    level = from_si(self.flow_units, condition._threshold, HydParam.HydraulicHead)
+                elif isinstance(condition._source_obj, Junction):
+                    level = from_si(self.flow_units, condition._threshold, HydParam.Pressure)
+                else:
+                    raise RuntimeError('Unknown control for EPANET INP files: %s' %type(all_control))
+                en.ENaddcontrol(control_type, self._link_index[link.name], setting,
+                                self._node_index[condition._source_obj.name], level)
+            elif not isinstance(all_control, Control):
+                raise RuntimeError('Unknown control for EPANET INP files: %s' % type(all_control))
+
+    def _control_setting(self, control_action, control_name):
+        value = control_action._value
+        attribute = control_action._attribute.lower()
+        target = control_action._target_obj
+        if attribute == 'status':
+            return 0.0 if LinkStatus(value) == LinkStatus.Closed else 1.0
+        elif attribute == 'base_speed':
+            return float(value)
+        elif attribute == 'setting' and isinstance(target, Valve):
+            return self._valve_setting(target, value)
+        elif attribute == 'setting':
+            return float(value)
+        logger.warning('Could not write control '+str(control_name)+' - skipping')
+        return None
+
+    def _write_rules(self, en, wn):
+        for text, all_control in wn.controls():
+            if all_control.epanet_control_type == _ControlType.rule:
+                if all_control.name == '':
+                    all_control._name = text
+                rule = _EpanetRule('blah', self.flow_units, self.mass_units)
+                rule.from_if_then_else(all_control)
+                en.ENaddrule(str(rule))
+
+    def _write_times(self, en, wn):
+        # Apply the adjustments EPANET makes to the time steps after reading an INP file
+        time = wn.options.time
+        pattern_step = time.pattern_timestep if time.pattern_timestep > 0 else 3600
+        report_step = time.report_timestep if time.report_timestep > 0 else pattern_step
+        hydraulic_step = time.hydraulic_timestep if time.hydraulic_timestep > 0 else 3600
+        hydraulic_step = min(hydraulic_step, pattern_step, report_step)
+        quality_step = time.quality_timestep if time.quality_timestep > 0 else hydraulic_step // 10
+        rule_step = time.rule_timestep if time.rule_timestep > 0 else hydraulic_step // 10
+        en.ENsettimeparam(EN.DURATION, time.duration)
+        en.ENsettimeparam(EN.PATTERNSTEP, pattern_step)
+        en.ENsettimeparam(EN.REPORTSTEP, report_step)
+        en.ENsettimeparam(EN.HYDSTEP, hydraulic_step)
+        en.ENsettimeparam(EN.QUALSTEP, min(quality_step, hydraulic_step))
+        en.ENsettimeparam(EN.RULESTEP, min(rule_step, hydraulic_step))
+        en.ENsettimeparam(EN.PATTERNSTART, time.pattern_start)
+        en.ENsettimeparam(EN.REPORTSTART, time.report_start if time.report_start <= time.duration else 0)
+        en.ENsettimeparam(EN.STARTTIME, time.start_clocktime)
+
+    def _write_options(self, en, wn):
+        hydraulic = wn.options.hydraulic
+        en.ENsetoption(EN.SP_GRAVITY, hydraulic.specific_gravity)
+        en.ENsetoption(EN.SP_VISCOS, hydraulic.viscosity)
+        en.ENsetoption(EN.TRIALS, hydraulic.trials)
+        # EPANET limits the accuracy read from an INP file to [1e-5, 0.1], but ENsetoption rejects values below 1e-8
+        en.ENsetoption(EN.ACCURACY, min(max(hydraulic.accuracy, 1e-5), 0.1))
+        en.ENsetoption(EN.CHECKFREQ, hydraulic.checkfreq)
+        en.ENsetoption(EN.MAXCHECK, hydraulic.maxcheck)
+        if hydraulic.headerror != 0:
+            en.ENsetoption(EN.HEADERROR, hydraulic.headerror)
+        if hydraulic.flowchange != 0:
+            en.ENsetoption(EN.FLOWCHANGE, hydraulic.flowchange)
+        if hydraulic.damplimit != 0:
+            en.ENsetoption(EN.DAMPLIMIT, hydraulic.damplimit)
+        if hydraulic.unbalanced.upper() == 'STOP':
+            en.ENsetoption(EN.UNBALANCED, -1)
+        else:
+            en.ENsetoption(EN.UNBALANCED, hydraulic.unbalanced_value if hydraulic.unbalanced_value is not None else 0)
+        en.ENsetoption(EN.DEMANDMULT, hydraulic.demand_multiplier)
+        if hydraulic.demand_model in ['PDA', 'PDD']:
+            en.ENsetdemandmodel(EN.PDA,
+                                from_si(self.flow_units, hydraulic.minimum_pressure, HydParam.Pressure),
+                                from_si(self.flow_units, hydraulic.required_pressure, HydParam.Pressure),
+                                hydraulic.pressure_exponent)
+        en.ENsetoption(EN.EMITEXPON, hydraulic.emitter_exponent)
+        en.ENsetoption(EN.SP_DIFFUS, wn.options.quality.diffusivity)
+        en.ENsetoption(EN.TOLERANCE, wn.options.quality.tolerance)
+        if hydraulic.hydraulics is not None:
+            logger.warning('The HYDRAULICS option is ignored when writing to an EPANET toolkit project')
+
+
+class BinFileResult(object):
+    """
+    Lazily read and converted results of one attribute (e.g., node pressure) of an EPANET binary output file.
+
+    These objects are created by :meth:`~wntr.epanet.io.BinFile.read` with ``lazy=True``. The values are only
+    read from the memory-mapped file, and converted to SI units, for the elements and times that are selected.
+
+    .. doctest::
+        :skipif: True
+
+        >>> results = wntr.epanet.io.BinFile().read('temp.bin', lazy=True)
+        >>> pressure = results.node['pressure'].select(names=['10', '11'], times=[0, 3600])
+        >>> pressure = results.node['pressure'][['10', '11']]
+        >>> pressure = results.node['pressure'].to_dataframe()
+
+    """
+    def __init__(self, reader, block, data, columns, names, times, linktype=None, convert=True):
+        self._reader = reader
+        self._block = block
+        self._data = data
+        self._columns = columns
+        self._names = list(names)
+        self._times = np.asarray(times)
+        self._linktype = linktype
+        self._convert = convert
+        self._name_to_ndx = None
+        self._time_to_ndx = None
+
+    @property
+    def names(self):
+        """list of str : the node or link names (columns)"""
+        return self._names
+
+    @property
+    def index(self):
+        """numpy.ndarray : the report times"""
+        return self._times
+
+    @property
+    def shape(self):
+        """tuple : the (number of times, number of elements) of the results"""
+        return (len(self._times), len(self._names))
+
+    def _get_columns(self, names):
+        if names is None:
+            return np.arange(len(self._names))
+        if self._name_to_ndx is None:
+            self._name_to_ndx = {name: ndx for ndx, name in enumerate(self._names)}
+        return np.array([self._name_to_ndx[name] for name in names], dtype=int)
+
+    def _get_rows(self, times):
+        if times is None:
+            return slice(None)
+        if isinstance(times, slice):
+            return times
+        if self._time_to_ndx is None:
+            self._time_to_ndx = {int(t): ndx for ndx, t in enumerate(self._times)}
+        return np.array([self._time_to_ndx[int(t)] for t in times], dtype=int)
+
+    def select(self, names=None, times=None):
+        """
+        Read (and convert) the results for the selected elements and times.
+
+        Parameters
+        ----------
+        names : list of str, optional
+            The node or link names; all names if None
+        times : list of int or slice, optional
+            The report times (in seconds), or a slice of report periods; all times if None
+
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        cols = self._get_columns(names)
+        rows = self._get_rows(times)
+        values = self._data[rows, self._columns][:, cols]
+        values = np.array(values)
+        if self._convert:
+            linktype = None if self._linktype is None else self._linktype[cols]
+            values = self._reader._convert_block(self._block, values, linktype)
+        return pd.DataFrame(data=values, index=self._times[rows], columns=[self._names[c] for c in cols])
+
+    def to_dataframe(self):
+        """Read (and convert) all of the results as a DataFrame"""
+        return self.select()
+
+    def __getitem__(self, names):
+        if isinstance(names, str):
+            return self.select(names=[names])[names]
+        return self.select(names=names)
+
+    def __len__(self):
+        return len(self._times)
+
+    def __repr__(self):
+        return '<BinFileResult: {} ({} times x {} elements)>'.format(self._block, *self.shape)
+
+
 class BinFile(object):
     """
     EPANET binary output file reader.
@@ -2429,11 +3015,10 @@ class BinFile(object):
     
     Parameters
     ----------
-    results_type : list of :class:`~wntr.epanet.util.ResultType`, default=None
-        This parameter is *only* active when using a subclass of the BinFile that implements
-	    a custom reader or writer.
+    result_types : list of :class:`~wntr.epanet.util.ResultType`, default=None
         If ``None``, then all results will be saved (node quality, demand, link flow, etc.).
-        Otherwise, a list of result types can be passed to limit the memory used.
+        Otherwise, a list of result types can be passed to limit the memory used; only those
+        results are read from the file (and converted) by :meth:`~wntr.epanet.io.BinFile.read`.
     network : bool, default=False
         Save a new WaterNetworkModel from the description in the output binary file. Certain
         elements may be missing, such as patterns and curves, if this is done.
@@ -2551,8 +3136,74 @@ class BinFile(object):
         """
         pass
 
+    def _get_result_blocks(self):
+        """Returns the result blocks that were requested with result_types"""
+        blocks = list()
+        for item in self.items:
+            if isinstance(item, str):
+                item = ResultType[item]
+            blocks.append(_BIN_RESULT_BLOCKS[ResultType(item).value - 1])
+        return [block for block in _BIN_RESULT_BLOCKS if block in blocks]
+
+    def _convert_block(self, block, values, linktype=None):
+        """Convert the values of one result block (rows = times, columns = elements) to SI units.
+
+        Parameters
+        ----------
+        block : str
+            The result block (e.g., 'pressure' or 'linksetting')
+        values : numpy.array
+            The values in EPANET units; this array may be modified
+        linktype : numpy.array
+            The EPANET link types of the columns (only needed for link results)
+
+        Returns
+        -------
+        numpy.array
+            The values in SI units
+        """
+        if block == 'demand':
+            return HydParam.Demand._to_si(self.flow_units, values)
+        elif block == 'head':
+            return HydParam.HydraulicHead._to_si(self.flow_units, values)
+        elif block == 'pressure':
+            return HydParam.Pressure._to_si(self.flow_units, values)
+        elif block in ['quality', 'linkquality']:
+            if self.quality_type is QualType.Chem:
+                return QualParam.Concentration._to_si(self.flow_units, values, mass_units=self.mass_units)
+            elif self.quality_type is QualType.Age:
+                return QualParam.WaterAge._to_si(self.flow_units, values, mass_units=self.mass_units)
+            return values
+        elif block == 'flow':
+            return HydParam.Flow._to_si(self.flow_units, values)
+        elif block == 'velocity':
+            return HydParam.Velocity._to_si(self.flow_units, values)
+        elif block == 'headloss':
+            values[:, linktype < 2] = to_si(self.flow_units, values[:, linktype < 2], HydParam.HeadLoss) # Pipe or CV
+            values[:, linktype >= 2] = to_si(self.flow_units, values[:, linktype >= 2], HydParam.Length) # Pump or Valve
+            return values
+        elif block == 'linkstatus':
+            if self.convert_status:
+                values[values <= 2] = 0
+                values[values == 3] = 1
+                values[values >= 5] = 1
+                values[values == 4] = 2
+            return values
+        elif block == 'linksetting':
+            # pump setting is relative speed (unitless)
+            values[:, linktype == EN.PIPE] = to_si(self.flow_units, values[:, linktype == EN.PIPE], HydParam.RoughnessCoeff, 
+                                                   darcy_weisbach=self._darcy_weisbach)
+            values[:, linktype == EN.PRV] = to_si(self.flow_units, values[:, linktype == EN.PRV], HydParam.Pressure)
+            values[:, linktype == EN.PSV] = to_si(self.flow_units, values[:, linktype == EN.PSV], HydParam.Pressure)
+            values[:, linktype == EN.PBV] = to_si(self.flow_units, values[:, linktype == EN.PBV], HydParam.Pressure)
+            values[:, linktype == EN.FCV] = to_si(self.flow_units, values[:, linktype == EN.FCV], HydParam.Flow)
+            return values
+        elif block == 'reactionrate':
+            return QualParam.ReactionRate._to_si(self.flow_units, values, self.mass_units)
+        return values
+
 #    @run_lineprofile()
-    def read(self, filename, convergence_error=False, darcy_weisbach=False, convert=True):
+    def read(self, filename, convergence_error=False, darcy_weisbach=False, convert=True, lazy=False):
         """Read a binary file and create a results object.
 
         Parameters
@@ -2564,6 +3215,14 @@ class BinFile(object):
             simulation does not converge. If convergence_error is False, partial results are returned, 
             a warning will be issued, and results.error_code will be set to 0
             if the simulation does not converge.  Default = False.
+        darcy_weisbach : bool (optional)
+            Set to True if the pipe roughness (link setting) results use the Darcy-Weisbach formula.
+        convert : bool (optional)
+            Convert the results to SI units. Default = True.
+        lazy : bool (optional)
+            If True, the results section of the file is memory-mapped instead of read, and the node and
+            link results are :class:`~wntr.epanet.io.BinFileResult` objects that read (and convert) only
+            the elements and times that are selected. Default = False.
 
         Returns
         -------
@@ -2715,104 +3374,68 @@ class BinFile(object):
             self.save_network_desc_line('link_end', pd.Series(data=names[linkend-1], index=linknames, copy=True))
             """
             
-#           type_list = 4*nnodes*['node'] + 8*nlinks*['link']
-            name_list = nodenames*4 + linknames*8
-            valuetype = nnodes*['demand']+nnodes*['head']+nnodes*['pressure']+nnodes*['quality'] + nlinks*['flow']+nlinks*['velocity']+nlinks*['headloss']+nlinks*['linkquality']+nlinks*['linkstatus']+nlinks*['linksetting']+nlinks*['reactionrate']+nlinks*['frictionfactor']
-            
-#           tuples = zip(type_list, valuetype, name_list)
-            tuples = list(zip(valuetype, name_list))
-#                tuples = [(valuetype[i], v) for i, v in enumerate(name_list)]
-            index = pd.MultiIndex.from_tuples(tuples, names=['value','name'])      
-            
-            try:
-                data = np.fromfile(fin, dtype = np.dtype(ftype), count = (4*nnodes+8*nlinks)*nrptsteps)
-            except Exception as e:
-                logger.exception('Failed to process file: %s', e)
-                
-            N = int(np.floor(len(data)/(4*nnodes+8*nlinks)))
+            self.results.node = OrderedDict()
+            self.results.link = OrderedDict()
+            self.results.network_name = self.inp_file
+            self._linktype = linktype
+            self._darcy_weisbach = darcy_weisbach
+
+            step_size = 4*nnodes + 8*nlinks
+            data_offset = fin.tell()
+            blocks = self._get_result_blocks()
+            if lazy or len(blocks) < len(_BIN_RESULT_BLOCKS):
+                # map the results section of the file instead of reading it; only the requested
+                # blocks of each report period are then read (or, if lazy, only what is accessed)
+                nvalues = (os.fstat(fin.fileno()).st_size - data_offset) // np.dtype(ftype).itemsize
+                N = int(min(nrptsteps, nvalues // step_size))
+                data = np.memmap(filename, dtype=np.dtype(ftype), mode='r', offset=data_offset,
+                                 shape=(N, step_size))
+                fin.seek(data_offset + N*step_size*np.dtype(ftype).itemsize)
+            else:
+                try:
+                    data = np.fromfile(fin, dtype = np.dtype(ftype), count = step_size*nrptsteps)
+                except Exception as e:
+                    logger.exception('Failed to process file: %s', e)
+                N = int(np.floor(len(data)/step_size))
+                data = np.reshape(data[0:N*step_size], (N, step_size))
+
             if N < nrptsteps:
                 t = reporttimes[N]
                 if convergence_error:
                     logger.error('Simulation did not converge at time ' + self._get_time(t) + '.')
                     raise RuntimeError('Simulation did not converge at time ' + self._get_time(t) + '.')
                 else:
-                    data = data[0:N*(4*nnodes+8*nlinks)]
-                    data = np.reshape(data, (N, (4*nnodes+8*nlinks)))
                     reporttimes = reporttimes[0:N]
                     warnings.warn('Simulation did not converge at time ' + self._get_time(t) + '.')
                     self.results.error_code = wntr.sim.results.ResultsStatus.error
             else:
-                data = np.reshape(data, (nrptsteps, (4*nnodes+8*nlinks)))
                 self.results.error_code = None
 
-            df = pd.DataFrame(data.transpose(), index =index, columns = reporttimes)
-            df = df.transpose()
-            
-            self.results.node = {}
-            self.results.link = {}
-            self.results.network_name = self.inp_file
-            
-            if convert:
-                # Node Results
-                self.results.node['demand'] = HydParam.Demand._to_si(self.flow_units, df['demand'])
-                self.results.node['head'] = HydParam.HydraulicHead._to_si(self.flow_units, df['head'])
-                self.results.node['pressure'] = HydParam.Pressure._to_si(self.flow_units, df['pressure'])
-        
-                # Water Quality Results (node and link)
-                if self.quality_type is QualType.Chem:
-                    self.results.node['quality'] = QualParam.Concentration._to_si(self.flow_units, df['quality'], mass_units=self.mass_units)
-                    self.results.link['quality'] = QualParam.Concentration._to_si(self.flow_units, df['linkquality'], mass_units=self.mass_units)
-                elif self.quality_type is QualType.Age:
-                    self.results.node['quality'] = QualParam.WaterAge._to_si(self.flow_units, df['quality'], mass_units=self.mass_units)
-                    self.results.link['quality'] = QualParam.WaterAge._to_si(self.flow_units, df['linkquality'], mass_units=self.mass_units)
+            offset = 0
+            for block in _BIN_RESULT_BLOCKS:
+                element, name = _BIN_RESULT_NAMES[block]
+                if element == 'node':
+                    columns = slice(offset, offset + nnodes)
+                    names = nodenames
+                    block_linktype = None
                 else:
-                    self.results.node['quality'] = df['quality']
-                    self.results.link['quality'] = df['linkquality']
-        
-                # Link Results
-                self.results.link['flowrate'] = HydParam.Flow._to_si(self.flow_units, df['flow'])
-                self.results.link['velocity'] = HydParam.Velocity._to_si(self.flow_units, df['velocity'])
-                
-                headloss = np.array(df['headloss'])
-                headloss[:, linktype < 2] = to_si(self.flow_units, headloss[:, linktype < 2], HydParam.HeadLoss) # Pipe or CV
-                headloss[:, linktype >= 2] = to_si(self.flow_units, headloss[:, linktype >= 2], HydParam.Length) # Pump or Valve
-                self.results.link["headloss"] = pd.DataFrame(data=headloss, columns=linknames, index=reporttimes)
-        
-                status = np.array(df['linkstatus'])
-                if self.convert_status:
-                    status[status <= 2] = 0
-                    status[status == 3] = 1
-                    status[status >= 5] = 1
-                    status[status == 4] = 2
-                self.results.link['status'] = pd.DataFrame(data=status, columns=linknames, index=reporttimes)
-                
-                setting = np.array(df['linksetting'])
-                # pump setting is relative speed (unitless)
-                setting[:, linktype == EN.PIPE] = to_si(self.flow_units, setting[:, linktype == EN.PIPE], HydParam.RoughnessCoeff, 
-                                                darcy_weisbach=darcy_weisbach)
-                setting[:, linktype == EN.PRV] = to_si(self.flow_units, setting[:, linktype == EN.PRV], HydParam.Pressure)
-                setting[:, linktype == EN.PSV] = to_si(self.flow_units, setting[:, linktype == EN.PSV], HydParam.Pressure)
-                setting[:, linktype == EN.PBV] = to_si(self.flow_units, setting[:, linktype == EN.PBV], HydParam.Pressure)
-                setting[:, linktype == EN.FCV] = to_si(self.flow_units, setting[:, linktype == EN.FCV], HydParam.Flow)
-                self.results.link['setting'] = pd.DataFrame(data=setting, columns=linknames, index=reporttimes)
-                
-                self.results.link['friction_factor'] = df['frictionfactor']
-                self.results.link['reaction_rate'] = QualParam.ReactionRate._to_si(self.flow_units, df['reactionrate'],self.mass_units) 
-            else:
-                self.results.node['demand'] = df['demand']
-                self.results.node['head'] = df['head']
-                self.results.node['pressure'] = df['pressure']
-                self.results.node['quality'] = df['quality']
-                
-                self.results.link['flowrate'] = df['flow']
-                self.results.link['headloss'] = df['headloss']
-                self.results.link['velocity'] = df['velocity']
-                self.results.link['quality'] = df['linkquality']
-                self.results.link['status'] = df['linkstatus']
-                self.results.link['setting'] = df['linksetting']
-                self.results.link['friction_factor'] = df['frictionfactor']
-                self.results.link['reaction_rate'] = df['reactionrate']
-            
+                    columns = slice(offset, offset + nlinks)
+                    names = linknames
+                    block_linktype = linktype
+                offset = columns.stop
+                if block not in blocks:
+                    continue
+                if lazy:
+                    value = BinFileResult(self, block, data, columns, names, reporttimes, block_linktype, convert)
+                else:
+                    values = np.array(data[:, columns])
+                    if convert:
+                        values = self._convert_block(block, values, block_linktype)
+                    value = pd.DataFrame(data=values, index=reporttimes, columns=names)
+                getattr(self.results, element)[name] = value
+            if not lazy:
+                del data
+
             logger.debug('... read epilog ...')
             # Read the averages and then the number of periods for checks
             averages = np.fromfile(fin, dtype=np.dtype(ftype), count=4)
@@ -18,9 +18,13 @@ import os.path
 import platform
 import sys
 from ctypes import byref
+from itertools import repeat
 
+import numpy as np
 from pkg_resources import resource_filename
 
+from wntr.epanet.util import EN
+
 epanet_toolkit = "wntr.epanet.toolkit"
 
 if os.name in ["nt", "dos"]:
@@ -114,6 +118,13 @@ class ENepanet:
     """Wrapper class to load the EPANET DLL object, then perform operations on
     the EPANET object that is created when a file is loaded.
 
+    With EPANET 2.2, each instance creates its own EPANET project with the
+    project-handle API (EN_createproject), and real values are exchanged as
+    doubles.  Since the library is called with the GIL released, separate
+    instances can run simulations concurrently in different threads of one
+    process (each with its own input, report and output files).  With EPANET
+    2.0, all instances share the single global project of the library.
+
     Parameters
     ----------
     inpfile : str
@@ -158,6 +169,15 @@ class ENepanet:
         self.inpfile = inpfile
         self.rptfile = rptfile
         self.binfile = binfile
+        self.errcode = 0
+        self.errcodelist = []
+        self.cur_time = 0
+        self.Warnflag = False
+        self.Errflag = False
+        self.fileLoaded = False
+        self._project = None
+        self._real = ctypes.c_float
+        self._value_buffers = {}
 
         if float(version) == 2.0:
             libnames = ["epanet2_x86", "epanet2", "epanet"]
@@ -184,13 +204,39 @@ class ENepanet:
                         epanet_toolkit, "Linux/lib%s.so" % lib
                     )
                     self.ENlib = ctypes.cdll.LoadLibrary(libepanet)
-                return  # OK!
+                break  # OK!
             except Exception as E1:
                 if lib == libnames[-1]:
                     raise E1
                 pass
+
+        if float(version) == 2.2:
+            # Each instance owns an EPANET project, so instances can be used
+            # concurrently (e.g., from different threads)
+            project = ctypes.c_void_p()
+            self.errcode = self.ENlib.EN_createproject(byref(project))
+            self._error()
+            self._project = project
+            self._real = ctypes.c_double
         return
 
+    def __del__(self):
+        project = getattr(self, "_project", None)
+        if project is not None:
+            self._project = None
+            self.ENlib.EN_deleteproject(project)
+
+    def _call(self, name, *args):
+        """Calls an EPANET toolkit function by name (without the EN prefix)
+
+        With EPANET 2.2, the EN_ function is called with this instance's
+        project handle; with EPANET 2.0, the EN function of the global
+        project is called.  The GIL is released while the function runs.
+        """
+        if self._project is None:
+            return getattr(self.ENlib, "EN" + name)(*args)
+        return getattr(self.ENlib, "EN_" + name)(self._project, *args)
+
     def isOpen(self):
         """Checks to see if the file is open"""
         return self.fileLoaded
@@ -238,7 +284,7 @@ class ENepanet:
         inpfile = inpfile.encode("ascii")
         rptfile = rptfile.encode("ascii")
         binfile = binfile.encode("ascii")
-        self.errcode = self.ENlib.ENopen(inpfile, rptfile, binfile)
+        self.errcode = self._call("open", inpfile, rptfile, binfile)
         self._error()
         if self.errcode < 100:
             self.fileLoaded = True
@@ -246,7 +292,7 @@ class ENepanet:
 
     def ENclose(self):
         """Frees all memory and files used by EPANET"""
-        self.errcode = self.ENlib.ENclose()
+        self.errcode = self._call("close")
         self._error()
         if self.errcode < 100:
             self.fileLoaded = False
@@ -254,7 +300,7 @@ class ENepanet:
 
     def ENsolveH(self):
         """Solves for network hydraulics in all time periods"""
-        self.errcode = self.ENlib.ENsolveH()
+        self.errcode = self._call("solveH")
         self._error()
         return
 
@@ -265,13 +311,13 @@ class ENepanet:
         Should not be called if ENsolveQ() will be used.
 
         """
-        self.errcode = self.ENlib.ENsaveH()
+        self.errcode = self._call("saveH")
         self._error()
         return
 
     def ENopenH(self):
         """Sets up data structures for hydraulic analysis"""
-        self.errcode = self.ENlib.ENopenH()
+        self.errcode = self._call("openH")
         self._error()
         return
 
@@ -287,7 +333,7 @@ class ENepanet:
             results should be saved to file (1) or not (0)
             
         """
-        self.errcode = self.ENlib.ENinitH(iFlag)
+        self.errcode = self._call("initH", iFlag)
         self._error()
         return
 
@@ -305,7 +351,7 @@ class ENepanet:
         
         """
         lT = ctypes.c_long()
-        self.errcode = self.ENlib.ENrunH(byref(lT))
+        self.errcode = self._call("runH", byref(lT))
         self._error()
         self.cur_time = lT.value
         return lT.value
@@ -324,13 +370,13 @@ class ENepanet:
          
         """
         lTstep = ctypes.c_long()
-        self.errcode = self.ENlib.ENnextH(byref(lTstep))
+        self.errcode = self._call("nextH", byref(lTstep))
         self._error()
         return lTstep.value
 
     def ENcloseH(self):
         """Frees data allocated by hydraulics solver"""
-        self.errcode = self.ENlib.ENcloseH()
+        self.errcode = self._call("closeH")
         self._error()
         return
 
@@ -343,7 +389,7 @@ class ENepanet:
             Name of hydraulics file to output
             
         """
-        self.errcode = self.ENlib.ENsavehydfile(filename.encode("ascii"))
+        self.errcode = self._call("savehydfile", filename.encode("ascii"))
         self._error()
         return
 
@@ -356,19 +402,19 @@ class ENepanet:
             Name of hydraulics file to use
             
         """
-        self.errcode = self.ENlib.ENusehydfile(filename.encode("ascii"))
+        self.errcode = self._call("usehydfile", filename.encode("ascii"))
         self._error()
         return
 
     def ENsolveQ(self):
         """Solves for network water quality in all time periods"""
-        self.errcode = self.ENlib.ENsolveQ()
+        self.errcode = self._call("solveQ")
         self._error()
         return
 
     def ENopenQ(self):
         """Sets up data structures for water quality analysis"""
-        self.errcode = self.ENlib.ENopenQ()
+        self.errcode = self._call("openQ")
         self._error()
         return
 
@@ -381,7 +427,7 @@ class ENepanet:
              EN_SAVE (1) if results saved to file, EN_NOSAVE (0) if not
              
         """
-        self.errcode = self.ENlib.ENinitQ(iSaveflag)
+        self.errcode = self._call("initQ", iSaveflag)
         self._error()
         return
 
@@ -399,7 +445,7 @@ class ENepanet:
          
         """
         lT = ctypes.c_long()
-        self.errcode = self.ENlib.ENrunQ(byref(lT))
+        self.errcode = self._call("runQ", byref(lT))
         self._error()
         return lT.value
 
@@ -417,19 +463,19 @@ class ENepanet:
          
         """
         lTstep = ctypes.c_long()
-        self.errcode = self.ENlib.ENnextQ(byref(lTstep))
+        self.errcode = self._call("nextQ", byref(lTstep))
         self._error()
         return lTstep.value
 
     def ENcloseQ(self):
         """Frees data allocated by water quality solver"""
-        self.errcode = self.ENlib.ENcloseQ()
+        self.errcode = self._call("closeQ")
         self._error()
         return
 
     def ENreport(self):
         """Writes report to report file"""
-        self.errcode = self.ENlib.ENreport()
+        self.errcode = self._call("report")
         self._error()
         return
 
@@ -448,7 +494,7 @@ class ENepanet:
         
         """
         iCount = ctypes.c_int()
-        self.errcode = self.ENlib.ENgetcount(iCode, byref(iCount))
+        self.errcode = self._call("getcount", iCode, byref(iCount))
         self._error()
         return iCount.value
 
@@ -461,7 +507,7 @@ class ENepanet:
         
         """
         iCode = ctypes.c_int()
-        self.errcode = self.ENlib.ENgetflowunits(byref(iCode))
+        self.errcode = self._call("getflowunits", byref(iCode))
         self._error()
         return iCode.value
 
@@ -479,7 +525,7 @@ class ENepanet:
         
         """
         iIndex = ctypes.c_int()
-        self.errcode = self.ENlib.ENgetnodeindex(sId.encode("ascii"), byref(iIndex))
+        self.errcode = self._call("getnodeindex", sId.encode("ascii"), byref(iIndex))
         self._error()
         return iIndex.value
 
@@ -499,11 +545,83 @@ class ENepanet:
         Value of node's parameter
 
         """
-        fValue = ctypes.c_float()
-        self.errcode = self.ENlib.ENgetnodevalue(iIndex, iCode, byref(fValue))
+        fValue = self._real()
+        self.errcode = self._call("getnodevalue", iIndex, iCode, byref(fValue))
         self._error()
         return fValue.value
 
+    def ENgetnodevalues(self, iCode, out=None):
+        """
+        Retrieves a parameter value for all nodes
+
+        The EPANET array function (EN_getnodevalues) is used if the library
+        provides it; otherwise the values are written by the single value
+        getter directly into a preallocated buffer.
+
+        Parameters
+        -------------
+        iCode : int
+            Node parameter code (see toolkit.optNodeParams)
+        out : numpy.ndarray, optional
+            Array (of length equal to the number of nodes) to fill with the values
+
+        Returns
+        ---------
+        numpy.ndarray of the nodes' parameter values, ordered by node index
+
+        """
+        return self._getvalues("node", iCode, out)
+
+    def ENgetlinkvalues(self, iCode, out=None):
+        """
+        Retrieves a parameter value for all links
+
+        The EPANET array function (EN_getlinkvalues) is used if the library
+        provides it; otherwise the values are written by the single value
+        getter directly into a preallocated buffer.
+
+        Parameters
+        -------------
+        iCode : int
+            Link parameter code (see toolkit.optLinkParams)
+        out : numpy.ndarray, optional
+            Array (of length equal to the number of links) to fill with the values
+
+        Returns
+        ---------
+        numpy.ndarray of the links' parameter values, ordered by link index
+
+        """
+        return self._getvalues("link", iCode, out)
+
+    def _getvalues(self, element, iCode, out):
+        count = self.ENgetcount(EN.NODECOUNT if element == "node" else EN.LINKCOUNT)
+        values = self._value_buffers.get(element)
+        if values is None or len(values[0]) != count:
+            # Scratch buffer of the library's real type, with one pointer per element
+            buffer = np.zeros(count, dtype=np.float64 if self._project is not None else np.float32)
+            address = buffer.ctypes.data
+            pointers = [ctypes.c_void_p(address + buffer.itemsize * i) for i in range(count)]
+            values = (buffer, list(range(1, count + 1)), pointers)
+            self._value_buffers[element] = values
+        buffer, indexes, pointers = values
+        array_func = getattr(self.ENlib, "EN_get%svalues" % element, None) if self._project is not None else None
+        if array_func is not None:
+            self.errcode = array_func(self._project, iCode, pointers[0]) if count > 0 else 0
+        elif self._project is not None:
+            func = getattr(self.ENlib, "EN_get%svalue" % element)
+            errcodes = list(map(func, repeat(self._project, count), indexes, repeat(iCode, count), pointers))
+            self.errcode = max(errcodes) if count > 0 else 0
+        else:
+            func = getattr(self.ENlib, "ENget%svalue" % element)
+            errcodes = list(map(func, indexes, repeat(iCode, count), pointers))
+            self.errcode = max(errcodes) if count > 0 else 0
+        self._error()
+        if out is None:
+            return buffer.astype(np.float64)
+        out[:] = buffer
+        return out
+
     def ENgetlinkindex(self, sId):
         """Retrieves index of a link with specific ID
 
@@ -518,7 +636,7 @@ class ENepanet:
 
         """
         iIndex = ctypes.c_int()
-        self.errcode = self.ENlib.ENgetlinkindex(sId.encode("ascii"), byref(iIndex))
+        self.errcode = self._call("getlinkindex", sId.encode("ascii"), byref(iIndex))
         self._error()
         return iIndex.value
 
@@ -537,8 +655,8 @@ class ENepanet:
         Value of link's parameter
 
         """
-        fValue = ctypes.c_float()
-        self.errcode = self.ENlib.ENgetlinkvalue(iIndex, iCode, byref(fValue))
+        fValue = self._real()
+        self.errcode = self._call("getlinkvalue", iIndex, iCode, byref(fValue))
         self._error()
         return fValue.value
 
@@ -553,8 +671,506 @@ class ENepanet:
         """
 
         inpfile = inpfile.encode("ascii")
-        self.errcode = self.ENlib.ENsaveinpfile(inpfile)
+        self.errcode = self._call("saveinpfile", inpfile)
+        self._error()
+
+        return
+
+
+    def ENinit(self, rptfile, binfile, iUnits, iHeadloss):
+        """Initializes an empty EPANET project that is populated with the toolkit functions
+        instead of being read from an input file (EPANET 2.2 only)
+
+        Parameters
+        -------------
+        rptfile : str
+            Report file to create; an empty string for none
+        binfile : str
+            Binary output file to create; an empty string for none
+        iUnits : int
+            Flow units code (see toolkit.optFlowUnits)
+        iHeadloss : int
+            Head loss formula code (0 = H-W, 1 = D-W, 2 = C-M)
+
+        """
+        if self.fileLoaded:
+            self.ENclose()
+        if self.fileLoaded:
+            raise RuntimeError("File is loaded and cannot be closed")
+        self.errcode = self._call("init", rptfile.encode("ascii"), binfile.encode("ascii"), iUnits, iHeadloss)
+        self._error()
+        if self.errcode < 100:
+            self.fileLoaded = True
+        return
+
+    def ENaddpattern(self, sId):
+        """Adds a new time pattern and returns its index
+
+        Parameters
+        -------------
+        sId : str
+            Pattern ID
+
+        Returns
+        ---------
+        Index of the new pattern
+
+        """
+        self.errcode = self._call("addpattern", sId.encode("ascii"))
+        self._error()
+        return self.ENgetpatternindex(sId)
+
+    def ENgetpatternindex(self, sId):
+        """Retrieves index of a time pattern with specific ID
+
+        Parameters
+        -------------
+        sId : str
+            Pattern ID
+
+        Returns
+        ---------
+        Index of pattern in list of patterns
+
+        """
+        iIndex = ctypes.c_int()
+        self.errcode = self._call("getpatternindex", sId.encode("ascii"), byref(iIndex))
+        self._error()
+        return iIndex.value
+
+    def ENsetpattern(self, iIndex, values):
+        """Sets all of the multiplier factors for a time pattern
+
+        Parameters
+        -------------
+        iIndex : int
+            Pattern index
+        values : list of float
+            Multiplier factors
+
+        """
+        fValues = (self._real * max(len(values), 1))(*values)
+        self.errcode = self._call("setpattern", iIndex, fValues, len(values))
+        self._error()
+        return
+
+    def ENaddcurve(self, sId):
+        """Adds a new data curve and returns its index
+
+        Parameters
+        -------------
+        sId : str
+            Curve ID
+
+        Returns
+        ---------
+        Index of the new curve
+
+        """
+        self.errcode = self._call("addcurve", sId.encode("ascii"))
+        self._error()
+        return self.ENgetcurveindex(sId)
+
+    def ENgetcurveindex(self, sId):
+        """Retrieves index of a data curve with specific ID
+
+        Parameters
+        -------------
+        sId : str
+            Curve ID
+
+        Returns
+        ---------
+        Index of curve in list of curves
+
+        """
+        iIndex = ctypes.c_int()
+        self.errcode = self._call("getcurveindex", sId.encode("ascii"), byref(iIndex))
+        self._error()
+        return iIndex.value
+
+    def ENsetcurve(self, iIndex, xValues, yValues):
+        """Sets all of the points of a data curve
+
+        Parameters
+        -------------
+        iIndex : int
+            Curve index
+        xValues : list of float
+            X values of the points
+        yValues : list of float
+            Y values of the points
+
+        """
+        nPoints = len(xValues)
+        fX = (self._real * max(nPoints, 1))(*xValues)
+        fY = (self._real * max(nPoints, 1))(*yValues)
+        self.errcode = self._call("setcurve", iIndex, fX, fY, nPoints)
+        self._error()
+        return
+
+    def ENaddnode(self, sId, iType):
+        """Adds a new node and returns its index
+
+        Parameters
+        -------------
+        sId : str
+            Node ID
+        iType : int
+            Node type code (see toolkit.optNodeTypes)
+
+        Returns
+        ---------
+        Index of the new node
+
+        """
+        iIndex = ctypes.c_int()
+        self.errcode = self._call("addnode", sId.encode("ascii"), iType, byref(iIndex))
+        self._error()
+        return iIndex.value
+
+    def ENaddlink(self, sId, iType, sFromNode, sToNode):
+        """Adds a new link and returns its index
+
+        Parameters
+        -------------
+        sId : str
+            Link ID
+        iType : int
+            Link type code (see toolkit.optLinkTypes)
+        sFromNode : str
+            ID of the start node
+        sToNode : str
+            ID of the end node
+
+        Returns
+        ---------
+        Index of the new link
+
+        """
+        iIndex = ctypes.c_int()
+        self.errcode = self._call("addlink", sId.encode("ascii"), iType, sFromNode.encode("ascii"),
+                                  sToNode.encode("ascii"), byref(iIndex))
+        self._error()
+        return iIndex.value
+
+    def ENsetnodevalue(self, iIndex, iCode, fValue):
+        """Sets a parameter value for a node
+
+        Parameters
+        -------------
+        iIndex : int
+            Node index
+        iCode : int
+            Node parameter code (see toolkit.optNodeParams)
+        fValue : float
+            Parameter value
+
+        """
+        self.errcode = self._call("setnodevalue", iIndex, iCode, self._real(fValue))
+        self._error()
+        return
+
+    def ENsetlinkvalue(self, iIndex, iCode, fValue):
+        """Sets a parameter value for a link
+
+        Parameters
+        -------------
+        iIndex : int
+            Link index
+        iCode : int
+            Link parameter code (see toolkit.optLinkParams)
+        fValue : float
+            Parameter value
+
+        """
+        self.errcode = self._call("setlinkvalue", iIndex, iCode, self._real(fValue))
+        self._error()
+        return
+
+    def ENsetjuncdata(self, iIndex, fElev, fDemand, sPattern):
+        """Sets the elevation, primary base demand and primary demand pattern of a junction
+
+        Parameters
+        -------------
+        iIndex : int
+            Junction index
+        fElev : float
+            Elevation
+        fDemand : float
+            Primary base demand
+        sPattern : str
+            ID of the primary demand pattern; an empty string for none
+
+        """
+        self.errcode = self._call("setjuncdata", iIndex, self._real(fElev), self._real(fDemand),
+                                  sPattern.encode("ascii"))
+        self._error()
+        return
+
+    def ENsettankdata(self, iIndex, fElev, fInitLevel, fMinLevel, fMaxLevel, fDiam, fMinVol, sVolCurve):
+        """Sets the properties of a tank
+
+        Parameters
+        -------------
+        iIndex : int
+            Tank index
+        fElev : float
+            Elevation of the tank bottom
+        fInitLevel : float
+            Initial water level
+        fMinLevel : float
+            Minimum water level
+        fMaxLevel : float
+            Maximum water level
+        fDiam : float
+            Diameter
+        fMinVol : float
+            Volume at the minimum water level
+        sVolCurve : str
+            ID of the volume curve; an empty string for none
+
+        """
+        self.errcode = self._call("settankdata", iIndex, self._real(fElev), self._real(fInitLevel),
+                                  self._real(fMinLevel), self._real(fMaxLevel),
+                                  self._real(fDiam), self._real(fMinVol),
+                                  sVolCurve.encode("ascii"))
+        self._error()
+        return
+
+    def ENsetpipedata(self, iIndex, fLength, fDiam, fRoughness, fMinorLoss):
+        """Sets the length, diameter, roughness and minor loss coefficient of a pipe
+
+        Parameters
+        -------------
+        iIndex : int
+            Pipe index
+        fLength : float
+            Length
+        fDiam : float
+            Diameter
+        fRoughness : float
+            Roughness coefficient
+        fMinorLoss : float
+            Minor loss coefficient
+
+        """
+        self.errcode = self._call("setpipedata", iIndex, self._real(fLength), self._real(fDiam),
+                                  self._real(fRoughness), self._real(fMinorLoss))
+        self._error()
+        return
+
+    def ENgetnumdemands(self, iIndex):
+        """Retrieves the number of demand categories of a junction
+
+        Parameters
+        -------------
+        iIndex : int
+            Junction index
+
+        Returns
+        ---------
+        Number of demand categories
+
+        """
+        iCount = ctypes.c_int()
+        self.errcode = self._call("getnumdemands", iIndex, byref(iCount))
+        self._error()
+        return iCount.value
+
+    def ENsetbasedemand(self, iIndex, iDemand, fDemand):
+        """Sets the base demand of one of a junction's demand categories
+
+        Parameters
+        -------------
+        iIndex : int
+            Junction index
+        iDemand : int
+            Demand category index (starting at 1)
+        fDemand : float
+            Base demand
+
+        """
+        self.errcode = self._call("setbasedemand", iIndex, iDemand, self._real(fDemand))
+        self._error()
+        return
+
+    def ENsetdemandpattern(self, iIndex, iDemand, iPattern):
+        """Sets the time pattern of one of a junction's demand categories
+
+        Parameters
+        -------------
+        iIndex : int
+            Junction index
+        iDemand : int
+            Demand category index (starting at 1)
+        iPattern : int
+            Pattern index; 0 for none
+
+        """
+        self.errcode = self._call("setdemandpattern", iIndex, iDemand, iPattern)
+        self._error()
+        return
+
+    def ENadddemand(self, iIndex, fDemand, sPattern, sName):
+        """Appends a new demand category to a junction
+
+        Parameters
+        -------------
+        iIndex : int
+            Junction index
+        fDemand : float
+            Base demand
+        sPattern : str
+            ID of the demand pattern; an empty string for none
+        sName : str
+            Name of the demand category; an empty string for none
+
+        """
+        self.errcode = self._call("adddemand", iIndex, self._real(fDemand), sPattern.encode("ascii"),
+                                  sName.encode("ascii"))
+        self._error()
+        return
+
+    def ENsetheadcurveindex(self, iIndex, iCurve):
+        """Assigns a head curve to a pump
+
+        Parameters
+        -------------
+        iIndex : int
+            Pump (link) index
+        iCurve : int
+            Curve index
+
+        """
+        self.errcode = self._call("setheadcurveindex", iIndex, iCurve)
+        self._error()
+        return
+
+    def ENsetoption(self, iCode, fValue):
+        """Sets the value of an analysis option
+
+        Parameters
+        -------------
+        iCode : int
+            Option code (see toolkit.optOptions)
+        fValue : float
+            Option value
+
+        """
+        self.errcode = self._call("setoption", iCode, self._real(fValue))
+        self._error()
+        return
+
+    def ENsettimeparam(self, iCode, lValue):
+        """Sets the value of a time parameter
+
+        Parameters
+        -------------
+        iCode : int
+            Time parameter code (see toolkit.optTimeParams)
+        lValue : int
+            Time parameter value (seconds)
+
+        """
+        self.errcode = self._call("settimeparam", iCode, ctypes.c_long(int(lValue)))
+        self._error()
+        return
+
+    def ENgettimeparam(self, iCode):
+        """Retrieves the value of a time parameter
+
+        Parameters
+        -------------
+        iCode : int
+            Time parameter code (see toolkit.optTimeParams)
+
+        Returns
+        ---------
+        Time parameter value (seconds)
+
+        """
+        lValue = ctypes.c_long()
+        self.errcode = self._call("gettimeparam", iCode, byref(lValue))
         self._error()
+        return lValue.value
 
+    def ENsetqualtype(self, iType, sChemName, sChemUnits, sTraceNode):
+        """Sets the type of water quality analysis
+
+        Parameters
+        -------------
+        iType : int
+            Quality analysis code (see toolkit.optQualTypes)
+        sChemName : str
+            Name of the chemical
+        sChemUnits : str
+            Concentration units of the chemical
+        sTraceNode : str
+            ID of the trace node for source tracing
+
+        """
+        self.errcode = self._call("setqualtype", iType, sChemName.encode("ascii"), sChemUnits.encode("ascii"),
+                                  sTraceNode.encode("ascii"))
+        self._error()
+        return
+
+    def ENsetdemandmodel(self, iModel, fPmin, fPreq, fPexp):
+        """Sets the demand model
+
+        Parameters
+        -------------
+        iModel : int
+            Demand model code (0 = demand driven, 1 = pressure driven)
+        fPmin : float
+            Pressure below which there is no demand
+        fPreq : float
+            Pressure required to deliver the full demand
+        fPexp : float
+            Pressure exponent
+
+        """
+        self.errcode = self._call("setdemandmodel", iModel, self._real(fPmin), self._real(fPreq),
+                                  self._real(fPexp))
+        self._error()
         return
 
+    def ENaddcontrol(self, iType, iLink, fSetting, iNode, fLevel):
+        """Adds a new simple control and returns its index
+
+        Parameters
+        -------------
+        iType : int
+            Control type code (see toolkit.optControlTypes)
+        iLink : int
+            Index of the controlled link
+        fSetting : float
+            Setting (or status, 0 = closed and 1 = open) applied to the link
+        iNode : int
+            Index of the node for a level control; 0 for a time control
+        fLevel : float
+            Tank level or junction pressure for a level control; time (seconds) for a time control
+
+        Returns
+        ---------
+        Index of the new control
+
+        """
+        iIndex = ctypes.c_int()
+        self.errcode = self._call("addcontrol", iType, iLink, self._real(fSetting), iNode,
+                                  self._real(fLevel), byref(iIndex))
+        self._error()
+        return iIndex.value
+
+    def ENaddrule(self, sRule):
+        """Adds a new rule-based control
+
+        Parameters
+        -------------
+        sRule : str
+            Text of the rule, in the format of the [RULES] section of an EPANET INP file
+
+        """
+        self.errcode = self._call("addrule", sRule.encode("ascii"))
+        self._error()
+        return
@@ -1016,8 +1016,8 @@ class EN(enum.IntEnum):
 
     The enums can be broken in the following groups.
 
-    - Node parameters: :attr:`~ELEVATION`, :attr:`~BASEDEMAND`, :attr:`~PATTERN`, :attr:`~EMITTER`, :attr:`~INITQUAL`, :attr:`~SOURCEQUAL`, :attr:`~SOURCEPAT`, :attr:`~SOURCETYPE`, :attr:`~TANKLEVEL`, :attr:`~DEMAND`, :attr:`~HEAD`, :attr:`~PRESSURE`, :attr:`~QUALITY`, :attr:`~SOURCEMASS`, :attr:`~INITVOLUME`, :attr:`~MIXMODEL`, :attr:`~MIXZONEVOL`, :attr:`~TANKDIAM`, :attr:`~MINVOLUME`, :attr:`~VOLCURVE`, :attr:`~MINLEVEL,`, :attr:`~MAXLEVEL`, :attr:`~MIXFRACTION`, :attr:`~TANK_KBULK`, :attr:`~TANKVOLUME`, :attr:`~MAXVOLUME`
-    - Link parameters: :attr:`~DIAMETER`, :attr:`~LENGTH`, :attr:`~ROUGHNESS`, :attr:`~MINORLOSS`, :attr:`~INITSTATUS`, :attr:`~INITSETTING`, :attr:`~KBULK`, :attr:`~KWALL`, :attr:`~FLOW`, :attr:`~VELOCITY`, :attr:`~HEADLOSS`, :attr:`~STATUS`, :attr:`~SETTING`, :attr:`~ENERGY`, :attr:`~LINKQUAL`, :attr:`~LINKPATTERN`
+    - Node parameters: :attr:`~ELEVATION`, :attr:`~BASEDEMAND`, :attr:`~PATTERN`, :attr:`~EMITTER`, :attr:`~INITQUAL`, :attr:`~SOURCEQUAL`, :attr:`~SOURCEPAT`, :attr:`~SOURCETYPE`, :attr:`~TANKLEVEL`, :attr:`~DEMAND`, :attr:`~HEAD`, :attr:`~PRESSURE`, :attr:`~QUALITY`, :attr:`~SOURCEMASS`, :attr:`~INITVOLUME`, :attr:`~MIXMODEL`, :attr:`~MIXZONEVOL`, :attr:`~TANKDIAM`, :attr:`~MINVOLUME`, :attr:`~VOLCURVE`, :attr:`~MINLEVEL,`, :attr:`~MAXLEVEL`, :attr:`~MIXFRACTION`, :attr:`~TANK_KBULK`, :attr:`~TANKVOLUME`, :attr:`~MAXVOLUME`, :attr:`~CANOVERFLOW`
+    - Link parameters: :attr:`~DIAMETER`, :attr:`~LENGTH`, :attr:`~ROUGHNESS`, :attr:`~MINORLOSS`, :attr:`~INITSTATUS`, :attr:`~INITSETTING`, :attr:`~KBULK`, :attr:`~KWALL`, :attr:`~FLOW`, :attr:`~VELOCITY`, :attr:`~HEADLOSS`, :attr:`~STATUS`, :attr:`~SETTING`, :attr:`~ENERGY`, :attr:`~LINKQUAL`, :attr:`~LINKPATTERN`, :attr:`~PUMP_STATE`, :attr:`~PUMP_EFFIC`, :attr:`~PUMP_POWER`, :attr:`~PUMP_HCURVE`, :attr:`~PUMP_ECURVE`, :attr:`~PUMP_ECOST`, :attr:`~PUMP_EPAT`, :attr:`~LINK_INCONTROL`, :attr:`~GPV_CURVE`
     - Time parameters: :attr:`~DURATION`, :attr:`~HYDSTEP`, :attr:`~QUALSTEP`, :attr:`~PATTERNSTEP`, :attr:`~PATTERNSTART`, :attr:`~REPORTSTEP`, :attr:`~REPORTSTART`, :attr:`~RULESTEP`, :attr:`~STATISTIC`, :attr:`~PERIODS`, :attr:`~STARTTIME`, :attr:`~HTIME`, :attr:`~HALTFLAG`, :attr:`~NEXTEVENT`
     - Solver parameters: :attr:`~ITERATIONS`, :attr:`~RELATIVEERROR`
     - Component counts: :attr:`~NODECOUNT`, :attr:`~TANKCOUNT`, :attr:`~LINKCOUNT`, :attr:`~PATCOUNT`, :attr:`~CURVECOUNT`, :attr:`~CONTROLCOUNT`
@@ -1026,7 +1026,9 @@ class EN(enum.IntEnum):
     - Quality analysis types: :attr:`~NONE`, :attr:`~CHEM`, :attr:`~AGE`, :attr:`~TRACE`
     - Source quality types: :attr:`~CONCEN`, :attr:`~MASS`, :attr:`~SETPOINT`, :attr:`~FLOWPACED`
     - Flow unit types: :attr:`~CFS`, :attr:`~GPM`, :attr:`~MGD`, :attr:`~IMGD`, :attr:`~AFD`, :attr:`~LPS`, :attr:`~LPM`, :attr:`~MLD`, :attr:`~CMH`, :attr:`~CMD`
-    - Miscelaneous options: :attr:`~TRIALS`, :attr:`~ACCURACY`, :attr:`~TOLERANCE`, :attr:`~EMITEXPON`, :attr:`~DEMANDMULT`
+    - Miscelaneous options: :attr:`~TRIALS`, :attr:`~ACCURACY`, :attr:`~TOLERANCE`, :attr:`~EMITEXPON`, :attr:`~DEMANDMULT`, :attr:`~HEADERROR`, :attr:`~FLOWCHANGE`, :attr:`~HEADLOSSFORM`, :attr:`~GLOBALEFFIC`, :attr:`~GLOBALPRICE`, :attr:`~GLOBALPATTERN`, :attr:`~DEMANDCHARGE`, :attr:`~SP_GRAVITY`, :attr:`~SP_VISCOS`, :attr:`~UNBALANCED`, :attr:`~CHECKFREQ`, :attr:`~MAXCHECK`, :attr:`~DAMPLIMIT`, :attr:`~SP_DIFFUS`, :attr:`~BULKORDER`, :attr:`~WALLORDER`, :attr:`~TANKORDER`, :attr:`~CONCENLIMIT`
+    - Head loss formula types: :attr:`~HW`, :attr:`~DW`, :attr:`~CM`
+    - Demand model types: :attr:`~DDA`, :attr:`~PDA`
     - Control types: :attr:`~LOWLEVEL`, :attr:`~HILEVEL`, :attr:`~TIMER`, :attr:`~TIMEOFDAY`
     - Time statistic types: :attr:`~NONE`, :attr:`~AVERAGE`, :attr:`~MINIMUM`, :attr:`~MAXIMUM`, :attr:`~RANGE`
     - Tank mixing model types: :attr:`~MIX1`, :attr:`~MIX2`, :attr:`~FIFO`, :attr:`~LIFO`
@@ -1063,6 +1065,7 @@ class EN(enum.IntEnum):
     TANK_KBULK = 23
     TANKVOLUME = 24
     MAXVOLUME = 25
+    CANOVERFLOW = 26
 
     # Link parameters
     DIAMETER = 0
@@ -1081,6 +1084,15 @@ class EN(enum.IntEnum):
     ENERGY = 13
     LINKQUAL = 14
     LINKPATTERN = 15
+    PUMP_STATE = 16
+    PUMP_EFFIC = 17
+    PUMP_POWER = 18
+    PUMP_HCURVE = 19
+    PUMP_ECURVE = 20
+    PUMP_ECOST = 21
+    PUMP_EPAT = 22
+    LINK_INCONTROL = 23
+    GPV_CURVE = 24
 
     # Time parameters
     DURATION = 0
@@ -1156,6 +1168,33 @@ class EN(enum.IntEnum):
     TOLERANCE = 2
     EMITEXPON = 3
     DEMANDMULT = 4
+    HEADERROR = 5
+    FLOWCHANGE = 6
+    HEADLOSSFORM = 7
+    GLOBALEFFIC = 8
+    GLOBALPRICE = 9
+    GLOBALPATTERN = 10
+    DEMANDCHARGE = 11
+    SP_GRAVITY = 12
+    SP_VISCOS = 13
+    UNBALANCED = 14
+    CHECKFREQ = 15
+    MAXCHECK = 16
+    DAMPLIMIT = 17
+    SP_DIFFUS = 18
+    BULKORDER = 19
+    WALLORDER = 20
+    TANKORDER = 21
+    CONCENLIMIT = 22
+
+    # Head loss formula types
+    HW = 0
+    DW = 1
+    CM = 2
+
+    # Demand model types
+    DDA = 0
+    PDA = 1
 
     # Control types
     LOWLEVEL = 0
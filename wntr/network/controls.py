@@ -124,6 +124,17 @@ class Observer(six.with_metaclass(abc.ABCMeta, object)):
         pass
 
 
+def _to_array(values, count):
+    """
+    Convert an iterable of values to an array of floats. Values that are missing (None) or nan raise a
+    ValueError so that the conditions are evaluated one at a time instead (see ControlManager._evaluate).
+    """
+    values = np.fromiter(values, dtype=float, count=count)
+    if np.isnan(values).any():
+        raise ValueError('Values are missing or nan')
+    return values
+
+
 class Comparison(enum.Enum):
     """
     An enum class for comparison operators.
@@ -312,6 +323,59 @@ class ControlCondition(six.with_metaclass(abc.ABCMeta, object)):
         return self.evaluate()
     __nonzero__ = __bool__
 
+    def _next_change_time(self, time):
+        """
+        A lower bound on the simulation times after `time` at which the condition could evaluate
+        differently than it does at `time`, assuming that only the simulation time and the tank levels
+        (at the current tank flow rates) change. This is used to skip rule timesteps at which no rule
+        can change the network.
+
+        Parameters
+        ----------
+        time: float
+            The simulation time at which the condition was last evaluated
+
+        Returns
+        -------
+        next_time: float
+            `time` if the condition could evaluate differently at any later time, and np.inf if it
+            cannot change
+        """
+        return time
+
+    def _dependencies(self):
+        """
+        The values that the evaluation of the condition depends on. The ControlManager only re-evaluates
+        a condition when one of these values changes.
+
+        Returns
+        -------
+        dependencies: list of tuple or None
+            (object, attribute) pairs, or None if the condition depends on anything else (e.g., the
+            simulation time) and has to be evaluated every time
+        """
+        return None
+
+    @classmethod
+    def _compile(cls, conditions):
+        """
+        Compile conditions of this type into a function that evaluates all of them at once with
+        vectorized comparisons. Only conditions without side effects (e.g., no backtracking) can be compiled.
+
+        Parameters
+        ----------
+        conditions: list of ControlCondition
+            Conditions of this type
+
+        Returns
+        -------
+        func: callable or None
+            None if the conditions cannot be compiled. Otherwise, a function without arguments that returns
+            a boolean array with the value of each condition. The function raises a ValueError or TypeError
+            if the conditions have to be evaluated one at a time instead (e.g., to raise the appropriate error).
+        """
+        return None
+
     @classmethod
     def _parse_value(cls, value):
         try:
@@ -521,6 +585,25 @@ class TimeOfDayCondition(ControlCondition):
             return False
 
 
+    def _next_change_time(self, time):
+        offset = self._model.options.time.start_clocktime
+        shifted_time = time + offset
+        first_day = self._first_day * 86400.
+        breakpoints = [first_day]
+        if self._repeat:
+            # the time of day is compared to the threshold and wraps around at the threshold
+            for shift in [self._threshold, 2 * self._threshold]:
+                day = math.ceil((shifted_time - shift) / 86400.)
+                breakpoints.append(shift + day * 86400.)
+        else:
+            breakpoints.append(first_day + self._threshold)
+        # the times are truncated to integers when evaluated
+        breakpoints = [math.floor(t) - 1 for t in breakpoints if t >= shifted_time]
+        if len(breakpoints) == 0:
+            return np.inf
+        return max(time, min(breakpoints) - offset)
+
+
 @DocInheritor({'requires', 'evaluate', 'name'})
 class SimTimeCondition(ControlCondition):
     """Condition based on time since start of the simulation.
@@ -652,6 +735,19 @@ class SimTimeCondition(ControlCondition):
             return False
 
 
+    def _next_change_time(self, time):
+        breakpoints = [self._threshold]
+        if self._repeat:
+            # the time is compared to the threshold and wraps around at the threshold
+            for shift in [self._threshold, 2 * self._threshold]:
+                period = math.ceil((time - shift) / self._repeat)
+                breakpoints.append(shift + period * self._repeat)
+        breakpoints = [math.floor(t) for t in breakpoints if t >= time]
+        if len(breakpoints) == 0:
+            return np.inf
+        return max(time, min(breakpoints))
+
+
 @DocInheritor({'requires', 'evaluate', 'name'})
 class ValueCondition(ControlCondition):
     """Compare a network element attribute to a set value.
@@ -747,6 +843,35 @@ class ValueCondition(ControlCondition):
         state = relation(np.round(cur_value,10), np.round(thresh_value,10))
         return bool(state)
 
+    def _next_change_time(self, time):
+        # junction and link attributes only change when the hydraulics are solved
+        if isinstance(self._source_obj, (Junction, Pipe, Pump, Valve)):
+            return np.inf
+        return time
+
+    def _dependencies(self):
+        return [(self._source_obj, self._source_attr)]
+
+    @classmethod
+    def _compile(cls, conditions):
+        objs = [c._source_obj for c in conditions]
+        attrs = [c._source_attr for c in conditions]
+        thresholds = np.array([0.0 if np.isnan(c._threshold) else c._threshold for c in conditions], dtype=float)
+        thresholds = np.round(thresholds, 10)
+        relations = OrderedDict()
+        for i, c in enumerate(conditions):
+            relation = np.greater if np.isnan(c._threshold) else c._relation.func
+            relations.setdefault(relation, list()).append(i)
+        relations = [(relation, np.array(ndx)) for relation, ndx in relations.items()]
+
+        def evaluate():
+            values = np.round(_to_array(map(getattr, objs, attrs), len(objs)), 10)
+            res = np.empty(len(objs), dtype=bool)
+            for relation, ndx in relations:
+                res[ndx] = relation(values[ndx], thresholds[ndx])
+            return res
+        return evaluate
+
 
 @DocInheritor({'requires', 'evaluate'})
 class TankLevelCondition(ValueCondition):
@@ -834,6 +959,34 @@ class TankLevelCondition(ValueCondition):
         self._last_value = cur_value  # update the last value
         return bool(state)
 
+    def _next_change_time(self, time):
+        tank = self._source_obj
+        if np.isnan(self._threshold):
+            return time
+        if self._source_attr == 'head':
+            thresh_level = self._threshold - tank.elevation
+        else:
+            thresh_level = self._threshold
+        level = tank.level
+        if abs(level - thresh_level) <= 1e-8:
+            return time
+        if tank.demand is None or tank.demand == 0:
+            return np.inf
+        # the tank volume changes at the rate tank.demand until the next hydraulic timestep
+        dt = (tank.get_volume(thresh_level) - tank.get_volume(level)) / tank.demand
+        if dt <= 0:
+            return np.inf
+        return time + max(0, math.floor(dt) - 1)
+
+    def _dependencies(self):
+        # the backtrack depends on the level at the previous evaluation
+        return [(self._source_obj, self._source_attr), (self, '_last_value')]
+
+    @classmethod
+    def _compile(cls, conditions):
+        # evaluating a TankLevelCondition updates _last_value and the backtrack
+        return None
+
 
 @DocInheritor({'requires', 'evaluate', 'name'})
 class RelativeCondition(ControlCondition):
@@ -936,6 +1089,75 @@ class RelativeCondition(ControlCondition):
         state = relation(cur_value, thresh_value)
         return bool(state)
 
+    def _next_change_time(self, time):
+        # junction and link attributes only change when the hydraulics are solved
+        if isinstance(self._source_obj, (Junction, Pipe, Pump, Valve)) and \
+                isinstance(self._threshold_obj, (Junction, Pipe, Pump, Valve)):
+            return np.inf
+        return time
+
+    def _dependencies(self):
+        return [(self._source_obj, self._source_attr), (self._threshold_obj, self._threshold_attr)]
+
+    @classmethod
+    def _compile(cls, conditions):
+        source_objs = [c._source_obj for c in conditions]
+        source_attrs = [c._source_attr for c in conditions]
+        threshold_objs = [c._threshold_obj for c in conditions]
+        threshold_attrs = [c._threshold_attr for c in conditions]
+        relations = OrderedDict()
+        for i, c in enumerate(conditions):
+            relations.setdefault(c._relation.func, list()).append(i)
+        relations = [(relation, np.array(ndx)) for relation, ndx in relations.items()]
+
+        def evaluate():
+            n = len(conditions)
+            values = _to_array(map(getattr, source_objs, source_attrs), n)
+            thresholds = _to_array(map(getattr, threshold_objs, threshold_attrs), n)
+            res = np.empty(n, dtype=bool)
+            for relation, ndx in relations:
+                res[ndx] = relation(values[ndx], thresholds[ndx])
+            return res
+        return evaluate
+
+
+def _combined_dependencies(cond1, cond2):
+    # The backtrack of an OrCondition/AndCondition combines the backtracks of both conditions, and the
+    # second condition is not always evaluated; only combinations of conditions that never backtrack
+    # can be re-evaluated based on their values alone.
+    deps = []
+    for condition in (cond1, cond2):
+        if isinstance(condition, TankLevelCondition):
+            return None
+        condition_deps = condition._dependencies()
+        if condition_deps is None:
+            return None
+        deps.extend(condition_deps)
+    return deps
+
+
+def _compile_conditions(conditions):
+    """
+    Compile a list of conditions of any type (see ControlCondition._compile). Returns None if
+    any of the conditions cannot be compiled.
+    """
+    groups = OrderedDict()
+    for i, c in enumerate(conditions):
+        groups.setdefault(type(c), list()).append(i)
+    compiled = list()
+    for condition_type, ndx in groups.items():
+        func = condition_type._compile([conditions[i] for i in ndx])
+        if func is None:
+            return None
+        compiled.append((np.array(ndx), func))
+
+    def evaluate():
+        res = np.empty(len(conditions), dtype=bool)
+        for ndx, func in compiled:
+            res[ndx] = func()
+        return res
+    return evaluate
+
 
 @DocInheritor({'requires', 'evaluate', 'backtrack'})
 class OrCondition(ControlCondition):
@@ -998,6 +1220,23 @@ class OrCondition(ControlCondition):
     def backtrack(self):
         return np.max([self._condition_1.backtrack, self._condition_2.backtrack])
 
+    def _next_change_time(self, time):
+        return min(self._condition_1._next_change_time(time), self._condition_2._next_change_time(time))
+
+    def _dependencies(self):
+        return _combined_dependencies(self._condition_1, self._condition_2)
+
+    @classmethod
+    def _compile(cls, conditions):
+        func_1 = _compile_conditions([c._condition_1 for c in conditions])
+        func_2 = _compile_conditions([c._condition_2 for c in conditions])
+        if func_1 is None or func_2 is None:
+            return None
+
+        def evaluate():
+            return func_1() | func_2()
+        return evaluate
+
     def requires(self):
         req = self._condition_1.requires()
         req.update(self._condition_2.requires())
@@ -1064,6 +1303,23 @@ class AndCondition(ControlCondition):
     def backtrack(self):
         return np.min([self._condition_1.backtrack, self._condition_2.backtrack])
 
+    def _next_change_time(self, time):
+        return min(self._condition_1._next_change_time(time), self._condition_2._next_change_time(time))
+
+    def _dependencies(self):
+        return _combined_dependencies(self._condition_1, self._condition_2)
+
+    @classmethod
+    def _compile(cls, conditions):
+        func_1 = _compile_conditions([c._condition_1 for c in conditions])
+        func_2 = _compile_conditions([c._condition_2 for c in conditions])
+        if func_1 is None or func_2 is None:
+            return None
+
+        def evaluate():
+            return func_1() & func_2()
+        return evaluate
+
     def requires(self):
         req = self._condition_1.requires()
         req.update(self._condition_2.requires())
@@ -2030,7 +2286,12 @@ class Rule(ControlBase):
         return text
 
     def is_control_action_required(self):
-        do = self._condition.evaluate()
+        return self._is_control_action_required(self._condition.evaluate())
+
+    def _is_control_action_required(self, do):
+        """
+        The result of is_control_action_required given the value of the condition.
+        """
         back = self._condition.backtrack
         if do:
             self._which = 'then'
@@ -2158,13 +2419,32 @@ class Control(Rule):
 class ControlManager(Observer):
     """
     A class for managing controls and identifying changes made by those controls.
+
+    Controls whose conditions only depend on attributes of network elements (see
+    :class:`~wntr.network.controls.ValueCondition` and :class:`~wntr.network.controls.RelativeCondition`)
+    are indexed by those attributes, and check only re-evaluates them when one of the attributes changed.
+    Groups of these controls with the same type of condition are evaluated at once with vectorized comparisons.
+    All other controls (e.g., time-based controls) are evaluated every time check is called.
     """
+    _min_compiled = 8  # smallest group of conditions of the same type that is evaluated at once
+
     def __init__(self):
         self._controls = OrderedSet()
         """OrderedSet of ControlBase"""
 
         self._previous_values = OrderedDict()  # {(obj, attr): value}
         self._changed = OrderedSet()  # set of (obj, attr) that has been changed from _previous_values
+        self._num_actions = dict()  # {(obj, attr): number of registered actions with that target}
+
+        self._order = dict()  # {control: registration number}; used to return controls in registration order
+        self._num_registered = 0
+        self._volatile = OrderedSet()  # controls that are evaluated every time check is called
+        self._inputs = OrderedDict()  # {(id(obj), attr): (obj, attr)} for the indexed controls
+        self._input_values = dict()  # {(id(obj), attr): value at the last check}
+        self._dependents = dict()  # {(id(obj), attr): OrderedSet of indexed controls}
+        self._control_inputs = dict()  # {indexed control: list of (id(obj), attr)}
+        self._stale = OrderedSet()  # indexed controls that have to be evaluated at the next check
+        self._required = dict()  # {control: backtrack} for the controls whose actions need activated
 
     def __iter__(self):
         return iter(self._controls)
@@ -2191,11 +2471,33 @@ class ControlManager(Observer):
         ----------
         control: ControlBase
         """
+        if control in self._controls:
+            return
         self._controls.add(control)
+        self._order[control] = self._num_registered
+        self._num_registered += 1
         for action in control.actions():
             action.subscribe(self)
             obj, attr = action.target()
             self._previous_values[(obj, attr)] = getattr(obj, attr)
+            self._num_actions[(obj, attr)] = self._num_actions.get((obj, attr), 0) + 1
+
+        deps = None
+        if isinstance(control, Rule):
+            deps = control._condition._dependencies()
+        if deps is None:
+            self._volatile.add(control)
+            return
+        self._control_inputs[control] = list()
+        for obj, attr in deps:
+            key = (id(obj), attr)
+            if key not in self._inputs:
+                self._inputs[key] = (obj, attr)
+                self._input_values[key] = getattr(obj, attr)
+                self._dependents[key] = OrderedSet()
+            self._dependents[key].add(control)
+            self._control_inputs[control].append(key)
+        self._stale.add(control)
 
     def reset(self):
         """
@@ -2203,11 +2505,8 @@ class ControlManager(Observer):
         by the control actions can be tracked.
         """
         self._changed = OrderedSet()
-        self._previous_values = OrderedDict()
-        for control in self._controls:
-            for action in control.actions():
-                obj, attr = action.target()
-                self._previous_values[(obj, attr)] = getattr(obj, attr)
+        for obj, attr in self._previous_values:
+            self._previous_values[(obj, attr)] = getattr(obj, attr)
 
     def changes_made(self):
         """
@@ -2240,11 +2539,77 @@ class ControlManager(Observer):
         control: ControlBase
         """
         self._controls.remove(control)
+        self._order.pop(control)
         for action in control.actions():
             action.unsubscribe(self)
             obj, attr = action.target()
-            self._previous_values.pop((obj, attr))
-            self._changed.discard((obj, attr))
+            self._num_actions[(obj, attr)] -= 1
+            if self._num_actions[(obj, attr)] == 0:
+                self._num_actions.pop((obj, attr))
+                self._previous_values.pop((obj, attr))
+                self._changed.discard((obj, attr))
+
+        self._volatile.discard(control)
+        self._stale.discard(control)
+        self._required.pop(control, None)
+        for key in self._control_inputs.pop(control, []):
+            self._dependents[key].discard(control)
+            if len(self._dependents[key]) == 0:
+                self._dependents.pop(key)
+                self._inputs.pop(key)
+                self._input_values.pop(key)
+
+    def _set_required(self, control, do, back):
+        if do:
+            self._required[control] = back
+        else:
+            self._required.pop(control, None)
+
+    def _compile(self, controls):
+        """
+        Group the controls by the type of their condition and compile the groups that can be evaluated at once
+        (see ControlCondition._compile).
+
+        Parameters
+        ----------
+        controls: iterable of ControlBase
+
+        Returns
+        -------
+        single: list of ControlBase
+            The controls that have to be evaluated one at a time (in order)
+        compiled: list of tuple
+            (list of Rule, func) where func evaluates the conditions of all of the rules at once
+        """
+        groups = OrderedDict()
+        for c in controls:
+            if isinstance(c, Rule):
+                groups.setdefault(type(c._condition), list()).append(c)
+        compiled = list()
+        batched = set()
+        for condition_type, group in groups.items():
+            if len(group) < self._min_compiled:
+                continue
+            func = condition_type._compile([c._condition for c in group])
+            if func is not None:
+                compiled.append((group, func))
+                batched.update(group)
+        single = [c for c in controls if c not in batched]
+        return single, compiled
+
+    def _evaluate(self, single, compiled):
+        for c in single:
+            self._set_required(c, *c.is_control_action_required())
+        for group, func in compiled:
+            try:
+                values = func()
+            except (TypeError, ValueError):
+                # e.g., results that are not available yet; evaluate the conditions one at a time instead
+                for c in group:
+                    self._set_required(c, *c.is_control_action_required())
+                continue
+            for c, do in zip(group, values.tolist()):
+                self._set_required(c, *c._is_control_action_required(do))
 
     def check(self):
         """
@@ -2255,9 +2620,26 @@ class ControlManager(Observer):
         controls_to_run: list of tuple
             The tuple is (ControlBase, backtrack)
         """
-        controls_to_run = []
-        for c in self._controls:
-            do, back = c.is_control_action_required()
-            if do:
-                controls_to_run.append((c, back))
+        for c in self._volatile:
+            self._set_required(c, *c.is_control_action_required())
+
+        stale = self._stale
+        self._stale = OrderedSet()
+        changed_inputs = list()
+        for key, (obj, attr) in self._inputs.items():
+            if getattr(obj, attr) != self._input_values[key]:
+                changed_inputs.append(key)
+                stale.update(self._dependents[key])
+        self._evaluate(*self._compile(stale))
+        for c in stale:
+            changed_inputs.extend(self._control_inputs[c])
+        for key in changed_inputs:
+            obj, attr = self._inputs[key]
+            self._input_values[key] = getattr(obj, attr)
+
+        controls_to_run = sorted(self._required.items(), key=lambda i: self._order[i[0]])
+        # Evaluating a condition again without a change in its values would not backtrack
+        for c in stale:
+            if c in self._required:
+                self._required[c] = 0
         return controls_to_run
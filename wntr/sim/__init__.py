@@ -4,5 +4,8 @@ simulations using the water network model.
 """
 from wntr.sim.core import WaterNetworkSimulator, WNTRSimulator
 from wntr.sim.results import SimulationResults
-from wntr.sim.solvers import NewtonSolver
-from wntr.sim.epanet import EpanetSimulator
\ No newline at end of file
+from wntr.sim.solvers import NewtonSolver, GGASolver
+from wntr.sim.epanet import EpanetSimulator, EpanetSession
+from wntr.sim.batch import BatchScenario
+from wntr.sim.ensemble import Ensemble, run_ensemble
+
@@ -53,6 +53,8 @@ class Model(object):
         self._vars_referenced_by_con = OrderedDict()
         self._params_referenced_by_con = OrderedDict()
         self._floats_referenced_by_con = OrderedDict()
+        self._structure_version = 0
+        self._structure_dirty = True
 
     def __setattr__(self, name, val):
         """
@@ -176,6 +178,7 @@ class Model(object):
             self._evaluator.remove_float(cfloat)
 
     def _register_conditional_constraint(self, con):
+        self._structure_dirty = True
         ccon = self._evaluator.add_if_else_constraint()
         con._c_obj = ccon
         self._con_ccon_map[con] = ccon
@@ -242,6 +245,7 @@ class Model(object):
         if type(con.expr) == ConditionalExpression:
             self._register_conditional_constraint(con)
             return None
+        self._structure_dirty = True
         ccon = self._evaluator.add_constraint()
         con._c_obj = ccon
         self._con_ccon_map[con] = ccon
@@ -292,6 +296,7 @@ class Model(object):
         self._floats_referenced_by_con[con] = referenced_floats
 
     def _remove_conditional_constraint(self, con):
+        self._structure_dirty = True
         self._evaluator.remove_if_else_constraint(self._con_ccon_map[con])
         del self._con_ccon_map[con]
         for v in self._vars_referenced_by_con[con]:
@@ -308,6 +313,7 @@ class Model(object):
         if type(con.expr) == ConditionalExpression:
             self._remove_conditional_constraint(con)
             return None
+        self._structure_dirty = True
         self._evaluator.remove_constraint(self._con_ccon_map[con])
         del self._con_ccon_map[con]
         for v in self._vars_referenced_by_con[con]:
@@ -320,19 +326,57 @@ class Model(object):
         del self._params_referenced_by_con[con]
         del self._floats_referenced_by_con[con]
 
+    def _set_num_threads(self, num_threads):
+        if num_threads is None:
+            num_threads = 1
+        if self._evaluator.get_num_threads() != num_threads:
+            self._evaluator.set_num_threads(int(num_threads))
+
     def evaluate_residuals(self, x=None, num_threads=4):
+        """
+        Evaluate the constraint residuals.
+
+        Parameters
+        ----------
+        x: np.ndarray
+            If provided, the variable values are loaded from x before evaluating the residuals.
+        num_threads: int
+            The maximum number of threads to split the constraints across. Small models are
+            always evaluated serially.
+
+        Returns
+        -------
+        r: np.ndarray
+        """
         if x is not None:
             self._evaluator.load_var_values_from_x(x)
+        self._set_num_threads(num_threads)
         r = self._evaluator.evaluate(len(self._con_ccon_map))
         return r
 
-    def evaluate_jacobian(self, x=None):
+    def evaluate_jacobian(self, x=None, num_threads=4):
+        """
+        Evaluate the jacobian of the constraints with respect to the variables.
+
+        Parameters
+        ----------
+        x: np.ndarray
+            If provided, the variable values are loaded from x before evaluating the jacobian.
+        num_threads: int
+            The maximum number of threads to split the constraints across. Small models are
+            always evaluated serially.
+
+        Returns
+        -------
+        jac: scipy.sparse.csr_matrix
+        """
         n_vars = len(self._var_cvar_map)
         n_cons = len(self._con_ccon_map)
         if n_vars != n_cons:
             raise ValueError('The number of constraints and variables must be equal.')
         if x is not None:
             self._evaluator.load_var_values_from_x(x)
+        self._set_num_threads(num_threads)
         jac_values, col_ndx, row_nnz = self._evaluator.evaluate_csr_jacobian(self._evaluator.nnz,
                                                                              self._evaluator.nnz,
                                                                              len(self._con_ccon_map) + 1)
@@ -367,10 +411,30 @@ class Model(object):
         the constraint residuals and the jacobian can be evaluated efficiently. This method
         must be called before get_x, load_var_values_from_x, evaluate_residuals, or evaluate_jacobian
         can be called. If any changes are made to the model (e.g., variables/constraints are
-        added/removed), then this method needs called again. Avoid calling this method too often
-        if you are concerned about efficiency.
+        added/removed), then this method needs called again. If no constraints have been added or
+        removed since the last call, this method returns immediately without rebuilding the structure.
         """
+        if not self._structure_dirty:
+            return
         self._evaluator.set_structure()
+        self._structure_version += 1
+        self._structure_dirty = False
+
+    @property
+    def structure_version(self):
+        """
+        An integer that changes every time the structure (the ordering of variables and constraints) is rebuilt.
+        This can be used to cache anything that depends only on the structure of the model (e.g., the sparsity
+        pattern of the jacobian).
+        """
+        return self._structure_version
+
+    @property
+    def structure_is_dirty(self):
+        """
+        True if constraints have been added or removed since the last call to set_structure.
+        """
+        return self._structure_dirty
 
     def cons(self):
         for i in self._con_ccon_map:
@@ -232,6 +232,7 @@ double _evaluate(double* stack, std::vector<int>* rpn, std::vector<Leaf*>* value
 
 Evaluator::~Evaluator()
 {
+  delete pool;
   if (is_structure_set)
     {
       remove_structure();
@@ -400,11 +401,13 @@ void Evaluator::set_structure()
   jac_rpn.clear();
 
   n_conditions.clear();
+  if_else_condition_start.clear();
+  if_else_jac_start.clear();
   if_else_condition_rpn.clear();
   if_else_fn_rpn.clear();
   if_else_jac_rpn.clear();
 
-  int max_rpn_size = 0;
+  max_rpn_size = 0;
 
   //******************************************
   // Variables
@@ -456,6 +459,8 @@ void Evaluator::set_structure()
       leaves.push_back(con->leaves);
       _n_conditions = con->condition_rpn.size();
       n_conditions.push_back(_n_conditions);
+      if_else_condition_start.push_back(if_else_condition_rpn.size());
+      if_else_jac_start.push_back(if_else_jac_rpn.size());
       row_nnz.push_back(row_nnz[ndx] + con->jac_rpn.size()); // every vector in con->jac_rpn should be the same size
       for (int i=0; i<_n_conditions; ++i)
 	{
@@ -498,28 +503,182 @@ void Evaluator::remove_structure()
 }
 
 
-void Evaluator::evaluate(double* array_out, int array_length_out)
+ThreadPool::ThreadPool(int num_workers)
 {
-  if (!is_structure_set)
+  current_task = NULL;
+  n_tasks = 0;
+  n_pending = 0;
+  generation = 0;
+  stop = false;
+  for (int k=0; k<num_workers; ++k)
     {
-      throw StructureException("Cannot call evaluate() if the structure is not set. Please call set_structure() first.");
+      workers.push_back(std::thread(&ThreadPool::worker_loop, this, k));
+    }
+}
+
+
+ThreadPool::~ThreadPool()
+{
+  {
+    std::lock_guard<std::mutex> lock(mutex);
+    stop = true;
+  }
+  start_cv.notify_all();
+  for (size_t k=0; k<workers.size(); ++k)
+    {
+      workers[k].join();
+    }
+}
+
+
+void ThreadPool::worker_loop(int worker_ndx)
+{
+  int task_ndx = worker_ndx + 1;
+  int last_generation = 0;
+  std::unique_lock<std::mutex> lock(mutex);
+  while (true)
+    {
+      start_cv.wait(lock, [this, last_generation]{return stop || generation != last_generation;});
+      if (stop)
+	{
+	  return;
+	}
+      last_generation = generation;
+      if (task_ndx >= n_tasks)
+	{
+	  continue;
+	}
+      const std::function<void(int)>* task = current_task;
+      lock.unlock();
+      try
+	{
+	  (*task)(task_ndx);
+	}
+      catch (...)
+	{
+	  errors[task_ndx] = std::current_exception();
+	}
+      lock.lock();
+      --n_pending;
+      if (n_pending == 0)
+	{
+	  done_cv.notify_one();
+	}
+    }
+}
+
+
+void ThreadPool::run(int _n_tasks, const std::function<void(int)>& task)
+{
+  {
+    std::lock_guard<std::mutex> lock(mutex);
+    current_task = &task;
+    n_tasks = _n_tasks;
+    n_pending = _n_tasks - 1;
+    errors.assign(_n_tasks, std::exception_ptr());
+    ++generation;
+  }
+  start_cv.notify_all();
+  try
+    {
+      task(0);
+    }
+  catch (...)
+    {
+      errors[0] = std::current_exception();
+    }
+  std::unique_lock<std::mutex> lock(mutex);
+  done_cv.wait(lock, [this]{return n_pending == 0;});
+  current_task = NULL;
+  for (size_t k=0; k<errors.size(); ++k)
+    {
+      if (errors[k])
+	{
+	  std::rethrow_exception(errors[k]);
+	}
+    }
+}
+
+
+void Evaluator::set_num_threads(int n)
+{
+  if (n < 1)
+    {
+      n = 1;
+    }
+  num_threads = n;
+  int n_hardware = (int) std::thread::hardware_concurrency();
+  if (n_hardware > 0 && n > n_hardware)
+    {
+      n = n_hardware;
+    }
+  if (pool != NULL && pool->size() == n - 1)
+    {
+      return;
+    }
+  delete pool;
+  pool = NULL;
+  if (n > 1)
+    {
+      pool = new ThreadPool(n - 1);
+    }
+}
+
+
+void Evaluator::set_chunk_stacks(int n_chunks)
+{
+  if ((int) chunk_stacks.size() < n_chunks)
+    {
+      chunk_stacks.resize(n_chunks);
+    }
+  for (int k=0; k<n_chunks; ++k)
+    {
+      if ((int) chunk_stacks[k].size() < max_rpn_size + 1)
+	{
+	  chunk_stacks[k].resize(max_rpn_size + 1);
+	}
+    }
+}
+
+
+int Evaluator::get_num_chunks(int num_cons)
+{
+  if (pool == NULL)
+    {
+      return 1;
     }
+  int n = pool->size() + 1;
+  if (n > num_cons / MIN_CONS_PER_THREAD)
+    {
+      n = num_cons / MIN_CONS_PER_THREAD;
+    }
+  if (n < 1)
+    {
+      n = 1;
+    }
+  return n;
+}
+
+
+void Evaluator::evaluate_range(double* _stack, double* array_out, int start, int end)
+{
   int num_cons = con_set.size();
-  int num_if_else_cons = if_else_con_set.size();
-  int con_ndx = 0;
-  while (con_ndx<num_cons)
+  int con_ndx = start;
+  while (con_ndx < end && con_ndx < num_cons)
     {
-      array_out[con_ndx] = _evaluate(stack, &(fn_rpn[con_ndx]), &(leaves[con_ndx]));
+      array_out[con_ndx] = _evaluate(_stack, &(fn_rpn[con_ndx]), &(leaves[con_ndx]));
       ++con_ndx;
     }
 
-  int c = 0;
+  int c;
   int _n_conditions = 0;
   bool found;
-  int condition_ndx = 0;
+  int condition_ndx;
   int i;
-  while (con_ndx < num_cons + num_if_else_cons)
+  while (con_ndx < end)
     {
+      c = con_ndx - num_cons;
+      condition_ndx = if_else_condition_start[c];
       found = false;
       _n_conditions = n_conditions[c];
       i = 0;
@@ -529,15 +688,14 @@ void Evaluator::evaluate(double* array_out, int array_length_out)
 	    {
 	      found = true;
 	    }
-	  else if (_evaluate(stack, &(if_else_condition_rpn[condition_ndx]), &(leaves[con_ndx])) == 1)
+	  else if (_evaluate(_stack, &(if_else_condition_rpn[condition_ndx]), &(leaves[con_ndx])) == 1)
 	    {
 	      found = true;
 	    }
 
 	  if (found)
 	    {
-	      array_out[con_ndx] = _evaluate(stack, &(if_else_fn_rpn[condition_ndx]), &(leaves[con_ndx]));
-	      condition_ndx += _n_conditions - i;
+	      array_out[con_ndx] = _evaluate(_stack, &(if_else_fn_rpn[condition_ndx]), &(leaves[con_ndx]));
 	    }
 	  else
 	    {
@@ -545,50 +703,69 @@ void Evaluator::evaluate(double* array_out, int array_length_out)
 	      ++i;
 	    }
 	}
-      ++c;
       ++con_ndx;
     }
 }
 
 
-void Evaluator::evaluate_csr_jacobian(double* values_array_out, int values_array_length_out, int* col_ndx_array_out, int col_ndx_array_length_out, int* row_nnz_array_out, int row_nnz_array_length_out)
+void Evaluator::evaluate(double* array_out, int array_length_out)
 {
   if (!is_structure_set)
     {
-      throw StructureException("Cannot call evaluate_csr_jacobian() if the structure is not set. Please call set_structure() first.");
+      throw StructureException("Cannot call evaluate() if the structure is not set. Please call set_structure() first.");
+    }
+  int total_cons = con_set.size() + if_else_con_set.size();
+  int n_chunks = get_num_chunks(total_cons);
+  if (n_chunks == 1)
+    {
+      evaluate_range(stack, array_out, 0, total_cons);
+      return;
     }
+
+  set_chunk_stacks(n_chunks);
+  int chunk_size = total_cons / n_chunks;
+  pool->run(n_chunks, [this, array_out, total_cons, chunk_size, n_chunks](int k)
+	    {
+	      int start = k * chunk_size;
+	      int end = (k == n_chunks - 1) ? total_cons : start + chunk_size;
+	      evaluate_range(chunk_stacks[k].data(), array_out, start, end);
+	    });
+}
+
+
+void Evaluator::evaluate_csr_jacobian_range(double* _stack, double* values_array_out, int* col_ndx_array_out, int start, int end)
+{
   int num_cons = con_set.size();
-  int num_if_else_cons = if_else_con_set.size();
-  row_nnz_array_out[0] = 0;
-  int nnz_ndx = 0;
+  int nnz_ndx;
   int nnz;
 
-  int con_ndx = 0;
-  while (con_ndx < num_cons)
+  int con_ndx = start;
+  while (con_ndx < end && con_ndx < num_cons)
     {
-      row_nnz_array_out[con_ndx+1] = row_nnz[con_ndx+1];
+      nnz_ndx = row_nnz[con_ndx];
       nnz = row_nnz[con_ndx+1] - row_nnz[con_ndx];
       for (int i=0; i<nnz; ++i)
 	{
-	  values_array_out[nnz_ndx] = _evaluate(stack, &(jac_rpn[nnz_ndx]), &(leaves[con_ndx]));
+	  values_array_out[nnz_ndx] = _evaluate(_stack, &(jac_rpn[nnz_ndx]), &(leaves[con_ndx]));
 	  col_ndx_array_out[nnz_ndx] = col_ndx[nnz_ndx];
 	  ++nnz_ndx;
 	}
       ++con_ndx;
     }
 
-  int c = 0;
-  int i = 0;
+  int c;
   int _n_conditions = 0;
   bool found;
-  int condition_ndx = 0;
-  int jac_ndx = 0;
-  while (con_ndx < num_cons + num_if_else_cons)
-    {
-      row_nnz_array_out[con_ndx+1] = row_nnz[con_ndx+1];
+  int condition_ndx;
+  int jac_ndx;
+  while (con_ndx < end)
+    {
+      c = con_ndx - num_cons;
+      condition_ndx = if_else_condition_start[c];
+      jac_ndx = if_else_jac_start[c];
+      nnz_ndx = row_nnz[con_ndx];
       nnz = row_nnz[con_ndx+1] - row_nnz[con_ndx];
       _n_conditions = n_conditions[c];
-      i = 0;
       found = false;
       while (!found)
 	{
@@ -596,7 +773,7 @@ void Evaluator::evaluate_csr_jacobian(double* values_array_out, int values_array
 	    {
 	      found = true;
 	    }
-	  else if (_evaluate(stack, &(if_else_condition_rpn[condition_ndx]), &(leaves[con_ndx])) == 1)
+	  else if (_evaluate(_stack, &(if_else_condition_rpn[condition_ndx]), &(leaves[con_ndx])) == 1)
 	    {
 	      found = true;
 	    }
@@ -605,27 +782,53 @@ void Evaluator::evaluate_csr_jacobian(double* values_array_out, int values_array
 	    {
 	      for (int j=0; j<nnz; ++j)
 		{
-		  values_array_out[nnz_ndx] = _evaluate(stack, &(if_else_jac_rpn[jac_ndx]), &(leaves[con_ndx]));
+		  values_array_out[nnz_ndx] = _evaluate(_stack, &(if_else_jac_rpn[jac_ndx]), &(leaves[con_ndx]));
 		  col_ndx_array_out[nnz_ndx] = col_ndx[nnz_ndx];
 		  ++nnz_ndx;
 		  ++jac_ndx;
 		}
-	      condition_ndx += _n_conditions - i;
-	      jac_ndx += (_n_conditions - i - 1) * nnz;
 	    }
 	  else
 	    {
 	      ++condition_ndx;
-	      ++i;
 	      jac_ndx += nnz;
 	    }
 	}
       ++con_ndx;
-      ++c;
     }
 }
 
 
+void Evaluator::evaluate_csr_jacobian(double* values_array_out, int values_array_length_out, int* col_ndx_array_out, int col_ndx_array_length_out, int* row_nnz_array_out, int row_nnz_array_length_out)
+{
+  if (!is_structure_set)
+    {
+      throw StructureException("Cannot call evaluate_csr_jacobian() if the structure is not set. Please call set_structure() first.");
+    }
+  int total_cons = con_set.size() + if_else_con_set.size();
+  for (int con_ndx=0; con_ndx<=total_cons; ++con_ndx)
+    {
+      row_nnz_array_out[con_ndx] = row_nnz[con_ndx];
+    }
+
+  int n_chunks = get_num_chunks(total_cons);
+  if (n_chunks == 1)
+    {
+      evaluate_csr_jacobian_range(stack, values_array_out, col_ndx_array_out, 0, total_cons);
+      return;
+    }
+
+  set_chunk_stacks(n_chunks);
+  int chunk_size = total_cons / n_chunks;
+  pool->run(n_chunks, [this, values_array_out, col_ndx_array_out, total_cons, chunk_size, n_chunks](int k)
+	    {
+	      int start = k * chunk_size;
+	      int end = (k == n_chunks - 1) ? total_cons : start + chunk_size;
+	      evaluate_csr_jacobian_range(chunk_stacks[k].data(), values_array_out, col_ndx_array_out, start, end);
+	    });
+}
+
+
 void Evaluator::get_x(double *array_out, int array_length_out)
 {
   if (!is_structure_set)
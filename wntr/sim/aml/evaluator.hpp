@@ -4,6 +4,11 @@
 #include <map>
 #include <stdexcept>
 #include <cmath>
+#include <thread>
+#include <exception>
+#include <functional>
+#include <mutex>
+#include <condition_variable>
 
 
 const int ADD = -1;
@@ -125,15 +130,51 @@ public:
 };
 
 
+#ifndef SWIG
+// A fixed set of worker threads that is reused for every evaluation. run(n_tasks, task) calls
+// task(0) in the calling thread and task(1), ..., task(n_tasks - 1) in the workers, and returns
+// once all of them are done (rethrowing the first exception raised by a task).
+class ThreadPool
+{
+public:
+  ThreadPool(int num_workers);
+  ~ThreadPool();
+
+  int size() {return workers.size();}
+  void run(int n_tasks, const std::function<void(int)>& task);
+
+private:
+  void worker_loop(int worker_ndx);
+
+  std::vector<std::thread> workers;
+  std::mutex mutex;
+  std::condition_variable start_cv;
+  std::condition_variable done_cv;
+  const std::function<void(int)>* current_task;
+  std::vector<std::exception_ptr> errors;
+  int n_tasks;
+  int n_pending;
+  int generation;
+  bool stop;
+};
+#endif
+
+
+class ThreadPool;
+
+
 class Evaluator
 {
 public:
-  Evaluator(){is_structure_set = false;}
+  Evaluator(){is_structure_set = false; num_threads = 1; pool = NULL;}
   ~Evaluator();
 
   int nnz;
   double* stack;
 
+  void set_num_threads(int n);
+  int get_num_threads() {return num_threads;}
+
   Var* add_var(double value);
   Param* add_param(double value);
   Float* add_float(double value);
@@ -157,6 +198,15 @@ public:
 
 private:
   bool is_structure_set;
+  int max_rpn_size;
+  int num_threads;
+  ThreadPool* pool;
+  std::vector<std::vector<double> > chunk_stacks;
+
+  int get_num_chunks(int num_cons);
+  void set_chunk_stacks(int n_chunks);
+  void evaluate_range(double* _stack, double* array_out, int start, int end);
+  void evaluate_csr_jacobian_range(double* _stack, double* values_array_out, int* col_ndx_array_out, int start, int end);
   
   std::set<Var*> var_set;
   std::set<Param*> param_set;
@@ -173,10 +223,17 @@ private:
   std::vector<std::vector<int> > jac_rpn;
 
   std::vector<int> n_conditions;
+  std::vector<int> if_else_condition_start;
+  std::vector<int> if_else_jac_start;
   std::vector<std::vector<int> > if_else_condition_rpn;
   std::vector<std::vector<int> > if_else_fn_rpn;
   std::vector<std::vector<int> > if_else_jac_rpn;
 };
 
 
+// The minimum number of constraints each thread should be given before splitting the work is
+// worthwhile; for smaller models the cost of handing the work to the threads outweighs the evaluation.
+const int MIN_CONS_PER_THREAD = 500;
+
+
 double _evaluate(double* stack, std::vector<int>* rpn, std::vector<Leaf*>* values);
@@ -6729,6 +6729,88 @@ fail:
 }
 
 
+SWIGINTERN PyObject *_wrap_Evaluator_set_num_threads(PyObject *self, PyObject *args) {
+  PyObject *resultobj = 0;
+  Evaluator *arg1 = (Evaluator *) 0 ;
+  int arg2 ;
+  void *argp1 = 0 ;
+  int res1 = 0 ;
+  int val2 ;
+  int ecode2 = 0 ;
+  PyObject *swig_obj[2] ;
+  
+  if (!args) SWIG_fail;
+  swig_obj[0] = args;
+  res1 = SWIG_ConvertPtr(self, &argp1,SWIGTYPE_p_Evaluator, 0 |  0 );
+  if (!SWIG_IsOK(res1)) {
+    SWIG_exception_fail(SWIG_ArgError(res1), "in method '" "Evaluator_set_num_threads" "', argument " "1"" of type '" "Evaluator *""'"); 
+  }
+  arg1 = reinterpret_cast< Evaluator * >(argp1);
+  ecode2 = SWIG_AsVal_int(swig_obj[0], &val2);
+  if (!SWIG_IsOK(ecode2)) {
+    SWIG_exception_fail(SWIG_ArgError(ecode2), "in method '" "Evaluator_set_num_threads" "', argument " "2"" of type '" "int""'");
+  } 
+  arg2 = static_cast< int >(val2);
+  {
+    try
+    {
+      (arg1)->set_num_threads(arg2);
+    }
+    catch (StructureException &e)
+    {
+      std::string s("Evaluator error: "), s2(e.what());
+      s = s + s2;
+      SWIG_exception(SWIG_RuntimeError, s.c_str());
+    }
+    catch (...)
+    {
+      SWIG_exception(SWIG_RuntimeError, "unkown exception");
+    }
+  }
+  resultobj = SWIG_Py_Void();
+  return resultobj;
+fail:
+  return NULL;
+}
+
+
+SWIGINTERN PyObject *_wrap_Evaluator_get_num_threads(PyObject *self, PyObject *args) {
+  PyObject *resultobj = 0;
+  Evaluator *arg1 = (Evaluator *) 0 ;
+  void *argp1 = 0 ;
+  int res1 = 0 ;
+  PyObject *swig_obj[1] ;
+  int result;
+  
+  if (!SWIG_Python_UnpackTuple(args, "Evaluator_get_num_threads", 0, 0, 0)) SWIG_fail;
+  res1 = SWIG_ConvertPtr(self, &argp1,SWIGTYPE_p_Evaluator, 0 |  0 );
+  if (!SWIG_IsOK(res1)) {
+    SWIG_exception_fail(SWIG_ArgError(res1), "in method '" "Evaluator_get_num_threads" "', argument " "1"" of type '" "Evaluator *""'"); 
+  }
+  arg1 = reinterpret_cast< Evaluator * >(argp1);
+  {
+    try
+    {
+      result = (int)(arg1)->get_num_threads();
+    }
+    catch (StructureException &e)
+    {
+      std::string s("Evaluator error: "), s2(e.what());
+      s = s + s2;
+      SWIG_exception(SWIG_RuntimeError, s.c_str());
+    }
+    catch (...)
+    {
+      SWIG_exception(SWIG_RuntimeError, "unkown exception");
+    }
+  }
+  resultobj = SWIG_From_int(static_cast< int >(result));
+  return resultobj;
+fail:
+  return NULL;
+}
+
+
 SWIGINTERN PyObject *_wrap_Evaluator_add_var(PyObject *self, PyObject *args) {
   PyObject *resultobj = 0;
   Evaluator *arg1 = (Evaluator *) 0 ;
@@ -7525,6 +7607,22 @@ fail:
 
 SWIGPY_DESTRUCTOR_CLOSURE(_wrap_delete_Evaluator) /* defines _wrap_delete_Evaluator_destructor_closure */
 
+SWIGINTERN int Swig_var_MIN_CONS_PER_THREAD_set(PyObject *) {
+  SWIG_Error(SWIG_AttributeError,"Variable MIN_CONS_PER_THREAD is read-only.");
+  return 1;
+}
+
+
+SWIGINTERN PyObject *Swig_var_MIN_CONS_PER_THREAD_get(void) {
+  PyObject *pyobj = 0;
+  PyObject *self = 0;
+  
+  (void)self;
+  pyobj = SWIG_From_int(static_cast< int >(MIN_CONS_PER_THREAD));
+  return pyobj;
+}
+
+
 SWIGINTERN PyObject *_wrap__evaluate(PyObject *self, PyObject *args) {
   PyObject *resultobj = 0;
   double *arg1 = (double *) 0 ;
@@ -9134,6 +9232,8 @@ SwigPyBuiltin__Evaluator_richcompare(PyObject *self, PyObject *other, int op) {
 }
 
 SWIGINTERN PyMethodDef SwigPyBuiltin__Evaluator_methods[] = {
+  { "set_num_threads", _wrap_Evaluator_set_num_threads, METH_O, "" },
+  { "get_num_threads", _wrap_Evaluator_get_num_threads, METH_NOARGS, "" },
   { "add_var", _wrap_Evaluator_add_var, METH_O, "" },
   { "add_param", _wrap_Evaluator_add_param, METH_O, "" },
   { "add_float", _wrap_Evaluator_add_float, METH_O, "" },
@@ -10454,6 +10554,9 @@ SWIG_init(void) {
   PyModule_AddObject(m, "Evaluator", (PyObject *)builtin_pytype);
   SwigPyBuiltin_AddPublicSymbol(public_interface, "Evaluator");
   d = md;
+  SWIG_addvarlink(globals, "MIN_CONS_PER_THREAD", Swig_var_MIN_CONS_PER_THREAD_get, Swig_var_MIN_CONS_PER_THREAD_set);
+  PyDict_SetItemString(md, "MIN_CONS_PER_THREAD", PyObject_GetAttrString(globals, "MIN_CONS_PER_THREAD"));
+  SwigPyBuiltin_AddPublicSymbol(public_interface, "MIN_CONS_PER_THREAD");
 #if PY_VERSION_HEX >= 0x03000000
   return m;
 #else
@@ -0,0 +1,140 @@
+"""
+Scenario definitions used to solve many perturbations of the same network
+with a single hydraulic model (see :meth:`~wntr.sim.core.WNTRSimulator.run_batch`).
+"""
+import logging
+
+from wntr.network import LinkStatus
+from wntr.network.controls import Control, ControlAction
+
+logger = logging.getLogger(__name__)
+
+
+class BatchScenario(object):
+    """
+    A perturbation of a water network model that can be solved with
+    :meth:`~wntr.sim.core.WNTRSimulator.run_batch`.
+
+    Parameters
+    ----------
+    name: str
+        Name of the scenario; used as the key in the results returned by run_batch
+    closed_links: list of str, optional
+        Names of links that are closed in the scenario
+    closure_time: int, optional
+        Time (in seconds from the start of the simulation) at which the closed_links are closed.
+        If 0 (default), the links are closed for the entire simulation.
+    demand_multiplier: float, optional
+        Multiplier applied (on top of wn.options.hydraulic.demand_multiplier) to all demands in the scenario
+    leaks: dict, optional
+        Leaks added in the scenario. The keys are node names and the values are dictionaries
+        of keyword arguments passed to :meth:`~wntr.network.elements.Junction.add_leak`
+        (area, discharge_coeff, start_time, end_time). start_time defaults to 0.
+    """
+    def __init__(self, name, closed_links=None, closure_time=0, demand_multiplier=1.0, leaks=None):
+        self.name = name
+        self.closed_links = list(closed_links) if closed_links is not None else []
+        self.closure_time = closure_time
+        self.demand_multiplier = demand_multiplier
+        self.leaks = dict(leaks) if leaks is not None else dict()
+        self._saved = None
+
+    def __repr__(self):
+        return '<BatchScenario: {}>'.format(self.name)
+
+    def _control_name(self, link_name):
+        return '__batch_' + str(self.name) + '_close_' + str(link_name)
+
+    def apply(self, wn):
+        """
+        Apply the scenario to the water network model.
+
+        Parameters
+        ----------
+        wn: wntr.network.WaterNetworkModel
+
+        Returns
+        -------
+        changes: list of tuple
+            The (object, attribute) pairs that were modified
+        """
+        if self._saved is not None:
+            raise RuntimeError('Scenario {} has already been applied'.format(self.name))
+        changes = list()
+        saved = dict(demand_multiplier=wn.options.hydraulic.demand_multiplier, initial_status=dict(),
+                     leaks=dict())
+
+        wn.options.hydraulic.demand_multiplier = saved['demand_multiplier'] * self.demand_multiplier
+
+        for link_name in self.closed_links:
+            link = wn.get_link(link_name)
+            if self.closure_time == 0:
+                saved['initial_status'][link_name] = link.initial_status
+                link.initial_status = LinkStatus.Closed
+            else:
+                act = ControlAction(link, 'status', LinkStatus.Closed)
+                control = Control._time_control(wn, self.closure_time, 'SIM_TIME', False, act)
+                wn.add_control(self._control_name(link_name), control)
+            changes.append((link, 'status'))
+
+        for node_name, leak in self.leaks.items():
+            node = wn.get_node(node_name)
+            if node._leak:
+                raise ValueError('Node {} already has a leak'.format(node_name))
+            saved['leaks'][node_name] = (node.leak_area, node.leak_discharge_coeff)
+            leak = dict(leak)
+            leak.setdefault('start_time', 0)
+            node.add_leak(wn, **leak)
+            changes.extend([(node, 'leak_area'), (node, 'leak_discharge_coeff'), (node, 'leak_status')])
+
+        self._saved = saved
+        return changes
+
+    def revert(self, wn):
+        """
+        Undo the changes made to the water network model by apply.
+
+        Parameters
+        ----------
+        wn: wntr.network.WaterNetworkModel
+        """
+        if self._saved is None:
+            return
+        saved = self._saved
+        wn.options.hydraulic.demand_multiplier = saved['demand_multiplier']
+        for link_name in self.closed_links:
+            if link_name in saved['initial_status']:
+                wn.get_link(link_name).initial_status = saved['initial_status'][link_name]
+            else:
+                wn._discard_control(self._control_name(link_name))
+        for node_name, (area, discharge_coeff) in saved['leaks'].items():
+            node = wn.get_node(node_name)
+            node.remove_leak(wn)
+            node._leak_area = area
+            node._leak_discharge_coeff = discharge_coeff
+        self._saved = None
+
+
+class _RecordingModelUpdater(object):
+    """
+    Wraps a model updater and records every (object, attribute) pair passed to update so that
+    the model can later be synchronized with the water network model again.
+    """
+    def __init__(self, updater):
+        self._updater = updater
+        self.touched = list()
+        self._touched_keys = set()
+
+    def update(self, m, wn, obj, attr):
+        key = (id(obj), attr)
+        if key not in self._touched_keys:
+            self._touched_keys.add(key)
+            self.touched.append((obj, attr))
+        self._updater.update(m, wn, obj, attr)
+
+    def sync(self, m, wn, extra=()):
+        """
+        Update the model for every recorded (object, attribute) pair and for the pairs in extra.
+        """
+        for obj, attr in list(self.touched) + list(extra):
+            self.update(m, wn, obj, attr)
@@ -1,8 +1,10 @@
 import wntr.sim.hydraulics
-from wntr.sim.solvers import NewtonSolver, SolverStatus
+from wntr.sim.solvers import NewtonSolver, GGASolver, SolverStatus
 import wntr.sim.results
+import wntr.sim.batch
 from wntr.network.controls import ControlManager, _ControlType
 import numpy as np
+import math
 import warnings
 import time
 import sys
@@ -459,6 +461,104 @@ class _Diagnostics(object): # pragma: no cover
 
 
 
+class _WarmStart(object):
+    """
+    Predicts the solution of the next hydraulic timestep from the solutions of the previous timesteps.
+
+    The solutions (see wntr.sim.aml.Model.get_x) of the previous converged timesteps are extrapolated
+    in time to the next timestep. When the expected demands differ between timesteps, the total expected
+    demand is used as an additional coordinate (which requires one more timestep of history) so that
+    jumps in the demand patterns are accounted for. The prediction is passed to the solver, which only
+    uses it if it has a smaller residual than the current values of the variables.
+
+    Parameters
+    ----------
+    model: wntr.sim.aml.Model
+    order: int
+        1 for linear extrapolation in time or 2 for quadratic extrapolation in time
+    """
+    def __init__(self, model, order=1):
+        if order not in {1, 2}:
+            raise ValueError('Unexpected value for the warm start order: ' + str(order))
+        self._model = model
+        self._order = order
+        self._history = list()
+
+    def record(self, t):
+        """
+        Store the current (converged) solution.
+
+        Parameters
+        ----------
+        t: float
+            The simulation time of the solution
+        """
+        x = self._model.get_x()
+        if len(self._history) > 0 and len(self._history[-1][2]) != len(x):
+            self._history = list()
+        self._history.append((t, self._model.total_expected_demand, x))
+        if len(self._history) > self._order + 2:
+            self._history.pop(0)
+
+    def _get_weights(self, t):
+        """
+        Returns the weights w such that the predicted solution is sum(w[i] * x[i]) over the stored solutions.
+        """
+        t_last, s_last, x_last = self._history[-1]
+        s = self._model.total_expected_demand
+        ts = np.array([h[0] for h in self._history], dtype=float)
+        ss = np.array([h[1] for h in self._history], dtype=float)
+        dt = max(abs(t - t_last), 1.0)
+        ds = max(abs(s_last), 1e-12)
+        ts = (ts - t_last) / dt
+        ss = (ss - s_last) / ds
+        t = (t - t_last) / dt
+        s = (s - s_last) / ds
+
+        demand_changed = (abs(s) > 1e-8) or (np.max(np.abs(ss)) > 1e-8)
+        one = np.ones_like(ts)
+        if self._order == 2:
+            candidates = [([one, ts, ts**2], [1.0, t, t**2]), ([one, ts], [1.0, t])]
+        else:
+            candidates = [([one, ts], [1.0, t])]
+        if demand_changed:
+            candidates = [(basis + [ss], target + [s]) for basis, target in candidates] + [([one, ss], [1.0, s])]
+        for basis, target in candidates:
+            n = len(basis)
+            if n > len(ts):
+                continue
+            B = np.array([b[-n:] for b in basis])
+            if np.linalg.cond(B) > 1e8:
+                continue
+            w = np.linalg.solve(B, np.array(target))
+            weights = np.zeros(len(ts))
+            weights[-n:] = w
+            return weights
+        return None
+
+    def predict(self, t):
+        """
+        Predict the solution for time t.
+
+        Parameters
+        ----------
+        t: float
+            The simulation time of the next solve
+
+        Returns
+        -------
+        x: np.ndarray or None
+            The predicted values of the variables (ordered like wntr.sim.aml.Model.get_x) or None if there
+            is not enough history
+        """
+        if len(self._history) < 2:
+            return None
+        weights = self._get_weights(t)
+        if weights is None:
+            return None
+        return np.dot(weights, [h[2] for h in self._history])
+
+
 class WNTRSimulator(WaterNetworkSimulator):
     """
     WNTR simulator class.
@@ -490,6 +590,8 @@ class WNTRSimulator(WaterNetworkSimulator):
         self._node_name_to_id = OrderedDict()
         self._node_id_to_name = OrderedDict()
         self._source_ids = None
+        self._isolated_graph_data = None
+        self._links_for_node_id = dict()
 
         # attributes needed for controls
         self._presolve_controls = ControlManager()
@@ -506,8 +608,10 @@ class WNTRSimulator(WaterNetworkSimulator):
         self._solver_options = dict()
         self._backup_solver_options = dict()
         self._convergence_error = False
+        self._warm_start = None
 
         # other attributes
+        self._tank_head_index = None
         self._hydraulic_timestep = None
         self._report_timestep = None
 
@@ -560,6 +664,13 @@ class WNTRSimulator(WaterNetworkSimulator):
         self._solver = solver
         self._backup_solver = backup_solver
 
+        # Keep a single NewtonSolver instance for the whole simulation so that anything the solver caches
+        # (e.g., the column permutation used for the LU factorization) can be reused across timesteps.
+        if _is_newton_solver_class(self._solver):
+            self._solver = self._solver(self._solver_options)
+        if _is_newton_solver_class(self._backup_solver):
+            self._backup_solver = self._backup_solver(self._backup_solver_options)
+
         if self._solver is scipy.optimize.fsolve:
             self._solver_options.pop('fprime', False)
             self._solver_options['full_output'] = True
@@ -664,7 +775,7 @@ class WNTRSimulator(WaterNetworkSimulator):
                 old_time = self._wn.sim_time
                 self._wn.sim_time = self._rule_iter * self._wn.options.time.rule_timestep
                 if not first_step:
-                    wntr.sim.hydraulics.update_tank_heads(self._wn)
+                    wntr.sim.hydraulics.update_tank_heads(self._wn, self._tank_head_index)
                 self._rule_iter += 1
                 rules_to_run = self._rules.check()
                 rules_to_run.sort(key=lambda i: i[0]._priority)
@@ -679,6 +790,7 @@ class WNTRSimulator(WaterNetworkSimulator):
                 if logger.getEffectiveLevel() <= 1:
                     logger.log(1, 'no changes made by rules at rule timestep {0}'.format(
                         (self._rule_iter - 1) * self._wn.options.time.rule_timestep))
+                self._skip_rule_timesteps(math.floor(old_time / self._wn.options.time.rule_timestep) + 1)
                 self._wn.sim_time = old_time
             else:
                 # check the next presolve control in presolve_controls_to_run
@@ -716,7 +828,7 @@ class WNTRSimulator(WaterNetworkSimulator):
                     self._rule_iter += 1
                     self._wn.sim_time -= backtrack
                     if not first_step:
-                        wntr.sim.hydraulics.update_tank_heads(self._wn)
+                        wntr.sim.hydraulics.update_tank_heads(self._wn, self._tank_head_index)
                     rules_to_run = self._rules.check()
                     rules_to_run.sort(key=lambda i: i[0]._priority)
                     for rule, rule_back in rules_to_run:
@@ -746,7 +858,7 @@ class WNTRSimulator(WaterNetworkSimulator):
                     self._wn.sim_time = self._rule_iter * self._wn.options.time.rule_timestep
                     self._rule_iter += 1
                     if not first_step:
-                        wntr.sim.hydraulics.update_tank_heads(self._wn)
+                        wntr.sim.hydraulics.update_tank_heads(self._wn, self._tank_head_index)
                     rules_to_run = self._rules.check()
                     rules_to_run.sort(key=lambda i: i[0]._priority)
                     for rule, rule_back in rules_to_run:
@@ -758,6 +870,8 @@ class WNTRSimulator(WaterNetworkSimulator):
                     if logger.getEffectiveLevel() <= 1:
                         logger.log(1, 'no changes made by rules at rule timestep {0}'.format(
                             (self._rule_iter - 1) * self._wn.options.time.rule_timestep))
+                    # do not skip past the time at which the control needs activated
+                    self._skip_rule_timesteps(math.ceil((old_time - backtrack) / self._wn.options.time.rule_timestep))
                     self._wn.sim_time = old_time
         if logger.getEffectiveLevel() <= logging.DEBUG:
             logger.debug('changes made by rules: ')
@@ -767,6 +881,36 @@ class WNTRSimulator(WaterNetworkSimulator):
             for obj, attr in self._presolve_controls.get_changes():
                 logger.debug('\t{0}.{1} changed to {2}'.format(obj, attr, getattr(obj, attr)))
 
+    def _skip_rule_timesteps(self, max_rule_iter):
+        """
+        Skip the rule timesteps at which no rule can change the network. This is called after the rules
+        were checked at the current wn.sim_time without making changes. Until the network changes (i.e., until
+        the next hydraulic solve), the rules can only make changes once the condition of a rule evaluates
+        differently, which can only happen when the simulation time or the tank levels change. Each rule
+        condition provides the earliest time at which that could happen, and the rule timesteps before that
+        time are skipped, but never beyond max_rule_iter (the first rule timestep at which the network may have
+        changed).
+
+        Parameters
+        ----------
+        max_rule_iter: int
+            The rule timesteps are not skipped beyond this rule timestep
+        """
+        next_time = np.inf
+        for rule in self._rules:
+            next_time = min(next_time, rule.condition._next_change_time(self._wn.sim_time))
+            if next_time <= self._wn.sim_time:
+                return
+        if next_time == np.inf:
+            next_rule_iter = max_rule_iter
+        else:
+            next_rule_iter = min(int(math.ceil(next_time / self._wn.options.time.rule_timestep)), max_rule_iter)
+        if next_rule_iter > self._rule_iter:
+            if logger.getEffectiveLevel() <= 1:
+                logger.log(1, 'skipping rule timesteps until {0}'.format(
+                    next_rule_iter * self._wn.options.time.rule_timestep))
+            self._rule_iter = next_rule_iter
+
     def _run_feasibility_controls(self):
         self._feasibility_controls.reset()
         feasibility_controls_to_run = self._feasibility_controls.check()
@@ -794,7 +938,7 @@ class WNTRSimulator(WaterNetworkSimulator):
 
     def run_sim(self, solver=NewtonSolver, backup_solver=None, solver_options=None,
                 backup_solver_options=None, convergence_error=False, HW_approx='default',
-                diagnostics=False):
+                diagnostics=False, model_backend=None, warm_start=None, results_sink=None):
 
         """
         Run an extended period simulation (hydraulics only).
@@ -802,9 +946,9 @@ class WNTRSimulator(WaterNetworkSimulator):
         Parameters
         ----------
         solver: object
-            wntr.sim.solvers.NewtonSolver or Scipy solver
+            wntr.sim.solvers.NewtonSolver, wntr.sim.solvers.GGASolver, or Scipy solver
         backup_solver: object
-            wntr.sim.solvers.NewtonSolver or Scipy solver
+            wntr.sim.solvers.NewtonSolver, wntr.sim.solvers.GGASolver, or Scipy solver
         solver_options: dict
             Solver options are specified using the following dictionary keys:
 
@@ -815,6 +959,15 @@ class WNTRSimulator(WaterNetworkSimulator):
             * BACKTRACKING: whether or not to use a line search (default = True)
             * BT_START_ITER: the newton iteration at which a line search should start being used (default = 2)
             * THREADS: the number of threads to use in constraint and jacobian computations
+            * LINEAR_SOLVER: the sparse linear solver used for each Newton step; one of 'splu_fixed_perm'
+              (SuperLU reusing the fill-reducing permutation; the default), 'superlu' (SuperLU with a new permutation
+              for each factorization), 'krylov' (GMRES or BiCGSTAB with an incomplete LU preconditioner; see
+              KRYLOV_METHOD, KRYLOV_TOL, KRYLOV_MAXITER, ILU_DROP_TOL, and ILU_FILL_FACTOR), 'umfpack' (requires
+              scikit-umfpack), or 'cholmod' (requires scikit-sparse; only for the GGASolver)
+            * JAC_REUSE: whether or not to keep the factorized jacobian across iterations (and timesteps) for as long
+              as the residual converges fast enough (default = False)
+            * JAC_REFRESH_RATE: with JAC_REUSE, the jacobian is refreshed when a step reduces the residual by less than
+              this factor (default = 0.5)
         backup_solver_options: dict
         convergence_error: bool (optional)
             If convergence_error is True, an error will be raised if the
@@ -826,11 +979,116 @@ class WNTRSimulator(WaterNetworkSimulator):
             see the WNTR documentation on hydraulics for details.
         diagnostics: bool
             If True, then run with diagnostics on
+        model_backend: str
+            Specifies how the hydraulic equations are built and evaluated. Options are 'aml', which builds
+            the equations with wntr.sim.aml, and 'vectorized', which evaluates the equations and assembles the
+            jacobian with NumPy array operations (see wntr.sim.models.vectorized). If None (default), 'vectorized'
+            is used with the GGASolver (which requires it) and 'aml' is used otherwise.
+        warm_start: str
+            Specifies how the initial guess for each timestep is computed. If None (default), the solution of the
+            previous timestep is used. If 'linear' or 'quadratic', the solutions of the previous two or three
+            timesteps are extrapolated to the next timestep, taking changes in the expected demands into account.
+            The extrapolated solution is only used if it reduces the residual of the hydraulic equations.
+        results_sink: wntr.sim.results.NpyResultsSink
+            If provided, the results of each report step are written to disk as the simulation runs, and the
+            returned results are read lazily from disk (unless the sink keeps the results in memory). If None
+            (default), the results are kept in memory.
+        """
+        self._create_model(solver=solver, HW_approx=HW_approx, model_backend=model_backend)
+        return self._run_sim(solver=solver, backup_solver=backup_solver, solver_options=solver_options,
+                             backup_solver_options=backup_solver_options, convergence_error=convergence_error,
+                             diagnostics=diagnostics, warm_start=warm_start, results_sink=results_sink)
+
+    def run_batch(self, scenarios, solver=NewtonSolver, backup_solver=None, solver_options=None,
+                  backup_solver_options=None, convergence_error=False, HW_approx='default',
+                  model_backend=None, warm_start=None):
+        """
+        Run an extended period simulation (hydraulics only) for each of several scenarios.
+
+        The hydraulic model is built once and reused for all scenarios. For each scenario, the water network
+        model is reset to its initial values, the scenario is applied, only the parts of the model affected by
+        the scenario (or by the controls of the previous scenario) are updated, and the scenario is simulated.
+        The scenario is removed from the water network model afterwards.
+
+        Parameters
+        ----------
+        scenarios: list of wntr.sim.batch.BatchScenario
+            The scenarios to simulate. Scenario names must be unique.
+        solver: object
+            See run_sim
+        backup_solver: object
+            See run_sim
+        solver_options: dict
+            See run_sim
+        backup_solver_options: dict
+            See run_sim
+        convergence_error: bool (optional)
+            See run_sim
+        HW_approx: str
+            See run_sim
+        model_backend: str
+            See run_sim
+        warm_start: str
+            See run_sim
+
+        Returns
+        -------
+        results: OrderedDict
+            The SimulationResults of each scenario, keyed by scenario name
         """
+        names = [scenario.name for scenario in scenarios]
+        if len(set(names)) != len(names):
+            raise ValueError('Scenario names must be unique')
+        # Share one solver instance across the scenarios
+        if _is_newton_solver_class(solver):
+            solver = solver(solver_options)
+        if _is_newton_solver_class(backup_solver):
+            backup_solver = backup_solver(backup_solver_options)
+
+        results = OrderedDict()
+        self._wn.reset_initial_values()
+        self._create_model(solver=solver, HW_approx=HW_approx, model_backend=model_backend)
+        updater = wntr.sim.batch._RecordingModelUpdater(self._model_updater)
+        self._model_updater = updater
+        try:
+            for scenario in scenarios:
+                logger.debug('running scenario {0}'.format(scenario.name))
+                try:
+                    changes = scenario.apply(self._wn)
+                    self._wn.reset_initial_values()
+                    self._prev_isolated_junctions = OrderedSet()
+                    self._prev_isolated_links = OrderedSet()
+                    updater.sync(self._model, self._wn, changes)
+                    results[scenario.name] = self._run_sim(solver=solver, backup_solver=backup_solver,
+                                                           solver_options=solver_options,
+                                                           backup_solver_options=backup_solver_options,
+                                                           convergence_error=convergence_error, diagnostics=False,
+                                                           warm_start=warm_start)
+                finally:
+                    scenario.revert(self._wn)
+        finally:
+            self._model_updater = updater._updater
+            self._wn.reset_initial_values()
+        return results
+
+    def _create_model(self, solver, HW_approx, model_backend):
         logger.debug('creating hydraulic model')
         self.mode = self._wn.options.hydraulic.demand_model
-        self._model, self._model_updater = wntr.sim.hydraulics.create_hydraulic_model(wn=self._wn, HW_approx=HW_approx)
+        if model_backend is None:
+            if isinstance(solver, GGASolver) or (isinstance(solver, type) and issubclass(solver, GGASolver)):
+                model_backend = 'vectorized'
+            else:
+                model_backend = 'aml'
+        if model_backend == 'aml':
+            self._model, self._model_updater = wntr.sim.hydraulics.create_hydraulic_model(wn=self._wn, HW_approx=HW_approx)
+        elif model_backend == 'vectorized':
+            self._model, self._model_updater = wntr.sim.models.vectorized.create_vectorized_hydraulic_model(
+                wn=self._wn, HW_approx=HW_approx)
+        else:
+            raise ValueError('Unexpected value for model_backend: ' + str(model_backend))
 
+    def _run_sim(self, solver, backup_solver, solver_options, backup_solver_options, convergence_error, diagnostics,
+                 warm_start, results_sink=None):
         if diagnostics:
             diagnostics = _Diagnostics(self._wn, self._model, self.mode, enable=True)
         else:
@@ -841,13 +1099,22 @@ class WNTRSimulator(WaterNetworkSimulator):
 
         self._get_control_managers()
 
-        node_res, link_res = wntr.sim.hydraulics.initialize_results_dict(self._wn)
+        if warm_start is None:
+            self._warm_start = None
+        elif warm_start == 'linear':
+            self._warm_start = _WarmStart(self._model, order=1)
+        elif warm_start == 'quadratic':
+            self._warm_start = _WarmStart(self._model, order=2)
+        else:
+            raise ValueError('Unexpected value for warm_start: ' + str(warm_start))
+
         results = wntr.sim.results.SimulationResults()
         results.error_code = None
         results.time = []
         results.network_name = self._wn.name
 
         self._initialize_internal_graph()
+        self._tank_head_index = wntr.sim.hydraulics._TankHeadIndex(self._wn)
 
         if self._wn.sim_time == 0:
             first_step = True
@@ -864,103 +1131,116 @@ class WNTRSimulator(WaterNetworkSimulator):
 
         logger.debug('starting simulation')
 
-        logger.info('{0:<10}{1:<10}{2:<10}{3:<15}{4:<15}'.format('Sim Time', 'Trial', 'Solver', '# isolated', '# isolated'))
-        logger.info('{0:<10}{1:<10}{2:<10}{3:<15}{4:<15}'.format('', '', '# iter', 'junctions', 'links'))
-        while True:
-            if logger.getEffectiveLevel() <= logging.DEBUG:
-                logger.debug('\n\n')
+        node_res, link_res = wntr.sim.hydraulics.initialize_results_dict(self._wn, results_sink)
+        try:
+            logger.info('{0:<10}{1:<10}{2:<10}{3:<15}{4:<15}'.format('Sim Time', 'Trial', 'Solver', '# isolated', '# isolated'))
+            logger.info('{0:<10}{1:<10}{2:<10}{3:<15}{4:<15}'.format('', '', '# iter', 'junctions', 'links'))
+            while True:
+                if logger.getEffectiveLevel() <= logging.DEBUG:
+                    logger.debug('\n\n')
 
-            if not resolve:
-                if not first_step:
-                    """
-                    The tank levels/heads must be done before checking the controls because the TankLevelControls
-                    depend on the tank levels. These will be updated again after we determine the next actual timestep.
-                    """
-                    wntr.sim.hydraulics.update_tank_heads(self._wn)
-                trial = 0
-                self._compute_next_timestep_and_run_presolve_controls_and_rules(first_step)
-
-            self._run_feasibility_controls()
-
-            # Prepare for solve
-            self._update_internal_graph()
-            num_isolated_junctions, num_isolated_links = self._get_isolated_junctions_and_links()
-            if not first_step and not resolve:
-                wntr.sim.hydraulics.update_tank_heads(self._wn)
-            wntr.sim.hydraulics.update_model_for_controls(self._model, self._wn, self._model_updater, self._presolve_controls)
-            wntr.sim.hydraulics.update_model_for_controls(self._model, self._wn, self._model_updater, self._rules)
-            wntr.sim.hydraulics.update_model_for_controls(self._model, self._wn, self._model_updater, self._feasibility_controls)
-            wntr.sim.models.param.source_head_param(self._model, self._wn)
-            wntr.sim.models.param.expected_demand_param(self._model, self._wn)
-
-            diagnostics.run(last_step='presolve controls, rules, and model updates', next_step='solve')
-
-            solver_status, mesg, iter_count = _solver_helper(self._model, self._solver, self._solver_options)
-            if solver_status == 0 and self._backup_solver is not None:
-                solver_status, mesg, iter_count = _solver_helper(self._model, self._backup_solver, self._backup_solver_options)
-            if solver_status == 0:
-                if self._convergence_error:
-                    logger.error('Simulation did not converge at time ' + self._get_time() + '. ' + mesg) 
-                    raise RuntimeError('Simulation did not converge at time ' + self._get_time() + '. ' + mesg)
-                warnings.warn('Simulation did not converge at time ' + self._get_time() + '. ' + mesg)
-                logger.warning('Simulation did not converge at time ' + self._get_time() + '. ' + mesg)
-                results.error_code = wntr.sim.results.ResultsStatus.error
-                diagnostics.run(last_step='solve', next_step='break')
-                break
-
-            logger.info('{0:<10}{1:<10}{2:<10}{3:<15}{4:<15}'.format(self._get_time(), trial, iter_count, num_isolated_junctions, num_isolated_links))
-
-            # Enter results in network and update previous inputs
-            logger.debug('storing results in network')
-            wntr.sim.hydraulics.store_results_in_network(self._wn, self._model)
-
-            diagnostics.run(last_step='solve and store results in network', next_step='postsolve controls')
-
-            self._run_postsolve_controls()
-            if self._postsolve_controls.changes_made():
-                resolve = True
+                if not resolve:
+                    if not first_step:
+                        """
+                        The tank levels/heads must be done before checking the controls because the TankLevelControls
+                        depend on the tank levels. These will be updated again after we determine the next actual timestep.
+                        """
+                        wntr.sim.hydraulics.update_tank_heads(self._wn, self._tank_head_index)
+                    trial = 0
+                    self._compute_next_timestep_and_run_presolve_controls_and_rules(first_step)
+
+                self._run_feasibility_controls()
+
+                # Prepare for solve
                 self._update_internal_graph()
-                wntr.sim.hydraulics.update_model_for_controls(self._model, self._wn, self._model_updater, self._postsolve_controls)
-                diagnostics.run(last_step='postsolve controls and model updates', next_step='solve next trial')
-                trial += 1
-                if trial > max_trials:
-                    if convergence_error:
-                        logger.error('Exceeded maximum number of trials at time ' + self._get_time() + '. ') 
-                        raise RuntimeError('Exceeded maximum number of trials at time ' + self._get_time() + '. ' ) 
+                num_isolated_junctions, num_isolated_links = self._get_isolated_junctions_and_links()
+                if not first_step and not resolve:
+                    wntr.sim.hydraulics.update_tank_heads(self._wn, self._tank_head_index)
+                wntr.sim.hydraulics.update_model_for_controls(self._model, self._wn, self._model_updater, self._presolve_controls)
+                wntr.sim.hydraulics.update_model_for_controls(self._model, self._wn, self._model_updater, self._rules)
+                wntr.sim.hydraulics.update_model_for_controls(self._model, self._wn, self._model_updater, self._feasibility_controls)
+                wntr.sim.models.param.source_head_param(self._model, self._wn)
+                wntr.sim.models.param.expected_demand_param(self._model, self._wn)
+
+                x_guess = None
+                if self._warm_start is not None and not resolve:
+                    x_guess = self._warm_start.predict(self._wn.sim_time)
+
+                diagnostics.run(last_step='presolve controls, rules, and model updates', next_step='solve')
+
+                solver_status, mesg, iter_count = _solver_helper(self._model, self._solver, self._solver_options,
+                                                                 x_guess=x_guess)
+                if solver_status == 0 and self._backup_solver is not None:
+                    solver_status, mesg, iter_count = _solver_helper(self._model, self._backup_solver, self._backup_solver_options)
+                if solver_status == 0:
+                    if self._convergence_error:
+                        logger.error('Simulation did not converge at time ' + self._get_time() + '. ' + mesg) 
+                        raise RuntimeError('Simulation did not converge at time ' + self._get_time() + '. ' + mesg)
+                    warnings.warn('Simulation did not converge at time ' + self._get_time() + '. ' + mesg)
+                    logger.warning('Simulation did not converge at time ' + self._get_time() + '. ' + mesg)
                     results.error_code = wntr.sim.results.ResultsStatus.error
-                    warnings.warn('Exceeded maximum number of trials at time ' + self._get_time() + '. ') 
-                    logger.warning('Exceeded maximum number of trials at time ' + self._get_time() + '. ' ) 
+                    diagnostics.run(last_step='solve', next_step='break')
                     break
-                continue
 
-            diagnostics.run(last_step='postsolve controls and model updates', next_step='advance time')
-
-            logger.debug('no changes made by postsolve controls; moving to next timestep')
+                logger.info('{0:<10}{1:<10}{2:<10}{3:<15}{4:<15}'.format(self._get_time(), trial, iter_count, num_isolated_junctions, num_isolated_links))
+
+                # Enter results in network and update previous inputs
+                logger.debug('storing results in network')
+                wntr.sim.hydraulics.store_results_in_network(self._wn, self._model)
+
+                diagnostics.run(last_step='solve and store results in network', next_step='postsolve controls')
+
+                self._run_postsolve_controls()
+                if self._postsolve_controls.changes_made():
+                    resolve = True
+                    self._update_internal_graph()
+                    wntr.sim.hydraulics.update_model_for_controls(self._model, self._wn, self._model_updater, self._postsolve_controls)
+                    diagnostics.run(last_step='postsolve controls and model updates', next_step='solve next trial')
+                    trial += 1
+                    if trial > max_trials:
+                        if convergence_error:
+                            logger.error('Exceeded maximum number of trials at time ' + self._get_time() + '. ') 
+                            raise RuntimeError('Exceeded maximum number of trials at time ' + self._get_time() + '. ' ) 
+                        results.error_code = wntr.sim.results.ResultsStatus.error
+                        warnings.warn('Exceeded maximum number of trials at time ' + self._get_time() + '. ') 
+                        logger.warning('Exceeded maximum number of trials at time ' + self._get_time() + '. ' ) 
+                        break
+                    continue
 
-            resolve = False
-            if type(self._report_timestep) == float or type(self._report_timestep) == int:
-                if self._wn.sim_time % self._report_timestep == 0:
+                diagnostics.run(last_step='postsolve controls and model updates', next_step='advance time')
+
+                logger.debug('no changes made by postsolve controls; moving to next timestep')
+
+                resolve = False
+                if type(self._report_timestep) == float or type(self._report_timestep) == int:
+                    if self._wn.sim_time % self._report_timestep == 0:
+                        wntr.sim.hydraulics.save_results(self._wn, node_res, link_res)
+                        if len(results.time) > 0 and int(self._wn.sim_time) == results.time[-1]:
+                            if int(self._wn.sim_time) != self._wn.sim_time:
+                                raise RuntimeError('Time steps increments smaller than 1 second are forbidden.'+
+                                                   ' Keep time steps as an integer number of seconds.')
+                            else:
+                                raise RuntimeError('Simulation already solved this timestep')
+                        results.time.append(int(self._wn.sim_time))
+                elif self._report_timestep.upper() == 'ALL':
                     wntr.sim.hydraulics.save_results(self._wn, node_res, link_res)
                     if len(results.time) > 0 and int(self._wn.sim_time) == results.time[-1]:
-                        if int(self._wn.sim_time) != self._wn.sim_time:
-                            raise RuntimeError('Time steps increments smaller than 1 second are forbidden.'+
-                                               ' Keep time steps as an integer number of seconds.')
-                        else:
-                            raise RuntimeError('Simulation already solved this timestep')
+                        raise RuntimeError('Simulation already solved this timestep')
                     results.time.append(int(self._wn.sim_time))
-            elif self._report_timestep.upper() == 'ALL':
-                wntr.sim.hydraulics.save_results(self._wn, node_res, link_res)
-                if len(results.time) > 0 and int(self._wn.sim_time) == results.time[-1]:
-                    raise RuntimeError('Simulation already solved this timestep')
-                results.time.append(int(self._wn.sim_time))
-            wntr.sim.hydraulics.update_network_previous_values(self._wn)
-            first_step = False
-            self._wn.sim_time += self._hydraulic_timestep
-            overstep = float(self._wn.sim_time) % self._hydraulic_timestep
-            self._wn.sim_time -= overstep
-
-            if self._wn.sim_time > self._wn.options.time.duration:
-                break
+                if self._warm_start is not None:
+                    self._warm_start.record(self._wn.sim_time)
+                wntr.sim.hydraulics.update_network_previous_values(self._wn)
+                first_step = False
+                self._wn.sim_time += self._hydraulic_timestep
+                overstep = float(self._wn.sim_time) % self._hydraulic_timestep
+                self._wn.sim_time -= overstep
+
+                if self._wn.sim_time > self._wn.options.time.duration:
+                    break
+        finally:
+            # rewrite the headers of the files of a results sink even if the simulation raised an exception
+            node_res.close()
+            link_res.close()
 
         wntr.sim.hydraulics.get_results(self._wn, results, node_res, link_res)
         
@@ -1053,6 +1333,9 @@ class WNTRSimulator(WaterNetworkSimulator):
             self._source_ids.append(node_id)
         self._source_ids = np.array(self._source_ids, dtype=self._int_dtype)
 
+        self._isolated_graph_data = None  # the data of the internal graph at the last search for isolated junctions
+        self._links_for_node_id = dict()  # node id: names of the links connected to the node (filled as needed)
+
     def _update_internal_graph(self):
         data = self._internal_graph.data
         ndx_map = self._map_link_to_internal_graph_data_ndx
@@ -1082,6 +1365,11 @@ class WNTRSimulator(WaterNetworkSimulator):
     def _get_isolated_junctions_and_links(self):
         logger_level = logger.getEffectiveLevel()
 
+        data = self._internal_graph.data
+        if self._isolated_graph_data is not None and np.array_equal(data, self._isolated_graph_data):
+            # no links were opened or closed since the last search, so the isolated junctions and links are the same
+            return len(self._prev_isolated_junctions), len(self._prev_isolated_links)
+
         if logger_level <= logging.DEBUG:
             logger.debug('checking for isolated junctions and links')
         for j in self._prev_isolated_junctions:
@@ -1093,10 +1381,10 @@ class WNTRSimulator(WaterNetworkSimulator):
 
         node_indicator = np.ones(self._wn.num_nodes, dtype=self._int_dtype)
         check_for_isolated_junctions(self._source_ids, node_indicator, self._internal_graph.indptr,
-                                     self._internal_graph.indices, self._internal_graph.data,
-                                     self._number_of_connections)
+                                     self._internal_graph.indices, data, self._number_of_connections)
+        self._isolated_graph_data = data.copy()
 
-        isolated_junction_ids = [i for i in range(len(node_indicator)) if node_indicator[i] == 1]
+        isolated_junction_ids = np.flatnonzero(node_indicator == 1).tolist()
         isolated_junctions = OrderedSet()
         isolated_links = OrderedSet()
         for j_id in isolated_junction_ids:
@@ -1104,7 +1392,9 @@ class WNTRSimulator(WaterNetworkSimulator):
             junction = self._wn.get_node(j)
             junction._is_isolated = True
             isolated_junctions.add(j)
-            connected_links = self._wn.get_links_for_node(j)
+            connected_links = self._links_for_node_id.get(j_id)
+            if connected_links is None:
+                connected_links = self._links_for_node_id[j_id] = self._wn.get_links_for_node(j)
             for l in connected_links:
                 link = self._wn.get_link(l)
                 link._is_isolated = True
@@ -1141,14 +1431,21 @@ def _get_csr_data_index(a, row, col):
     raise RuntimeError('Unable to find csr data index.')
 
 
-def _solver_helper(model, solver, solver_options):
+def _is_newton_solver_class(solver):
+    return isinstance(solver, type) and issubclass(solver, NewtonSolver)
+
+
+def _solver_helper(model, solver, solver_options, x_guess=None):
     """
 
     Parameters
     ----------
     model: wntr.aml.Model
-    solver: class or function
+    solver: class, object, or function
+        If solver is an instance of NewtonSolver, then solver_options is ignored.
     solver_options: dict
+    x_guess: np.ndarray, optional
+        An alternative starting point for NewtonSolver (see NewtonSolver.solve); ignored by other solvers
 
     Returns
     -------
@@ -1157,9 +1454,11 @@ def _solver_helper(model, solver, solver_options):
     """
     logger.debug('solving')
     model.set_structure()
-    if solver is NewtonSolver:
-        _solver = NewtonSolver(solver_options)
-        sol = _solver.solve(model)
+    if isinstance(solver, NewtonSolver):
+        sol = solver.solve(model, x_guess=x_guess)
+    elif _is_newton_solver_class(solver):
+        _solver = solver(solver_options)
+        sol = _solver.solve(model, x_guess=x_guess)
     elif solver is scipy.optimize.fsolve:
         x, infodict, ier, mesg = solver(model.evaluate_residuals, model.get_x(), **solver_options)
         if ier != 1:
@@ -0,0 +1,370 @@
+"""
+The wntr.sim.ensemble module runs ensembles of simulations (e.g., Monte Carlo
+realizations of a stochastic scenario) in parallel worker processes.
+
+The water network model, the modifier, the simulator settings, and the reducer are
+serialized and sent to each worker process once. Each ensemble member is then
+simulated on a fresh copy of the water network model in a worker, and only the
+(reduced) results are sent back to the calling process as soon as they are available.
+"""
+import concurrent.futures
+import logging
+import os
+import pickle
+import tempfile
+import time
+import traceback
+from concurrent.futures.process import BrokenProcessPool
+
+
+logger = logging.getLogger(__name__)
+
+# State of each worker process; set once by _initialize_worker
+_worker_state = None
+
+
+class EnsembleResult(object):
+    """
+    The outcome of simulating one ensemble member.
+
+    Parameters
+    ----------
+    index: int
+        Position of the member in the sequence of members passed to the ensemble
+    member: object
+        The member itself
+    value: object
+        The (reduced) simulation results; None if the simulation failed
+    error: str
+        The formatted traceback if the member failed; None otherwise
+    run_time: float
+        Time, in seconds, spent on the member in the worker process
+    """
+    def __init__(self, index, member, value=None, error=None, run_time=0.0):
+        self.index = index
+        self.member = member
+        self.value = value
+        self.error = error
+        self.run_time = run_time
+
+    @property
+    def success(self):
+        """bool : True if the member was simulated (and reduced) without raising an exception"""
+        return self.error is None
+
+    def __repr__(self):
+        if self.success:
+            return '<EnsembleResult: {}>'.format(self.index)
+        return '<EnsembleResult: {} (failed)>'.format(self.index)
+
+
+class SelectResults(object):
+    """
+    Reducer that keeps selected results.
+
+    Parameters
+    ----------
+    node: dict, optional
+        Keys are node result attributes (e.g., 'pressure') and values are lists of node
+        names to keep, or None to keep all nodes
+    link: dict, optional
+        Keys are link result attributes (e.g., 'flowrate') and values are lists of link
+        names to keep, or None to keep all links
+
+    Returns
+    -------
+    dict
+        Keys are (element, attribute) tuples, e.g., ('node', 'pressure'), and values are
+        pandas DataFrames (index = time, columns = names)
+    """
+    def __init__(self, node=None, link=None):
+        self.node = dict(node) if node is not None else dict()
+        self.link = dict(link) if link is not None else dict()
+
+    def _select(self, results):
+        for element, selection in (('node', self.node), ('link', self.link)):
+            element_results = getattr(results, element)
+            for attr, names in selection.items():
+                df = element_results[attr]
+                if names is not None:
+                    df = df.loc[:, list(names)]
+                yield (element, attr), df
+
+    def __call__(self, results, wn, member):
+        return dict(self._select(results))
+
+
+class SummaryStatistics(SelectResults):
+    """
+    Reducer that keeps summary statistics (over time) of selected results.
+
+    Parameters
+    ----------
+    node: dict, optional
+        Keys are node result attributes (e.g., 'pressure') and values are lists of node
+        names, or None for all nodes
+    link: dict, optional
+        Keys are link result attributes (e.g., 'flowrate') and values are lists of link
+        names, or None for all links
+    statistics: list of str, optional
+        Names of pandas DataFrame reductions (default = ['min', 'mean', 'max'])
+
+    Returns
+    -------
+    dict
+        Keys are (element, attribute) tuples, e.g., ('node', 'pressure'), and values are
+        pandas DataFrames (index = statistics, columns = names)
+    """
+    def __init__(self, node=None, link=None, statistics=('min', 'mean', 'max')):
+        super(SummaryStatistics, self).__init__(node=node, link=link)
+        self.statistics = list(statistics)
+
+    def __call__(self, results, wn, member):
+        return {key: df.agg(self.statistics) for key, df in self._select(results)}
+
+
+def _get_simulator_class(simulator):
+    import wntr.sim
+    if isinstance(simulator, str):
+        if simulator.upper() in {'WNTR', 'WNTRSIMULATOR'}:
+            return wntr.sim.WNTRSimulator
+        elif simulator.upper() in {'EPANET', 'EPANETSIMULATOR'}:
+            return wntr.sim.EpanetSimulator
+        raise ValueError('Unexpected value for simulator: ' + str(simulator))
+    return simulator
+
+
+def _call_modifier(modifier, wn, member):
+    if modifier is None:
+        if member is not None:
+            member(wn)
+    else:
+        modifier(wn, member)
+
+
+def _run_member(state, index, member):
+    t0 = time.time()
+    try:
+        wn = pickle.loads(state['wn'])
+        _call_modifier(state['modifier'], wn, member)
+        sim = state['simulator'](wn)
+        if issubclass(state['simulator'], _get_simulator_class('EPANET')):
+            tmpdir = tempfile.mkdtemp(prefix='wntr_ensemble_')
+            try:
+                kwargs = dict(state['sim_kwargs'])
+                kwargs['file_prefix'] = os.path.join(tmpdir, 'member' + str(index))
+                results = sim.run_sim(**kwargs)
+            finally:
+                for filename in os.listdir(tmpdir):
+                    os.remove(os.path.join(tmpdir, filename))
+                os.rmdir(tmpdir)
+        else:
+            results = sim.run_sim(**state['sim_kwargs'])
+        if state['reducer'] is not None:
+            results = state['reducer'](results, wn, member)
+        return EnsembleResult(index, member, value=results, run_time=time.time() - t0)
+    except Exception:
+        logger.debug('ensemble member {0} failed'.format(index))
+        return EnsembleResult(index, member, error=traceback.format_exc(), run_time=time.time() - t0)
+
+
+def _initialize_worker(state):
+    global _worker_state
+    _worker_state = pickle.loads(state)
+
+
+def _run_chunk(chunk):
+    return [_run_member(_worker_state, index, member) for index, member in chunk]
+
+
+def _chunk_results(future, chunk):
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        # a worker process died (e.g., the EPANET library crashed); the members it had are reported as failed
+        error = traceback.format_exc()
+        return [EnsembleResult(index, member, error=error) for index, member in chunk]
+
+
+def _chunks(members, chunksize):
+    chunk = list()
+    for index, member in enumerate(members):
+        chunk.append((index, member))
+        if len(chunk) == chunksize:
+            yield chunk
+            chunk = list()
+    if len(chunk) > 0:
+        yield chunk
+
+
+class Ensemble(object):
+    """
+    Runs an ensemble of simulations of a water network model in parallel.
+
+    Each member of the ensemble is simulated on a fresh copy of the water network model after
+    the member has been applied to it. Members are applied with ``modifier(wn, member)`` or, if
+    modifier is None, the members are callables and are applied with ``member(wn)``.
+    The modifier, the members, the reducer, and the simulator must be picklable (e.g., module
+    level functions or instances of module level classes) when num_workers is not 0.
+
+    Parameters
+    ----------
+    wn: wntr.network.WaterNetworkModel
+        The water network model; it is not modified
+    modifier: callable, optional
+        Function with arguments (wn, member) that applies a member to a copy of the
+        water network model
+    simulator: str or class, optional
+        'WNTR' (default), 'EPANET', or a WaterNetworkSimulator class
+    sim_kwargs: dict, optional
+        Keyword arguments passed to the run_sim method of the simulator. With the EpanetSimulator,
+        file_prefix is set for each member to a temporary directory that is removed after the member is
+        simulated.
+    reducer: callable, optional
+        Function with arguments (results, wn, member) that reduces the simulation results of a member
+        in the worker process before they are sent back (e.g., SelectResults or SummaryStatistics). If None,
+        the full SimulationResults are returned.
+    num_workers: int, optional
+        Number of worker processes. If None (default), the number of CPUs is used. If 0, the members
+        are simulated in the calling process.
+    chunksize: int, optional
+        Number of members sent to a worker at a time (default = 1). Larger chunks reduce
+        communication overhead when members are fast to simulate.
+    max_pending: int, optional
+        Maximum number of chunks that are submitted to the workers but not yet returned. If None (default),
+        twice the number of workers. Only this many chunks of members are read from the members iterable
+        ahead of the results.
+    """
+    def __init__(self, wn, modifier=None, simulator='WNTR', sim_kwargs=None, reducer=None,
+                 num_workers=None, chunksize=1, max_pending=None):
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        if num_workers < 0:
+            raise ValueError('num_workers must be a nonnegative integer')
+        if chunksize < 1:
+            raise ValueError('chunksize must be a positive integer')
+        if max_pending is None:
+            max_pending = 2 * max(num_workers, 1)
+        if max_pending < 1:
+            raise ValueError('max_pending must be a positive integer')
+        self.modifier = modifier
+        self.simulator = _get_simulator_class(simulator)
+        self.sim_kwargs = dict(sim_kwargs) if sim_kwargs is not None else dict()
+        self.reducer = reducer
+        self.num_workers = num_workers
+        self.chunksize = chunksize
+        self.max_pending = max_pending
+        self._wn = pickle.dumps(wn, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _get_state(self):
+        return dict(wn=self._wn, modifier=self.modifier, simulator=self.simulator,
+                    sim_kwargs=self.sim_kwargs, reducer=self.reducer)
+
+    def imap(self, members):
+        """
+        Simulate the members, yielding the results as they become available.
+
+        The results are yielded in the order in which they complete, which is not necessarily the
+        order of the members; use EnsembleResult.index to match results to members. Members are
+        consumed lazily (at most max_pending chunks ahead of the results), so members can be a long
+        generator. If a worker process dies, the members of the chunks that were submitted at that
+        time are reported as failed and the remaining members are simulated by new worker processes.
+
+        Parameters
+        ----------
+        members: iterable
+
+        Yields
+        ------
+        EnsembleResult
+        """
+        if self.num_workers == 0:
+            state = self._get_state()
+            for index, member in enumerate(members):
+                yield _run_member(state, index, member)
+            return
+
+        state = pickle.dumps(self._get_state(), protocol=pickle.HIGHEST_PROTOCOL)
+        chunks = _chunks(members, self.chunksize)
+        pending = dict()  # future: chunk
+        executor = None
+        try:
+            while True:
+                if executor is None:
+                    executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.num_workers,
+                                                                      initializer=_initialize_worker,
+                                                                      initargs=(state,))
+                for chunk in chunks:
+                    pending[executor.submit(_run_chunk, chunk)] = chunk
+                    if len(pending) >= self.max_pending:
+                        break
+                if len(pending) == 0:
+                    break
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    chunk = pending.pop(future)
+                    broken = broken or isinstance(future.exception(), BrokenProcessPool)
+                    for res in _chunk_results(future, chunk):
+                        yield res
+                if broken:
+                    # the executor cannot be used anymore; the chunks it still had fail as well
+                    for future in concurrent.futures.as_completed(list(pending)):
+                        for res in _chunk_results(future, pending.pop(future)):
+                            yield res
+                    executor.shutdown(wait=True)
+                    executor = None
+        finally:
+            if executor is not None:
+                for future in pending:
+                    future.cancel()
+                executor.shutdown(wait=True)
+
+    def run(self, members):
+        """
+        Simulate the members.
+
+        Parameters
+        ----------
+        members: iterable
+
+        Returns
+        -------
+        list of EnsembleResult
+            One result per member, in the order of the members
+        """
+        results = list(self.imap(members))
+        results.sort(key=lambda res: res.index)
+        failed = [res.index for res in results if not res.success]
+        if len(failed) > 0:
+            logger.warning('{0} of {1} ensemble members failed'.format(len(failed), len(results)))
+        return results
+
+
+def run_ensemble(wn, members, modifier=None, simulator='WNTR', sim_kwargs=None, reducer=None,
+                 num_workers=None, chunksize=1, max_pending=None):
+    """
+    Simulate an ensemble of modifications of a water network model in parallel.
+
+    See :class:`~wntr.sim.ensemble.Ensemble` for a description of the parameters.
+
+    Parameters
+    ----------
+    wn: wntr.network.WaterNetworkModel
+    members: iterable
+    modifier: callable, optional
+    simulator: str or class, optional
+    sim_kwargs: dict, optional
+    reducer: callable, optional
+    num_workers: int, optional
+    chunksize: int, optional
+    max_pending: int, optional
+
+    Returns
+    -------
+    list of EnsembleResult
+        One result per member, in the order of the members
+    """
+    ensemble = Ensemble(wn, modifier=modifier, simulator=simulator, sim_kwargs=sim_kwargs, reducer=reducer,
+                        num_workers=num_workers, chunksize=chunksize, max_pending=max_pending)
+    return ensemble.run(members)
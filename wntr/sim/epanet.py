@@ -1,5 +1,13 @@
 from wntr.sim.core import WaterNetworkSimulator
 import wntr.epanet.io
+from wntr.epanet.util import EN, HydParam, QualType, from_si
+from wntr.network import LinkStatus
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import hashlib
+import os
+import tempfile
 import warnings
 import logging
 
@@ -61,7 +69,7 @@ class EpanetSimulator(WaterNetworkSimulator):
             self.reader = wntr.epanet.io.BinFile(result_types=result_types)
 
     def run_sim(self, file_prefix='temp', save_hyd=False, use_hyd=False, hydfile=None, 
-                version=2.2, convergence_error=False):
+                version=2.2, convergence_error=False, in_memory=False, hydraulics_cache=None):
 
         """
         Run the EPANET simulator.
@@ -95,9 +103,29 @@ class EpanetSimulator(WaterNetworkSimulator):
             simulation does not converge. If convergence_error is False, partial results are returned, 
             a warning will be issued, and results.error_code will be set to 0
             if the simulation does not converge.  Default = False.
+        in_memory: bool (optional)
+            If True, the network is loaded into the EPANET toolkit with the toolkit functions
+            (see :class:`~wntr.epanet.io.ToolkitWriter`) and the results are retrieved with the toolkit
+            getters while the hydraulics (and water quality) are stepped, so no INP, report, binary, or
+            hydraulics files are written. file_prefix, save_hyd, use_hyd, and hydfile are not used.
+            Requires EPANET 2.2. Reaction rate and friction factor results are not available, the
+            status of active valves is reported as open, and the setting of initially closed pumps is
+            reported as 0 until they open. Default = False.
+        hydraulics_cache: str (optional)
+            Directory of a hydraulics file cache. The hydraulics files in the cache are named
+            after a hash of the hydraulic content of the INP file (the network, demands,
+            controls, hydraulic options, and times, but not the water quality sections and
+            options). If the cache contains the hydraulics of the model, they are used instead
+            of solving the hydraulics; otherwise, the hydraulics are solved and saved to the cache.
+            This allows water quality scenarios on the same hydraulics to skip the hydraulic
+            solve. save_hyd, use_hyd, and hydfile are not used. Default = None (no cache).
         """
         if isinstance(version, str):
             version = float(version)
+        if in_memory:
+            if save_hyd or use_hyd or hydraulics_cache is not None:
+                raise ValueError('save_hyd, use_hyd, and hydraulics_cache cannot be used with in_memory=True')
+            return self._run_sim_in_memory(version, convergence_error)
         inpfile = file_prefix + '.inp'
         self._wn.write_inpfile(inpfile, units=self._wn.options.hydraulic.inpfile_units, version=version)
         enData = wntr.epanet.toolkit.ENepanet(version=version)
@@ -106,6 +134,13 @@ class EpanetSimulator(WaterNetworkSimulator):
         
         if hydfile is None:
             hydfile = file_prefix + '.hyd'
+        cache_hyd = False
+        if hydraulics_cache is not None:
+            if save_hyd or use_hyd:
+                raise ValueError('save_hyd and use_hyd cannot be used with hydraulics_cache')
+            hydfile = os.path.join(hydraulics_cache, _get_hydraulics_key(inpfile, version) + '.hyd')
+            use_hyd = os.path.exists(hydfile)
+            cache_hyd = not use_hyd
         enData.ENopen(inpfile, rptfile, outfile)
         if use_hyd:
             enData.ENusehydfile(hydfile)
@@ -116,6 +151,9 @@ class EpanetSimulator(WaterNetworkSimulator):
         if save_hyd:
             enData.ENsavehydfile(hydfile)
             logger.debug('Saved hydraulics')
+        elif cache_hyd:
+            _save_cached_hydraulics(enData, hydfile)
+            logger.debug('Saved hydraulics to the cache')
         enData.ENsolveQ()
         logger.debug('Solved quality')
         enData.ENreport()
@@ -128,3 +166,318 @@ class EpanetSimulator(WaterNetworkSimulator):
 
         return results
 
+    def _run_sim_in_memory(self, version, convergence_error):
+        if version != 2.2:
+            raise ValueError('In-memory EPANET simulations require the EPANET 2.2 toolkit')
+        wn = self._wn
+        enData = wntr.epanet.toolkit.ENepanet(version=version)
+        writer = wntr.epanet.io.ToolkitWriter()
+        writer.write(enData, wn, units=wn.options.hydraulic.inpfile_units)
+        logger.debug('Loaded network into the toolkit')
+        try:
+            results, num_steps = self._step_in_memory(enData, writer)
+        finally:
+            enData.ENclose()
+        logger.debug('Completed run')
+        return self._convert_in_memory_results(writer, results, num_steps)
+
+    def _convert_in_memory_results(self, writer, results, num_steps):
+        """Convert the results as if they had been read from a binary output file"""
+        wn = self._wn
+        reader = self.reader
+        reader.flow_units = writer.flow_units
+        reader.mass_units = writer.mass_units
+        reader.quality_type = _get_qual_type(wn)
+        reader._darcy_weisbach = wn.options.hydraulic.headloss == 'D-W'
+        link_types = np.array(writer.link_types, dtype=int)
+        if 'headloss' in results:
+            # the toolkit returns the total head loss of pipes instead of the head loss per 1000 units of length
+            pipes = link_types <= EN.PIPE
+            lengths = np.array([from_si(writer.flow_units, wn.get_link(name).length, HydParam.Length)
+                                for name in np.array(writer.link_names)[pipes]])
+            results['headloss'][:, pipes] *= 1000.0 / lengths
+        times = self._get_report_times()[0:num_steps]
+        sim_results = wntr.sim.SimulationResults()
+        sim_results.network_name = wn.name
+        sim_results.node = OrderedDict()
+        sim_results.link = OrderedDict()
+        sim_results.error_code = None
+        for block, values in results.items():
+            element, name = wntr.epanet.io._BIN_RESULT_NAMES[block]
+            if element == 'node':
+                names = writer.node_names
+            else:
+                names = writer.link_names
+            if block != 'linkstatus':
+                values = reader._convert_block(block, values, link_types)
+            getattr(sim_results, element)[name] = pd.DataFrame(data=values, index=times, columns=names)
+        return sim_results
+
+    def _get_report_times(self):
+        time = self._wn.options.time
+        report_step = time.report_timestep if time.report_timestep > 0 else time.pattern_timestep
+        report_start = time.report_start if time.report_start <= time.duration else 0
+        return np.arange(report_start, time.duration + 1, report_step)
+
+    def _step_in_memory(self, enData, writer, quality=True):
+        """Step the hydraulics (and water quality) and collect the results at the report times"""
+        wn = self._wn
+        blocks = self.reader._get_result_blocks() if hasattr(self.reader, '_get_result_blocks') \
+            else list(wntr.epanet.io._BIN_RESULT_BLOCKS)
+        blocks = [block for block in blocks if block in _TOOLKIT_RESULT_CODES]
+        quality = quality and _get_qual_type(wn) is not QualType.none and wn.options.time.duration > 0
+        times = self._get_report_times()
+        num_nodes = len(writer.node_names)
+        num_links = len(writer.link_names)
+        results = OrderedDict()
+        for block in blocks:
+            if wntr.epanet.io._BIN_RESULT_NAMES[block][0] == 'node':
+                results[block] = np.zeros((len(times), num_nodes))
+            else:
+                results[block] = np.zeros((len(times), num_links))
+        getters = list()
+        for block in blocks:
+            if block in ['quality', 'linkquality'] and not quality:
+                continue
+            if wntr.epanet.io._BIN_RESULT_NAMES[block][0] == 'node':
+                getters.append((results[block], enData.ENgetnodevalues, _TOOLKIT_RESULT_CODES[block]))
+            else:
+                getters.append((results[block], enData.ENgetlinkvalues, _TOOLKIT_RESULT_CODES[block]))
+
+        enData.ENopenH()
+        enData.ENinitH(0)
+        if quality:
+            enData.ENopenQ()
+            enData.ENinitQ(0)
+        step = 0
+        try:
+            while True:
+                t = enData.ENrunH()
+                if quality:
+                    enData.ENrunQ()
+                if step < len(times) and t == times[step]:
+                    for values, getter, code in getters:
+                        getter(code, out=values[step])
+                    step += 1
+                tstep = enData.ENnextH()
+                if quality:
+                    enData.ENnextQ()
+                if tstep <= 0:
+                    break
+        finally:
+            if quality:
+                enData.ENcloseQ()
+            enData.ENcloseH()
+        for block in results:
+            results[block] = results[block][0:step]
+        return results, step
+
+
+class EpanetSession(object):
+    """
+    EPANET toolkit project that is kept open for repeated simulations of a water network model.
+
+    The water network model is loaded into the EPANET 2.2 toolkit once, with the toolkit
+    functions (see :class:`~wntr.epanet.io.ToolkitWriter`), and the project stays open until
+    the session is closed. Link statuses, the demand multiplier, emitter coefficients, and
+    pattern values can be changed in the project with the set methods, and
+    :meth:`~wntr.sim.epanet.EpanetSession.run_sim` steps the hydraulics (and water quality)
+    again without writing or reading any file. This avoids rebuilding the model for every
+    evaluation in optimization or calibration loops.
+
+    The set methods change the toolkit project only; the water network model is not modified.
+    The limitations of ``EpanetSimulator.run_sim(in_memory=True)`` also apply to sessions.
+
+    A session can be used as a context manager, in which case it is closed on exit.
+
+    Parameters
+    ----------
+    wn : WaterNetworkModel
+        Water network model
+    result_types : dict
+        Defaults to None, or all results. Otherwise, is a keyword dictionary to pass to
+        the reader to specify what results should be saved.
+    """
+    def __init__(self, wn, result_types=None):
+        self._sim = EpanetSimulator(wn, result_types=result_types)
+        self._writer = wntr.epanet.io.ToolkitWriter()
+        self._en = wntr.epanet.toolkit.ENepanet(version=2.2)
+        self._writer.write(self._en, wn, units=wn.options.hydraulic.inpfile_units)
+        self._node_index = {name: i + 1 for i, name in enumerate(self._writer.node_names)}
+        self._link_index = {name: i + 1 for i, name in enumerate(self._writer.link_names)}
+        logger.debug('Loaded network into the toolkit')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def is_open(self):
+        """bool : True if the toolkit project is open"""
+        return self._en is not None and self._en.isOpen()
+
+    def close(self):
+        """Close the toolkit project"""
+        if self.is_open:
+            self._en.ENclose()
+        self._en = None
+
+    def _get_toolkit(self):
+        if not self.is_open:
+            raise RuntimeError('The EPANET session is closed')
+        return self._en
+
+    def set_link_status(self, status):
+        """
+        Set the initial status of links.
+
+        Parameters
+        ----------
+        status : dict or pandas Series
+            Keys are link names and values are LinkStatus.Open or LinkStatus.Closed
+            (or the equivalent strings or integers)
+        """
+        en = self._get_toolkit()
+        for name, value in status.items():
+            value = LinkStatus[value] if isinstance(value, str) else LinkStatus(value)
+            if value not in [LinkStatus.Open, LinkStatus.Closed]:
+                raise ValueError('The status of link {} must be Open or Closed'.format(name))
+            en.ENsetlinkvalue(self._link_index[name], EN.INITSTATUS, int(value))
+
+    def set_demand_multiplier(self, multiplier):
+        """
+        Set the global demand multiplier.
+
+        Parameters
+        ----------
+        multiplier : float
+            Demand multiplier
+        """
+        self._get_toolkit().ENsetoption(EN.DEMANDMULT, multiplier)
+
+    def set_emitter_coefficients(self, coefficients):
+        """
+        Set the emitter coefficients of junctions.
+
+        Parameters
+        ----------
+        coefficients : dict or pandas Series
+            Keys are junction names and values are emitter coefficients (in SI units, see
+            :class:`~wntr.network.elements.Junction`); 0 removes the emitter
+        """
+        en = self._get_toolkit()
+        flow_units = self._writer.flow_units
+        for name, value in coefficients.items():
+            en.ENsetnodevalue(self._node_index[name], EN.EMITTER,
+                              from_si(flow_units, value, HydParam.EmitterCoeff))
+
+    def set_pattern(self, name, multipliers):
+        """
+        Set the multipliers of a pattern.
+
+        Parameters
+        ----------
+        name : str
+            Name of the pattern
+        multipliers : list of float
+            Pattern multipliers
+        """
+        en = self._get_toolkit()
+        en.ENsetpattern(en.ENgetpatternindex(name), [float(value) for value in multipliers])
+
+    def run_sim(self, quality=True):
+        """
+        Simulate the current state of the toolkit project.
+
+        Parameters
+        ----------
+        quality : bool (optional)
+            If False, the water quality is not simulated. Default = True.
+
+        Returns
+        -------
+        SimulationResults
+        """
+        en = self._get_toolkit()
+        results, num_steps = self._sim._step_in_memory(en, self._writer, quality=quality)
+        return self._sim._convert_in_memory_results(self._writer, results, num_steps)
+
+
+# toolkit node and link parameters of the EPANET binary output file results
+_TOOLKIT_RESULT_CODES = OrderedDict([('demand', EN.DEMAND), ('head', EN.HEAD), ('pressure', EN.PRESSURE),
+                                     ('quality', EN.QUALITY), ('flow', EN.FLOW), ('velocity', EN.VELOCITY),
+                                     ('headloss', EN.HEADLOSS), ('linkquality', EN.LINKQUAL),
+                                     ('linkstatus', EN.STATUS), ('linksetting', EN.SETTING)])
+
+
+# INP file sections and [OPTIONS]/[TIMES] keywords that do not change the hydraulics
+_NON_HYDRAULIC_SECTIONS = {'[TITLE]', '[TAGS]', '[QUALITY]', '[SOURCES]', '[REACTIONS]', '[MIXING]', '[REPORT]',
+                           '[COORDINATES]', '[VERTICES]', '[LABELS]', '[BACKDROP]'}
+_NON_HYDRAULIC_KEYWORDS = {'QUALITY', 'DIFFUSIVITY', 'TOLERANCE'}
+
+
+def _get_hydraulics_key(inpfile, version):
+    """
+    Hash of the hydraulic content of an INP file (comments and whitespace are ignored). Patterns that are
+    only used by water quality sources are left out, so that source scenarios share the same hydraulics.
+    """
+    lines = list()  # list of (section, words)
+    section = None
+    with open(inpfile, 'r') as f:
+        for line in f:
+            words = line.split(';')[0].split()
+            if len(words) == 0:
+                continue
+            if words[0].startswith('['):
+                section = words[0].upper()
+            lines.append((section, words))
+
+    # A pattern is kept if its ID appears anywhere in the hydraulic sections (this may keep patterns that
+    # are not used, which only costs a cache miss). Pattern 1 is the default demand pattern.
+    source_patterns = set(words[3].upper() for section, words in lines if section == '[SOURCES]' and len(words) > 3)
+    hydraulic_words = {'1'}
+    for section, words in lines:
+        if section not in _NON_HYDRAULIC_SECTIONS and section != '[PATTERNS]':
+            hydraulic_words.update(word.upper() for word in words)
+    quality_patterns = source_patterns - hydraulic_words
+
+    key = hashlib.sha256('EPANET {}\n'.format(version).encode('ascii'))
+    for section, words in lines:
+        if words[0].startswith('['):
+            pass
+        elif section in _NON_HYDRAULIC_SECTIONS:
+            continue
+        elif section in ['[OPTIONS]', '[TIMES]'] and words[0].upper() in _NON_HYDRAULIC_KEYWORDS:
+            continue
+        elif section == '[PATTERNS]' and words[0].upper() in quality_patterns:
+            continue
+        key.update((' '.join(words) + '\n').encode('ascii'))
+    return key.hexdigest()
+
+
+def _save_cached_hydraulics(enData, hydfile):
+    """Save the hydraulics file so that other processes never see a partially written file"""
+    directory = os.path.dirname(hydfile)
+    if directory != '' and not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok=True)
+    fd, tmpfile = tempfile.mkstemp(suffix='.tmp', dir=directory if directory != '' else None)
+    os.close(fd)
+    try:
+        enData.ENsavehydfile(tmpfile)
+        os.replace(tmpfile, hydfile)
+    except Exception:
+        os.remove(tmpfile)
+        raise
+
+
+def _get_qual_type(wn):
+    parameter = wn.options.quality.parameter.upper()
+    if parameter == 'NONE':
+        return QualType.none
+    elif parameter == 'AGE':
+        return QualType.Age
+    elif parameter == 'TRACE':
+        return QualType.Trace
+    return QualType.Chem
@@ -13,6 +13,7 @@ from wntr.utils.ordered_set import OrderedSet
 from wntr.sim import aml
 from wntr.sim.models import constants, var, param, constraint
 from wntr.sim.models.utils import ModelUpdater
+from wntr.sim.models.vectorized import ArrayDict, VectorizedHydraulicModel
 
 logger = logging.getLogger(__name__)
 
@@ -158,64 +159,184 @@ def update_network_previous_values(wn):
     for tank_name, tank in wn.tanks():
         tank._prev_head = tank.head
 
-def update_tank_heads(wn):
+class _TankHeadIndex(object):
+    """
+    Per-tank arrays used by update_tank_heads to update the heads of all of the tanks with a few NumPy operations.
+
+    Tanks that share a volume curve are updated together with a single interpolation table, which is sorted
+    by level when the index is created.
+
+    Parameters
+    ----------
+    wn: wntr.network.WaterNetworkModel
+    """
+    def __init__(self, wn):
+        self.tanks = [wn.get_node(name) for name in wn.tank_name_list]
+        self.elevation = np.fromiter((tank.elevation for tank in self.tanks), dtype=float, count=len(self.tanks))
+
+        cylinders = [i for i, tank in enumerate(self.tanks) if tank.vol_curve is None]
+        self.cylinders = np.array(cylinders, dtype=int)
+        self.cylinder_area = np.array([math.pi * self.tanks[i].diameter ** 2 for i in cylinders], dtype=float)
+
+        curve_tanks = OrderedDict()
+        for i, tank in enumerate(self.tanks):
+            if tank.vol_curve is not None:
+                curve_tanks.setdefault(tank.vol_curve_name, list()).append(i)
+        self.vol_curves = list()  # list of (tank indices, levels, volumes)
+        for curve_name, ndx in curve_tanks.items():
+            points = np.array(self.tanks[ndx[0]].vol_curve.points, dtype=float)
+            points = points[np.argsort(points[:, 0], kind='stable')]
+            self.vol_curves.append((np.array(ndx, dtype=int), points[:, 0].copy(), points[:, 1].copy()))
+
+
+def update_tank_heads(wn, ndx=None):
     """
     Parameters
     ----------
     wn: wntr.network.WaterNetworkModel
+    ndx: _TankHeadIndex
+        The per-tank arrays of wn; these are created if ndx is None
+    """
+    if ndx is None:
+        ndx = _TankHeadIndex(wn)
+    tanks = ndx.tanks
+    nt = len(tanks)
+    if nt == 0:
+        return
+
+    dt = wn.sim_time - wn._prev_sim_time
+    dV = np.fromiter((tank.demand for tank in tanks), dtype=float, count=nt) * dt
+    prev_head = np.fromiter((tank._prev_head for tank in tanks), dtype=float, count=nt)
+    new_head = np.empty(nt, dtype=float)
+
+    c = ndx.cylinders
+    new_head[c] = prev_head[c] + 4.0 * dV[c] / ndx.cylinder_area
+
+    if ndx.vol_curves:
+        head = np.fromiter((tank.head for tank in tanks), dtype=float, count=nt)
+        level = head - ndx.elevation
+        # I had to include this because the _prev_head is the reference
+        # point needed if the tank.head (and tank.level) have already
+        # been updated. This isn't a problem for cases with no volume curve.
+        cur_level = np.where(head == prev_head, level, prev_head - (head - level))
+        for c, level_x, volume_y in ndx.vol_curves:
+            V0 = np.interp(cur_level[c], level_x, volume_y)
+            V1 = V0 + dV[c]
+            level_new = np.interp(V1, volume_y, level_x)
+            new_head[c] = prev_head[c] + (level_new - cur_level[c])
+
+    for tank, h in zip(tanks, new_head.tolist()):
+        tank._head = h
+
+
+class _ResultsBuffer(object):
     """
-    dt = wn.sim_time - wn._prev_sim_time   
+    Preallocated (number of times, number of elements) arrays used to store the results of a simulation.
 
-    for tank_name, tank in wn.tanks():
-        q_net = tank.demand
-        dV = q_net * dt
-        
-        if tank.vol_curve is None:    
-            delta_h = 4.0 * dV / (math.pi * tank.diameter ** 2)
-        else:
-            vcurve = np.array(tank.vol_curve.points)
-            level_x = vcurve[:,0]
-            volume_y = vcurve[:,1]
-            
-            # I had to include this because the _prev_head is the reference
-            # point needed if the tank.head (and tank.level) have already
-            # been updated. This isn't a problem for cases with no volume curve.
-            if tank.head == tank._prev_head:
-                cur_level = tank.level
-            else:
-                cur_level = tank._prev_head - (tank.head - tank.level)
-                            
-            V0 = np.interp(cur_level,level_x,volume_y)
-            V1 = V0 + dV
-            level_new = np.interp(V1,volume_y,level_x)
-            delta_h = level_new - cur_level
-                
-        tank._head = tank._prev_head + delta_h
-            
+    The arrays grow (the number of rows is doubled) if more rows are needed than were preallocated.
 
+    Parameters
+    ----------
+    elements: list
+        The network elements (nodes or links) in the order of the columns
+    attributes: dict
+        Keys are the names of the result attributes and values are the dtypes of the arrays
+    num_times: int
+        The number of rows to preallocate
+    """
+    def __init__(self, elements, attributes, num_times):
+        self.elements = list(elements)
+        self.names = [element.name for element in self.elements]
+        self.num_times = 0
+        num_times = max(int(num_times), 1)
+        self.data = OrderedDict((attr, np.zeros((num_times, len(self.names)), dtype=dtype))
+                                for attr, dtype in attributes.items())
+
+    def __getitem__(self, attr):
+        """Returns the rows of the given attribute that have been filled"""
+        return self.data[attr][:self.num_times]
+
+    def keys(self):
+        return self.data.keys()
+
+    def next_row(self):
+        """
+        Adds a row to every attribute, growing the arrays if needed.
+
+        Returns
+        -------
+        row: int
+            The index of the new row
+        """
+        row = self.num_times
+        for attr, arr in self.data.items():
+            if row >= arr.shape[0]:
+                new_arr = np.zeros((2 * arr.shape[0], arr.shape[1]), dtype=arr.dtype)
+                new_arr[:row] = arr[:row]
+                self.data[attr] = new_arr
+        self.num_times += 1
+        return row
+
+    def close(self):
+        """Counterpart of wntr.sim.results._StreamingResultsBuffer.close; the results are only kept in memory"""
+        pass
 
-def initialize_results_dict(wn):
+    def to_dataframes(self, index):
+        """
+        Returns an OrderedDict of DataFrames (one per attribute) with the filled rows
+
+        Parameters
+        ----------
+        index: list
+            The index of the DataFrames (the report times)
+        """
+        res = OrderedDict()
+        for attr, arr in self.data.items():
+            if arr.shape[0] != self.num_times:
+                arr = arr[:self.num_times].copy()
+            res[attr] = pd.DataFrame(data=arr, index=index, columns=self.names)
+        return res
+
+
+def _get_num_report_times(wn):
+    report_timestep = wn.options.time.report_timestep
+    if type(report_timestep) is str:
+        report_timestep = wn.options.time.hydraulic_timestep
+    if report_timestep is None or report_timestep <= 0:
+        return 1
+    return int(wn.options.time.duration // report_timestep) + 1
+
+
+def initialize_results_dict(wn, results_sink=None):
     """
     Parameters
     ----------
     wn: wntr.network.WaterNetworkModel
+    results_sink: wntr.sim.results.NpyResultsSink, optional
+        If provided, the results are streamed to the sink rather than kept in memory
 
     Returns
     -------
-    res: dict
+    node_res: _ResultsBuffer
+    link_res: _ResultsBuffer
     """
-    node_res = OrderedDict()
-    link_res = OrderedDict()
-
-    node_res['head'] = OrderedDict((name, list()) for name, obj in wn.nodes())
-    node_res['demand'] = OrderedDict((name, list()) for name, obj in wn.nodes())
-    node_res['pressure'] = OrderedDict((name, list()) for name, obj in wn.nodes())
-    node_res['leak_demand'] = OrderedDict((name, list()) for name, obj in wn.nodes())
-
-    link_res['flowrate'] = OrderedDict((name, list()) for name, obj in wn.links())
-    link_res['velocity'] = OrderedDict((name, list()) for name, obj in wn.links())
-    link_res['status'] = OrderedDict((name, list()) for name, obj in wn.links())
-    link_res['setting'] = OrderedDict((name, list()) for name, obj in wn.links())
+    num_times = _get_num_report_times(wn)
+    nodes = [node for name, node in wn.junctions()] + [node for name, node in wn.tanks()] + \
+            [node for name, node in wn.reservoirs()]
+    links = [link for name, link in wn.pipes()] + [link for name, link in wn.head_pumps()] + \
+            [link for name, link in wn.power_pumps()] + [link for name, link in wn.valves()]
+    node_attributes = OrderedDict([('head', float), ('demand', float), ('pressure', float), ('leak_demand', float)])
+    link_attributes = OrderedDict([('flowrate', float), ('velocity', float), ('status', int), ('setting', float)])
+    if results_sink is None:
+        node_res = _ResultsBuffer(nodes, node_attributes, num_times)
+        link_res = _ResultsBuffer(links, link_attributes, num_times)
+    else:
+        node_res, link_res = results_sink.open(wn, nodes, node_attributes, links, link_attributes, num_times)
+    node_res.num_junctions = wn.num_junctions
+    node_res.num_tanks = wn.num_tanks
+    link_res.num_pipes = wn.num_pipes
+    link_res.num_pumps = wn.num_pumps
+    link_res.head_pumps = [link for name, link in wn.head_pumps()]
 
     return node_res, link_res
 
@@ -225,42 +346,50 @@ def save_results(wn, node_res, link_res):
     Parameters
     ----------
     wn: wntr.network.WaterNetworkModel
-    node_res: OrderedDict
-    link_res: OrderedDict
+    node_res: _ResultsBuffer
+    link_res: _ResultsBuffer
     """
-    for name, node in wn.junctions():
-        node_res['head'][name].append(node.head)
-        node_res['demand'][name].append(node.demand)
-        if node._is_isolated:
-            node_res['pressure'][name].append(0.0)
-        else:
-            node_res['pressure'][name].append(node.head - node.elevation)
-        node_res['leak_demand'][name].append(node.leak_demand)
-
-    for name, node in wn.tanks():
-        node_res['head'][name].append(node.head)
-        node_res['demand'][name].append(node.demand)
-        node_res['pressure'][name].append(node.head - node.elevation)
-        node_res['leak_demand'][name].append(node.leak_demand)
-
-    for name, node in wn.reservoirs():
-        node_res['head'][name].append(node.head)
-        node_res['demand'][name].append(node.demand)
-        node_res['pressure'][name].append(0.0)
-        node_res['leak_demand'][name].append(0.0)
-
-    for name, link in wn.pipes():
-        link_res['flowrate'][name].append(link.flow)
-        link_res['velocity'][name].append(abs(link.flow)*4.0 / (math.pi*link.diameter**2))
-        link_res['status'][name].append(link.status)
-        link_res['setting'][name].append(link.roughness)
-
-    for name, link in wn.head_pumps():
-        link_res['flowrate'][name].append(link.flow)
-        link_res['velocity'][name].append(0)
-        link_res['status'][name].append(link.status)
-        link_res['setting'][name].append(1)
-        
+    nodes = node_res.elements
+    n_nodes = len(nodes)
+    n_junctions = node_res.num_junctions
+    n_tanks = node_res.num_tanks
+    row = node_res.next_row()
+
+    head = np.fromiter((node.head for node in nodes), dtype=float, count=n_nodes)
+    node_res.data['head'][row] = head
+    node_res.data['demand'][row] = np.fromiter((node.demand for node in nodes), dtype=float, count=n_nodes)
+    pressure = node_res.data['pressure'][row]
+    n_sources = n_junctions + n_tanks
+    pressure[:n_sources] = head[:n_sources] - np.fromiter((node.elevation for node in nodes[:n_sources]),
+                                                          dtype=float, count=n_sources)
+    pressure[:n_junctions][np.fromiter((node._is_isolated for node in nodes[:n_junctions]), dtype=bool,
+                                       count=n_junctions)] = 0.0
+    pressure[n_sources:] = 0.0
+    leak_demand = node_res.data['leak_demand'][row]
+    leak_demand[:n_sources] = np.fromiter((node.leak_demand for node in nodes[:n_sources]), dtype=float,
+                                          count=n_sources)
+    leak_demand[n_sources:] = 0.0
+
+    links = link_res.elements
+    n_links = len(links)
+    n_pipes = link_res.num_pipes
+    n_pumps = link_res.num_pumps
+    row = link_res.next_row()
+
+    flow = np.fromiter((link.flow for link in links), dtype=float, count=n_links)
+    link_res.data['flowrate'][row] = flow
+    velocity = link_res.data['velocity'][row]
+    velocity[:] = 0.0
+    for sl in (slice(0, n_pipes), slice(n_pipes + n_pumps, n_links)):
+        diameter = np.fromiter((link.diameter for link in links[sl]), dtype=float)
+        velocity[sl] = np.abs(flow[sl]) * 4.0 / (math.pi * diameter ** 2)
+    link_res.data['status'][row] = np.fromiter((link.status for link in links), dtype=int, count=n_links)
+    setting = link_res.data['setting'][row]
+    setting[:n_pipes] = np.fromiter((link.roughness for link in links[:n_pipes]), dtype=float, count=n_pipes)
+    setting[n_pipes:n_pipes + n_pumps] = 1  # power pumps have no speed
+    setting[n_pipes + n_pumps:] = np.fromiter((link.setting for link in links[n_pipes + n_pumps:]), dtype=float)
+
+    for link in link_res.head_pumps:
         A, B, C = link.get_head_curve_coefficients()
         if link.flow > (A/B)**(1.0/C):
             start_node_name = link.start_node_name
@@ -269,22 +398,10 @@ def save_results(wn, node_res, link_res):
             end_node = wn.get_node(end_node_name)
             start_head = start_node.head
             end_head = end_node.head
-            warnings.warn('Pump ' + name + ' has exceeded its maximum flow.')
+            warnings.warn('Pump ' + link.name + ' has exceeded its maximum flow.')
             logger.warning(
                 'Pump {0} has exceeded its maximum flow. Pump head: {1}; Pump flow: {2}; Max pump flow: {3}'.format(
-                    name, end_head - start_head, link.flow, (A/B)**(1.0/C)))
-
-    for name, link in wn.power_pumps():
-        link_res['flowrate'][name].append(link.flow)
-        link_res['velocity'][name].append(0)
-        link_res['status'][name].append(link.status)
-        link_res['setting'][name].append(1) # power pumps have no speed
-
-    for name, link in wn.valves():
-        link_res['flowrate'][name].append(link.flow)
-        link_res['velocity'][name].append(abs(link.flow)*4.0 / (math.pi*link.diameter**2))
-        link_res['status'][name].append(link.status)
-        link_res['setting'][name].append(link.setting)
+                    link.name, end_head - start_head, link.flow, (A/B)**(1.0/C)))
 
 
 def get_results(wn, results, node_res, link_res):
@@ -293,25 +410,12 @@ def get_results(wn, results, node_res, link_res):
     ----------
     wn: wntr.network.WaterNetworkModel
     results: wntr.sim.results.SimulationResults
-    node_res: OrderedDict
-    link_res: OrderedDict
+    node_res: _ResultsBuffer
+    link_res: _ResultsBuffer
     """
-    ntimes = len(results.time)
-    nnodes = wn.num_nodes
-    nlinks = wn.num_links
-    node_names = wn.junction_name_list + wn.tank_name_list + wn.reservoir_name_list
-    link_names = wn.pipe_name_list + wn.head_pump_name_list + wn.power_pump_name_list + wn.valve_name_list
-
-    for key, value in node_res.items():
-        node_res[key] = pd.DataFrame(data=np.array([node_res[key][name] for name in node_names]).transpose(), index=results.time,
-                                     columns=node_names)
-    results.node = node_res
-
-    for key, value in link_res.items():
-        link_res[key] = pd.DataFrame(data=np.array([link_res[key][name] for name in link_names]).transpose(), index=results.time,
-                                            columns=link_names)
-    results.link = link_res
-    
+    results.node = node_res.to_dataframes(results.time)
+    results.link = link_res.to_dataframes(results.time)
+
     # Add headloss to results.link -- removed for now, this is slow
     #headloss = pd.DataFrame(data=None, index=results.time, columns=link_names)
     # for name, link in wn.links():
@@ -336,54 +440,167 @@ def get_results(wn, results, node_res, link_res):
         
     #results.link['headloss'] = headloss
 
-def store_results_in_network(wn, m):
+class _ModelValues(object):
     """
+    Gathers the values of the entries of a VarDict, ParamDict, or ArrayDict of a model as a NumPy array.
+
+    Variables are gathered from the vector of variable values (get_x) with an index array that is
+    rebuilt whenever the structure of the model changes; parameters (and variables that are not part
+    of the model) are gathered from a cached list of objects.
 
     Parameters
     ----------
-    wn: wntr.network.WaterNetworkModel
-    m: wntr.aml.Model
+    d: VarDict, ParamDict, or wntr.sim.models.vectorized.ArrayDict
+    names: list of str
+    """
+    def __init__(self, d, names):
+        self._count = len(names)
+        if isinstance(d, ArrayDict):
+            self._array = d.array
+            self._ndx = np.array([d.index(name) for name in names], dtype=int)
+            self._objs = None
+        else:
+            self._array = None
+            self._objs = [d[name] for name in names]
+            self._is_var = self._count > 0 and all(isinstance(obj, aml.Var) for obj in self._objs)
+            self._ndx = None
+            self._structure_version = None
+
+    def get(self, m, x):
+        """
+        Parameters
+        ----------
+        m: wntr.aml.Model or wntr.sim.models.vectorized.VectorizedHydraulicModel
+        x: np.ndarray
+            The current values of the variables of m (i.e., m.get_x())
+
+        Returns
+        -------
+        values: np.ndarray
+        """
+        if self._array is not None:
+            return self._array[self._ndx]
+        if self._is_var:
+            if self._structure_version != m.structure_version:
+                # variables that are not used by any constraint are not part of x (their index is None)
+                ndx = [obj.index for obj in self._objs]
+                self._unused = [i for i, j in enumerate(ndx) if j is None]
+                self._ndx = np.array([-1 if j is None else j for j in ndx], dtype=int)
+                self._structure_version = m.structure_version
+            values = x[self._ndx]
+            for i in self._unused:
+                values[i] = self._objs[i].value
+            return values
+        return np.fromiter((obj.value for obj in self._objs), dtype=float, count=self._count)
+
+
+class _NetworkResultsIndex(object):
+    """
+    Index arrays and incidence matrices used by store_results_in_network to move the solution of a
+    hydraulic model into the water network model with a few NumPy operations.
 
+    Parameters
+    ----------
+    wn: wntr.network.WaterNetworkModel
+    m: wntr.aml.Model or wntr.sim.models.vectorized.VectorizedHydraulicModel
     """
-    mode = wn.options.hydraulic.demand_model
-    for name, link in wn.links():
-        if link._is_isolated:
-            link._flow = 0
+    def __init__(self, wn, m):
+        self.mode = wn.options.hydraulic.demand_model
+        link_names = wn.link_name_list
+        junction_names = wn.junction_name_list
+        source_names = wn.tank_name_list + wn.reservoir_name_list
+        valve_names = wn.valve_name_list
+        self.links = [wn.get_link(name) for name in link_names]
+        self.junctions = [wn.get_node(name) for name in junction_names]
+        self.tanks = [wn.get_node(name) for name in wn.tank_name_list]
+        self.reservoirs = [wn.get_node(name) for name in wn.reservoir_name_list]
+        self.valves = [wn.get_link(name) for name in valve_names]
+        self.elevation = np.fromiter((node.elevation for node in self.junctions), dtype=float,
+                                     count=len(self.junctions))
+
+        self.flow = _ModelValues(m.flow, link_names)
+        self.head = _ModelValues(m.head, junction_names)
+        if self.mode in ['PDD', 'PDA']:
+            self.demand = _ModelValues(m.demand, junction_names)
         else:
-            link._flow = m.flow[name].value
+            self.demand = _ModelValues(m.expected_demand, junction_names)
+        self.leak_rate = _ModelValues(m.leak_rate, junction_names)
+        self.valve_setting = _ModelValues(m.valve_setting, valve_names)
+
+        # incidence matrix of the tanks and reservoirs: +1 for links that end at (flow into) the node and -1
+        # for links that start at (flow out of) the node
+        source_ndx = {name: i for i, name in enumerate(source_names)}
+        rows = list()
+        cols = list()
+        vals = list()
+        for j, link in enumerate(self.links):
+            if link.end_node_name in source_ndx:
+                rows.append(source_ndx[link.end_node_name])
+                cols.append(j)
+                vals.append(1.0)
+            if link.start_node_name in source_ndx:
+                rows.append(source_ndx[link.start_node_name])
+                cols.append(j)
+                vals.append(-1.0)
+        self.source_incidence = sparse.csr_matrix((vals, (rows, cols)), shape=(len(source_names), len(link_names)))
+
+    def is_valid(self, wn, m):
+        return self.mode == wn.options.hydraulic.demand_model and len(self.links) == wn.num_links and \
+            len(self.junctions) == wn.num_junctions and len(self.tanks) + len(self.reservoirs) == \
+            wn.num_tanks + wn.num_reservoirs
 
-    for name, link in wn.valves():
-        link._setting = m.valve_setting[name].value
 
-    for name, node in wn.junctions():
-        if node._is_isolated:
-            node._head = 0
-            node._demand = 0
-            node._pressure = 0
-            node._leak_demand = 0
-        else:
-            node._head = m.head[name].value
-            node._pressure = m.head[name].value - node.elevation
-            if mode in ['PDD', 'PDA']:
-                node._demand = m.demand[name].value
-            else:
-                node._demand = m.expected_demand[name].value
-            if node.leak_status:
-                node._leak_demand = m.leak_rate[name].value
-            else:
-                node._leak_demand = 0
-
-    for name, node in wn.tanks():
+def store_results_in_network(wn, m):
+    """
+
+    Parameters
+    ----------
+    wn: wntr.network.WaterNetworkModel
+    m: wntr.aml.Model
+
+    """
+    ndx = getattr(m, '_results_index', None)
+    if ndx is None or not ndx.is_valid(wn, m):
+        ndx = _NetworkResultsIndex(wn, m)
+        m._results_index = ndx
+    x = None if isinstance(m, VectorizedHydraulicModel) else m.get_x()
+
+    links = ndx.links
+    flow = ndx.flow.get(m, x)
+    flow[np.fromiter((link._is_isolated for link in links), dtype=bool, count=len(links))] = 0
+    for link, q in zip(links, flow.tolist()):
+        link._flow = q
+
+    for link, setting in zip(ndx.valves, ndx.valve_setting.get(m, x).tolist()):
+        link._setting = setting
+
+    junctions = ndx.junctions
+    nj = len(junctions)
+    isolated = np.fromiter((node._is_isolated for node in junctions), dtype=bool, count=nj)
+    leak_status = np.fromiter((node.leak_status for node in junctions), dtype=bool, count=nj)
+    head = ndx.head.get(m, x)
+    pressure = head - ndx.elevation
+    demand = ndx.demand.get(m, x)
+    leak_demand = ndx.leak_rate.get(m, x)
+    leak_demand[~leak_status] = 0
+    for arr in (head, pressure, demand, leak_demand):
+        arr[isolated] = 0
+    for node, h, p, d, l in zip(junctions, head.tolist(), pressure.tolist(), demand.tolist(), leak_demand.tolist()):
+        node._head = h
+        node._pressure = p
+        node._demand = d
+        node._leak_demand = l
+
+    source_demand = ndx.source_incidence.dot(flow)
+    for i, node in enumerate(ndx.tanks):
         if node.leak_status:
-            node._leak_demand = m.leak_rate[name].value
+            node._leak_demand = m.leak_rate[node.name].value
         else:
             node._leak_demand = 0
-        node._demand = (sum(wn.get_link(link_name).flow for link_name in wn.get_links_for_node(name, 'INLET')) -
-                       sum(wn.get_link(link_name).flow for link_name in wn.get_links_for_node(name, 'OUTLET')) -
-                       node._leak_demand)
+        node._demand = source_demand[i] - node._leak_demand
 
-    for name, node in wn.reservoirs():
+    nt = len(ndx.tanks)
+    for i, node in enumerate(ndx.reservoirs):
         node._head = node.head_timeseries.at(wn.sim_time)
         node._leak_demand = 0
-        node._demand = (sum(wn.get_link(link_name).flow for link_name in wn.get_links_for_node(name, 'INLET')) -
-                       sum(wn.get_link(link_name).flow for link_name in wn.get_links_for_node(name, 'OUTLET')))
+        node._demand = source_demand[nt + i]
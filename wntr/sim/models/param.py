@@ -34,7 +34,7 @@ def source_head_param(m, wn):
 
 def expected_demand_param(m, wn):
     """
-    Add a demand parameter to the model
+    Add a demand parameter to the model. The sum of the expected demands is stored in m.total_expected_demand.
 
     Parameters
     ----------
@@ -42,14 +42,20 @@ def expected_demand_param(m, wn):
     wn: wntr.network.model.WaterNetworkModel
     """
     demand_multiplier = wn.options.hydraulic.demand_multiplier
+    total_demand = 0.0
     if not hasattr(m, 'expected_demand'):
         m.expected_demand = aml.ParamDict()
 
         for node_name, node in wn.junctions():
-            m.expected_demand[node_name] = aml.Param(node.demand_timeseries_list.at(wn.sim_time, multiplier=demand_multiplier))
+            demand = node.demand_timeseries_list.at(wn.sim_time, multiplier=demand_multiplier)
+            m.expected_demand[node_name] = aml.Param(demand)
+            total_demand += demand
     else:
         for node_name, node in wn.junctions():
-            m.expected_demand[node_name].value = node.demand_timeseries_list.at(wn.sim_time, multiplier=demand_multiplier)
+            demand = node.demand_timeseries_list.at(wn.sim_time, multiplier=demand_multiplier)
+            m.expected_demand[node_name].value = demand
+            total_demand += demand
+    m.total_expected_demand = total_demand
 
 
 class pmin_param(Definition):
@@ -0,0 +1,770 @@
+"""
+A vectorized hydraulic model that can be used in place of the AML model built by
+wntr.sim.hydraulics.create_hydraulic_model.
+
+Rather than building one aml.Constraint per pipe, pump, valve, and junction, the
+headloss, mass balance, pressure dependent demand, and leak equations are evaluated
+with NumPy array operations over all elements at once, and the jacobian is assembled
+directly in CSR format. The model has the same interface as wntr.sim.aml.Model as far
+as the solvers are concerned (get_x, load_var_values_from_x, evaluate_residuals,
+evaluate_jacobian, set_structure), and it exposes flow, head, demand, leak_rate,
+valve_setting, source_head, and expected_demand dictionaries so that the rest of the
+simulator (e.g., wntr.sim.hydraulics.store_results_in_network) can use it unchanged.
+
+The set of variables and constraints (and the sparsity pattern of the jacobian) never
+changes. Closed or isolated links get the constraint flow = 0, isolated junctions get
+the constraint head = elevation, and junctions without an active leak get the
+constraint leak_rate = 0.
+"""
+import logging
+import math
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import numpy as np
+import scipy.sparse
+
+from wntr.network import LinkStatus, Link
+from wntr.network.elements import Junction, Tank, Pipe, HeadPump, PowerPump, PRValve, PSValve, FCValve, TCValve
+from wntr.sim.models import constants, param
+from wntr.sim.models.constraint import get_pump_poly_coefficients, get_pump_line_params
+from wntr.utils.polynomial_interpolation import cubic_spline
+
+logger = logging.getLogger(__name__)
+
+_PIPE = 0
+_HEAD_PUMP = 1
+_POWER_PUMP = 2
+_PRV = 3
+_PSV = 4
+_FCV = 5
+_TCV = 6
+
+_ZERO_FLOW = 0
+_OPEN = 1
+_ACTIVE = 2
+
+_HW_EPS = 1e-5
+
+
+class _ArrayValue(object):
+    """
+    A view of a single entry in a NumPy array with the same value interface as aml.Var and aml.Param.
+    """
+    __slots__ = ('_array', '_ndx')
+
+    def __init__(self, array, ndx):
+        self._array = array
+        self._ndx = ndx
+
+    @property
+    def value(self):
+        return float(self._array[self._ndx])
+
+    @value.setter
+    def value(self, val):
+        self._array[self._ndx] = val
+
+
+class ArrayDict(Mapping):
+    """
+    A read-only mapping from element names to views of the entries of a NumPy array.
+
+    Parameters
+    ----------
+    names: list of str
+    array: np.ndarray
+        A 1-D array with one entry per name. The array is not copied; it may be a view of a larger array.
+    """
+    def __init__(self, names, array):
+        self._array = array
+        self._name_to_ndx = OrderedDict((name, ndx) for ndx, name in enumerate(names))
+
+    @property
+    def array(self):
+        return self._array
+
+    def index(self, name):
+        return self._name_to_ndx[name]
+
+    def __getitem__(self, name):
+        return _ArrayValue(self._array, self._name_to_ndx[name])
+
+    def __iter__(self):
+        return iter(self._name_to_ndx)
+
+    def __len__(self):
+        return len(self._name_to_ndx)
+
+
+class VectorizedModelUpdater(object):
+    """
+    Counterpart of wntr.sim.models.utils.ModelUpdater for the VectorizedHydraulicModel. Any change to
+    an element simply refreshes all of the data the model keeps for that element.
+    """
+    def update(self, m, wn, obj, attr):
+        m.update_element(wn, obj)
+
+
+class VectorizedHydraulicModel(object):
+    """
+    A hydraulic model evaluated with NumPy array kernels.
+
+    Use create_vectorized_hydraulic_model to build this model.
+
+    Parameters
+    ----------
+    wn: wntr.network.WaterNetworkModel
+    HW_approx: str
+        Specifies which Hazen-Williams headloss approximation to use. Options are 'default' and 'piecewise'.
+    """
+    def __init__(self, wn, HW_approx='default'):
+        if HW_approx not in {'default', 'piecewise'}:
+            raise ValueError('Unexpected value for HW_approx: ' + str(HW_approx))
+        self._HW_approx = HW_approx
+        self._mode = wn.options.hydraulic.demand_model
+        if self._mode in ['DD', 'DDA']:
+            self._pdd = False
+        elif self._mode in ['PDD', 'PDA']:
+            self._pdd = True
+        else:
+            raise ValueError('mode not recognized: ' + str(self._mode))
+
+        constants.hazen_williams_constants(self)
+        constants.head_pump_constants(self)
+        constants.leak_constants(self)
+        constants.pdd_constants(self)
+
+        self._link_names = wn.link_name_list
+        self._junction_names = wn.junction_name_list
+        self._source_names = wn.tank_name_list + wn.reservoir_name_list
+        self._link_ndx = OrderedDict((name, i) for i, name in enumerate(self._link_names))
+        self._junction_ndx = OrderedDict((name, i) for i, name in enumerate(self._junction_names))
+        self._source_ndx = OrderedDict((name, i) for i, name in enumerate(self._source_names))
+        nl = self._nl = len(self._link_names)
+        nj = self._nj = len(self._junction_names)
+        ns = len(self._source_names)
+
+        # variable layout: flows, heads, (demands), leak rates
+        self._flow_start = 0
+        self._head_start = nl
+        if self._pdd:
+            self._demand_start = nl + nj
+            self._leak_start = nl + 2 * nj
+        else:
+            self._demand_start = None
+            self._leak_start = nl + nj
+        self._n = self._leak_start + nj
+        self._head_var_indices = np.arange(self._head_start, self._head_start + nj)
+
+        self._x = np.zeros(self._n)
+        self._x[:nl] = 0.001
+
+        self.flow = ArrayDict(self._link_names, self._x[:nl])
+        self.head = ArrayDict(self._junction_names, self._x[nl:nl + nj])
+        if self._pdd:
+            self.demand = ArrayDict(self._junction_names, self._x[self._demand_start:self._demand_start + nj])
+        self.leak_rate = ArrayDict(self._junction_names, self._x[self._leak_start:self._leak_start + nj])
+
+        self._source_head = np.zeros(ns)
+        self._expected_demand = np.zeros(nj)
+        self.source_head = ArrayDict(self._source_names, self._source_head)
+        self.expected_demand = ArrayDict(self._junction_names, self._expected_demand)
+
+        # link data
+        self._link_type = np.zeros(nl, dtype=int)
+        self._link_groups = None
+        self._link_status = np.zeros(nl, dtype=int)
+        self._start_junction = -np.ones(nl, dtype=int)
+        self._end_junction = -np.ones(nl, dtype=int)
+        self._start_source = -np.ones(nl, dtype=int)
+        self._end_source = -np.ones(nl, dtype=int)
+        self._hw_resistance = np.zeros(nl)
+        self._minor_loss = np.zeros(nl)
+        self._tcv_resistance = np.zeros(nl)
+        self._pump_power = np.zeros(nl)
+        self._valve_setting = np.zeros(nl)
+        self._start_elevation = np.zeros(nl)
+        self._end_elevation = np.zeros(nl)
+        self._pump_line = np.zeros(nl, dtype=bool)
+        self._pump_coeffs = np.zeros((nl, 3))
+        self._pump_poly = np.zeros((nl, 4))
+        self._pump_q_bar = np.zeros(nl)
+        self._pump_h_bar = np.zeros(nl)
+        self.valve_setting = ArrayDict(self._link_names, self._valve_setting)
+
+        # junction data
+        self._elevation = np.zeros(nj)
+        self._isolated = np.zeros(nj, dtype=bool)
+        self._leak_active = np.zeros(nj, dtype=bool)
+        self._leak_poly = np.zeros((nj, 4))
+        self._leak_coeff = np.zeros(nj)
+        self._leak_area = np.zeros(nj)
+        self._pmin = np.zeros(nj)
+        self._pnom = np.ones(nj)
+        self._pressure_exponent = np.ones(nj)
+        self._pdd_poly1 = np.zeros((nj, 4))
+        self._pdd_poly2 = np.zeros((nj, 4))
+
+        for name, link in wn.links():
+            self._update_link(wn, link)
+        for name, node in wn.junctions():
+            self._update_junction(wn, node)
+            self.head[name].value = node.elevation
+        for name, node in wn.tanks():
+            self._check_tank(node)
+
+        self._build_structure(wn)
+
+    # ------------------------------------------------------------------
+    # element data
+    # ------------------------------------------------------------------
+    def _update_link(self, wn, link):
+        i = self._link_ndx[link.name]
+        self._link_groups = None
+        start_node = wn.get_node(link.start_node_name)
+        end_node = wn.get_node(link.end_node_name)
+        if isinstance(start_node, Junction):
+            self._start_junction[i] = self._junction_ndx[start_node.name]
+            self._start_elevation[i] = start_node.elevation
+        else:
+            self._start_source[i] = self._source_ndx[start_node.name]
+        if isinstance(end_node, Junction):
+            self._end_junction[i] = self._junction_ndx[end_node.name]
+            self._end_elevation[i] = end_node.elevation
+        else:
+            self._end_source[i] = self._source_ndx[end_node.name]
+
+        if isinstance(link, Pipe):
+            self._link_type[i] = _PIPE
+            self._hw_resistance[i] = self.hw_k * link.roughness**(-1.852) * link.diameter**(-4.871) * link.length
+        elif isinstance(link, HeadPump):
+            self._link_type[i] = _HEAD_PUMP
+        elif isinstance(link, PowerPump):
+            self._link_type[i] = _POWER_PUMP
+            self._pump_power[i] = link.power
+        elif isinstance(link, PRValve):
+            self._link_type[i] = _PRV
+        elif isinstance(link, PSValve):
+            self._link_type[i] = _PSV
+        elif isinstance(link, FCValve):
+            self._link_type[i] = _FCV
+        elif isinstance(link, TCValve):
+            self._link_type[i] = _TCV
+            self._tcv_resistance[i] = 8.0 * link.setting / (9.81 * math.pi**2 * link.diameter**4)
+        else:
+            raise NotImplementedError('{0} links are not currently supported by the vectorized model'.format(
+                type(link).__name__))
+
+        if self._link_type[i] in {_PIPE, _PRV, _PSV, _FCV, _TCV}:
+            self._minor_loss[i] = 8.0 * link.minor_loss / (9.81 * math.pi**2 * link.diameter**4)
+        if self._link_type[i] in {_PRV, _PSV, _FCV, _TCV}:
+            self._valve_setting[i] = link.setting
+
+        status = link.status
+        if status == LinkStatus.Closed or link._is_isolated:
+            self._link_status[i] = _ZERO_FLOW
+        elif status == LinkStatus.Active and self._link_type[i] in {_PRV, _PSV, _FCV, _TCV}:
+            self._link_status[i] = _ACTIVE
+        else:
+            self._link_status[i] = _OPEN
+
+        if self._link_type[i] == _HEAD_PUMP and self._link_status[i] != _ZERO_FLOW:
+            A, B, C = link.get_head_curve_coefficients()
+            self._pump_coeffs[i] = (A, B, C)
+            if C <= 1:
+                self._pump_line[i] = False
+                self._pump_poly[i] = get_pump_poly_coefficients(A, B, C, self)
+            else:
+                self._pump_line[i] = True
+                self._pump_q_bar[i], self._pump_h_bar[i] = get_pump_line_params(A, B, C, self)
+
+    def _update_junction(self, wn, node):
+        j = self._junction_ndx[node.name]
+        opts = wn.options.hydraulic
+        self._elevation[j] = node.elevation
+        self._isolated[j] = node._is_isolated
+        self._leak_active[j] = node.leak_status
+
+        self._leak_coeff[j] = node.leak_discharge_coeff
+        self._leak_area[j] = node.leak_area
+        x2 = self.leak_delta
+        f2 = node.leak_discharge_coeff * node.leak_area * (2.0 * 9.81 * x2)**0.5
+        df2 = 0.5 * node.leak_discharge_coeff * node.leak_area * (2.0 * 9.81)**0.5 * x2**(-0.5)
+        self._leak_poly[j] = cubic_spline(0.0, x2, 0.0, f2, self.leak_slope, df2)
+
+        if self._pdd:
+            pmin = opts.minimum_pressure if node.minimum_pressure is None else node.minimum_pressure
+            pnom = opts.required_pressure if node.required_pressure is None else node.required_pressure
+            if pnom <= self.pdd_smoothing_delta:
+                raise ValueError('Required pressure for node %s must be greater than %s, the smoothing delta',
+                                 node.name, self.pdd_smoothing_delta)
+            self._pmin[j] = pmin
+            self._pnom[j] = pnom
+            if node.pressure_exponent is None:
+                self._pressure_exponent[j] = opts.pressure_exponent
+            else:
+                self._pressure_exponent[j] = node.pressure_exponent
+            delta = self.pdd_smoothing_delta
+            x1 = pmin
+            x2 = pmin + delta
+            f2 = ((x2 - pmin) / (pnom - pmin))**0.5
+            df2 = 0.5 * ((x2 - pmin) / (pnom - pmin))**(-0.5) * 1.0 / (pnom - pmin)
+            self._pdd_poly1[j] = cubic_spline(x1, x2, 0.0, f2, self.pdd_slope, df2)
+            x1 = pnom - delta
+            f1 = ((x1 - pmin) / (pnom - pmin))**0.5
+            df1 = 0.5 * ((x1 - pmin) / (pnom - pmin))**(-0.5) * 1.0 / (pnom - pmin)
+            self._pdd_poly2[j] = cubic_spline(x1, pnom, f1, 1.0, df1, self.pdd_slope)
+
+    def _check_tank(self, node):
+        if node.leak_status:
+            raise NotImplementedError('Tank leaks are not currently supported by the vectorized model')
+
+    def update_element(self, wn, obj):
+        """
+        Refresh the data stored for a single link or node after one of its attributes changed.
+
+        Parameters
+        ----------
+        wn: wntr.network.WaterNetworkModel
+        obj: wntr.network.elements.Link or wntr.network.elements.Node
+        """
+        if isinstance(obj, Link):
+            self._update_link(wn, obj)
+        elif isinstance(obj, Junction):
+            self._update_junction(wn, obj)
+        elif isinstance(obj, Tank):
+            self._check_tank(obj)
+
+    # ------------------------------------------------------------------
+    # structure
+    # ------------------------------------------------------------------
+    def _build_structure(self, wn):
+        nl = self._nl
+        nj = self._nj
+        links = np.arange(nl)
+        juncs = np.arange(nj)
+        head_col = self._head_start + juncs
+        leak_col = self._leak_start + juncs
+        mb_row = nl + juncs
+
+        s_mask = self._start_junction >= 0
+        e_mask = self._end_junction >= 0
+        self._s_links = links[s_mask]
+        self._e_links = links[e_mask]
+        self._s_junc = self._start_junction[s_mask]
+        self._e_junc = self._end_junction[e_mask]
+        self._s_src_links = links[~s_mask]
+        self._e_src_links = links[~e_mask]
+        self._s_src = self._start_source[~s_mask]
+        self._e_src = self._end_source[~e_mask]
+
+        rows = [links, self._s_links, self._e_links,
+                nl + self._s_junc, nl + self._e_junc, mb_row, mb_row]
+        cols = [links, self._head_start + self._s_junc, self._head_start + self._e_junc,
+                self._s_links, self._e_links, head_col, leak_col]
+        if self._pdd:
+            demand_col = self._demand_start + juncs
+            pdd_row = nl + nj + juncs
+            rows.extend([mb_row, pdd_row, pdd_row])
+            cols.extend([demand_col, head_col, demand_col])
+            leak_row = nl + 2 * nj + juncs
+        else:
+            leak_row = nl + nj + juncs
+        rows.extend([leak_row, leak_row])
+        cols.extend([head_col, leak_col])
+
+        rows = np.concatenate(rows)
+        cols = np.concatenate(cols)
+        linear = rows * self._n + cols
+        unique, inverse = np.unique(linear, return_inverse=True)
+        self._slot_to_nz = inverse
+        self._jac_nnz = len(unique)
+        self._jac_indices = (unique % self._n).astype(np.int32)
+        self._jac_indptr = np.zeros(self._n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(unique // self._n, minlength=self._n), out=self._jac_indptr[1:])
+
+    def set_structure(self):
+        """
+        The structure of the vectorized model never changes, so this method does nothing. It exists so that
+        the model has the same interface as wntr.sim.aml.Model.
+        """
+        pass
+
+    @property
+    def structure_version(self):
+        return 0
+
+    @property
+    def head_var_indices(self):
+        """
+        The indices of the junction heads in x. The equations are ordered like the variables (the headloss
+        equation of each link has the index of the link flow, the mass balance of each junction has the index
+        of the junction head, and so on), which is what wntr.sim.solvers.GGASolver relies on.
+        """
+        return self._head_var_indices
+
+    def get_x(self):
+        return self._x.copy()
+
+    def load_var_values_from_x(self, x):
+        self._x[:] = x
+
+    # ------------------------------------------------------------------
+    # evaluation
+    # ------------------------------------------------------------------
+    def _endpoint_heads(self, h):
+        hs = np.empty(self._nl)
+        he = np.empty(self._nl)
+        hs[self._s_links] = h[self._s_junc]
+        he[self._e_links] = h[self._e_junc]
+        hs[self._s_src_links] = self._source_head[self._s_src]
+        he[self._e_src_links] = self._source_head[self._e_src]
+        return hs, he
+
+    def _get_link_groups(self):
+        """
+        Returns the indices of the links in each group of constraints with the same form. The groups
+        only change when the status of a link changes, so they are cached until a link is updated.
+        """
+        if self._link_groups is None:
+            ltype = self._link_type
+            is_open = self._link_status == _OPEN
+            is_active = self._link_status == _ACTIVE
+            is_prv = ltype == _PRV
+            is_psv = ltype == _PSV
+            is_fcv = ltype == _FCV
+            is_tcv = ltype == _TCV
+            self._link_groups = {
+                'pipe': np.nonzero((ltype == _PIPE) & is_open)[0],
+                'head_pump': np.nonzero((ltype == _HEAD_PUMP) & is_open)[0],
+                'power_pump': np.nonzero((ltype == _POWER_PUMP) & is_open)[0],
+                'active_prv': np.nonzero(is_prv & is_active)[0],
+                'active_psv': np.nonzero(is_psv & is_active)[0],
+                'open_prv_psv': np.nonzero((is_prv | is_psv) & is_open)[0],
+                'active_fcv': np.nonzero(is_fcv & is_active)[0],
+                'fcv_tcv': np.nonzero(((is_fcv | is_tcv) & is_open) | (is_tcv & is_active))[0],
+            }
+        return self._link_groups
+
+    def _evaluate_links(self, f, hs, he):
+        """
+        Returns the residuals of the link constraints and their derivatives with respect to
+        the flow, the start node head, and the end node head.
+        """
+        nl = self._nl
+        r = f.copy()
+        df = np.ones(nl)
+        dhs = np.zeros(nl)
+        dhe = np.zeros(nl)
+
+        groups = self._get_link_groups()
+        status = self._link_status
+
+        # pipes
+        ndx = groups['pipe']
+        if len(ndx) > 0:
+            _f = f[ndx]
+            k = self._hw_resistance[ndx]
+            mk = self._minor_loss[ndx]
+            af = np.abs(_f)
+            sg = np.where(_f >= 0, 1.0, -1.0)
+            if self._HW_approx == 'default':
+                r[ndx] = -sg * k * af**self.hw_exp - _HW_EPS * k**0.5 * _f - sg * mk * _f**2 + hs[ndx] - he[ndx]
+                df[ndx] = -self.hw_exp * k * af**(self.hw_exp - 1) - _HW_EPS * k**0.5 - 2 * mk * af
+            else:
+                _r = -sg * k * af**self.hw_exp
+                _df = -self.hw_exp * k * af**(self.hw_exp - 1)
+                low = af <= self.hw_q1
+                mid = (~low) & (af <= self.hw_q2)
+                _r[low] = -k[low] * self.hw_m * _f[low]
+                _df[low] = -k[low] * self.hw_m
+                fm = _f[mid]
+                sm = sg[mid]
+                _r[mid] = -k[mid] * (self.hw_a * fm**3 + sm * self.hw_b * fm**2 + self.hw_c * fm + sm * self.hw_d)
+                _df[mid] = -k[mid] * (3 * self.hw_a * fm**2 + 2 * sm * self.hw_b * fm + self.hw_c)
+                r[ndx] = _r - sg * mk * _f**2 + hs[ndx] - he[ndx]
+                df[ndx] = _df - 2 * mk * af
+            dhs[ndx] = 1.0
+            dhe[ndx] = -1.0
+
+        # head pumps
+        ndx = groups['head_pump']
+        if len(ndx) > 0:
+            _f = f[ndx]
+            A = self._pump_coeffs[ndx, 0]
+            B = self._pump_coeffs[ndx, 1]
+            C = self._pump_coeffs[ndx, 2]
+            line = self._pump_line[ndx]
+            q_bar = self._pump_q_bar[ndx]
+            poly = self._pump_poly[ndx]
+            q_low = np.where(line, q_bar, self.pump_q1)
+            low = _f <= q_low
+            mid = (~line) & (~low) & (_f <= self.pump_q2)
+            high = ~(low | mid)
+            _r = np.empty(len(ndx))
+            _df = np.empty(len(ndx))
+            _r[low] = np.where(line[low], self.pump_slope * (_f[low] - q_bar[low]) + self._pump_h_bar[ndx][low],
+                               self.pump_slope * _f[low] + A[low])
+            _df[low] = self.pump_slope
+            fm = _f[mid]
+            pm = poly[mid]
+            _r[mid] = pm[:, 0] * fm**3 + pm[:, 1] * fm**2 + pm[:, 2] * fm + pm[:, 3]
+            _df[mid] = 3 * pm[:, 0] * fm**2 + 2 * pm[:, 1] * fm + pm[:, 2]
+            fh = _f[high]
+            _r[high] = A[high] - B[high] * fh**C[high]
+            _df[high] = -B[high] * C[high] * fh**(C[high] - 1)
+            r[ndx] = _r - he[ndx] + hs[ndx]
+            df[ndx] = _df
+            dhs[ndx] = 1.0
+            dhe[ndx] = -1.0
+
+        # power pumps
+        ndx = groups['power_pump']
+        if len(ndx) > 0:
+            _f = f[ndx]
+            dh = hs[ndx] - he[ndx]
+            r[ndx] = self._pump_power[ndx] + dh * _f * (9.81 * 1000.0)
+            df[ndx] = dh * (9.81 * 1000.0)
+            dhs[ndx] = _f * (9.81 * 1000.0)
+            dhe[ndx] = -_f * (9.81 * 1000.0)
+
+        # active PRVs and PSVs
+        ndx = groups['active_prv']
+        if len(ndx) > 0:
+            r[ndx] = he[ndx] - self._valve_setting[ndx] - self._end_elevation[ndx]
+            df[ndx] = 0.0
+            dhe[ndx] = 1.0
+        ndx = groups['active_psv']
+        if len(ndx) > 0:
+            r[ndx] = hs[ndx] - self._valve_setting[ndx] - self._start_elevation[ndx]
+            df[ndx] = 0.0
+            dhs[ndx] = 1.0
+
+        # open PRVs and PSVs
+        ndx = groups['open_prv_psv']
+        if len(ndx) > 0:
+            mk = self._minor_loss[ndx]
+            r[ndx] = mk * f[ndx]**2 - hs[ndx] + he[ndx]
+            df[ndx] = 2 * mk * f[ndx]
+            dhs[ndx] = -1.0
+            dhe[ndx] = 1.0
+
+        # active FCVs
+        ndx = groups['active_fcv']
+        if len(ndx) > 0:
+            r[ndx] = f[ndx] - self._valve_setting[ndx]
+
+        # open FCVs and TCVs, and active TCVs
+        ndx = groups['fcv_tcv']
+        if len(ndx) > 0:
+            k = np.where(status[ndx] == _ACTIVE, self._tcv_resistance[ndx], self._minor_loss[ndx])
+            sg = np.where(f[ndx] <= 0, -1.0, 1.0)
+            r[ndx] = sg * k * f[ndx]**2 - hs[ndx] + he[ndx]
+            df[ndx] = 2 * sg * k * f[ndx]
+            dhs[ndx] = -1.0
+            dhe[ndx] = 1.0
+
+        return r, df, dhs, dhe
+
+    def _evaluate_pdd(self, h, d):
+        """
+        Returns the residuals of the pressure dependent demand constraints and their derivatives
+        with respect to the head and the demand.
+        """
+        nj = self._nj
+        D = self._expected_demand
+        p = h - self._elevation
+        pmin = self._pmin
+        pnom = self._pnom
+        delta = self.pdd_smoothing_delta
+        slope = self.pdd_slope
+
+        c1 = p - pmin <= 0
+        c2 = (~c1) & (p - pmin - delta <= 0)
+        c3 = (~c1) & (~c2) & (p - pnom + delta <= 0)
+        c4 = (~c1) & (~c2) & (~c3) & (p - pnom <= 0)
+        c5 = ~(c1 | c2 | c3 | c4)
+
+        frac = np.empty(nj)
+        dfrac = np.empty(nj)
+        frac[c1] = slope * (p[c1] - pmin[c1])
+        dfrac[c1] = slope
+        for mask, poly in ((c2, self._pdd_poly1), (c4, self._pdd_poly2)):
+            _p = p[mask]
+            _c = poly[mask]
+            frac[mask] = _c[:, 0] * _p**3 + _c[:, 1] * _p**2 + _c[:, 2] * _p + _c[:, 3]
+            dfrac[mask] = 3 * _c[:, 0] * _p**2 + 2 * _c[:, 1] * _p + _c[:, 2]
+        e = self._pressure_exponent[c3]
+        rng = pnom[c3] - pmin[c3]
+        base = (p[c3] - pmin[c3]) / rng
+        frac[c3] = base**e
+        dfrac[c3] = e * base**(e - 1) / rng
+        frac[c5] = slope * (p[c5] - pnom[c5]) + 1.0
+        dfrac[c5] = slope
+
+        r = d - D * frac
+        dh = -D * dfrac
+        dd = np.ones(nj)
+        iso = self._isolated
+        r[iso] = d[iso]
+        dh[iso] = 0.0
+        return r, dh, dd
+
+    def _evaluate_leaks(self, h, l):
+        """
+        Returns the residuals of the leak constraints and their derivatives with respect to the
+        head and the leak rate.
+        """
+        nj = self._nj
+        r = l.copy()
+        dh = np.zeros(nj)
+        dl = np.ones(nj)
+        ndx = np.nonzero(self._leak_active & ~self._isolated)[0]
+        if len(ndx) > 0:
+            p = h[ndx] - self._elevation[ndx]
+            low = p <= 0
+            mid = (~low) & (p <= self.leak_delta)
+            high = ~(low | mid)
+            q = np.empty(len(ndx))
+            dq = np.empty(len(ndx))
+            q[low] = self.leak_slope * p[low]
+            dq[low] = self.leak_slope
+            c = self._leak_poly[ndx][mid]
+            pm = p[mid]
+            q[mid] = c[:, 0] * pm**3 + c[:, 1] * pm**2 + c[:, 2] * pm + c[:, 3]
+            dq[mid] = 3 * c[:, 0] * pm**2 + 2 * c[:, 1] * pm + c[:, 2]
+            ph = p[high]
+            cda = self._leak_coeff[ndx][high] * self._leak_area[ndx][high]
+            q[high] = cda * (2.0 * 9.81 * ph)**0.5
+            dq[high] = cda * 9.81 * (2.0 * 9.81 * ph)**(-0.5)
+            r[ndx] = l[ndx] - q
+            dh[ndx] = -dq
+        return r, dh, dl
+
+    def _split_x(self):
+        nl = self._nl
+        nj = self._nj
+        f = self._x[:nl]
+        h = self._x[self._head_start:self._head_start + nj]
+        l = self._x[self._leak_start:self._leak_start + nj]
+        if self._pdd:
+            d = self._x[self._demand_start:self._demand_start + nj]
+        else:
+            d = None
+        return f, h, d, l
+
+    def _mass_balance(self, f, d, l, h):
+        nj = self._nj
+        r = np.zeros(nj)
+        np.add.at(r, self._s_junc, f[self._s_links])
+        np.subtract.at(r, self._e_junc, f[self._e_links])
+        if self._pdd:
+            r += d
+        else:
+            r += self._expected_demand
+        r += l
+        iso = self._isolated
+        r[iso] = h[iso] - self._elevation[iso]
+        return r
+
+    def evaluate_residuals(self, x=None, num_threads=None):
+        """
+        Evaluate the constraint residuals.
+
+        Parameters
+        ----------
+        x: np.ndarray
+            If provided, the variable values are loaded from x before evaluating the residuals.
+        num_threads: int
+            Not used; accepted for compatibility with wntr.sim.aml.Model.
+
+        Returns
+        -------
+        r: np.ndarray
+        """
+        if x is not None:
+            self.load_var_values_from_x(x)
+        f, h, d, l = self._split_x()
+        hs, he = self._endpoint_heads(h)
+        r_links = self._evaluate_links(f, hs, he)[0]
+        r_mb = self._mass_balance(f, d, l, h)
+        r_leak = self._evaluate_leaks(h, l)[0]
+        if self._pdd:
+            r_pdd = self._evaluate_pdd(h, d)[0]
+            return np.concatenate((r_links, r_mb, r_pdd, r_leak))
+        return np.concatenate((r_links, r_mb, r_leak))
+
+    def evaluate_jacobian(self, x=None, num_threads=None):
+        """
+        Evaluate the jacobian of the constraints with respect to the variables.
+
+        Parameters
+        ----------
+        x: np.ndarray
+            If provided, the variable values are loaded from x before evaluating the jacobian.
+        num_threads: int
+            Not used; accepted for compatibility with wntr.sim.aml.Model.
+
+        Returns
+        -------
+        jac: scipy.sparse.csr_matrix
+        """
+        if x is not None:
+            self.load_var_values_from_x(x)
+        f, h, d, l = self._split_x()
+        hs, he = self._endpoint_heads(h)
+        r, df, dhs, dhe = self._evaluate_links(f, hs, he)
+
+        nj = self._nj
+        not_iso = (~self._isolated).astype(float)
+        iso = self._isolated.astype(float)
+        values = [df, dhs[self._s_links], dhe[self._e_links],
+                  not_iso[self._s_junc], -not_iso[self._e_junc], iso, not_iso]
+        if self._pdd:
+            r_pdd, dh_pdd, dd_pdd = self._evaluate_pdd(h, d)
+            values.extend([not_iso, dh_pdd, dd_pdd])
+        r_leak, dh_leak, dl_leak = self._evaluate_leaks(h, l)
+        values.extend([dh_leak, dl_leak])
+        values = np.concatenate(values)
+
+        data = np.bincount(self._slot_to_nz, weights=values, minlength=self._jac_nnz)
+        return scipy.sparse.csr_matrix((data, self._jac_indices, self._jac_indptr), shape=(self._n, self._n))
+
+
+def create_vectorized_hydraulic_model(wn, HW_approx='default'):
+    """
+    Create a VectorizedHydraulicModel; this is the vectorized counterpart of
+    wntr.sim.hydraulics.create_hydraulic_model.
+
+    Parameters
+    ----------
+    wn: WaterNetworkModel
+    HW_approx: str
+        Specifies which Hazen-Williams headloss approximation to use. Options are 'default' and 'piecewise'. Please
+        see the WNTR documentation on hydraulics for details.
+
+    Returns
+    -------
+    m: VectorizedHydraulicModel
+    model_updater: VectorizedModelUpdater
+    """
+    if wn.options.hydraulic.headloss == 'C-M':
+        raise NotImplementedError('C-M headloss is not currently supported in the WNTRSimulator')
+    if wn.options.hydraulic.headloss == 'D-W':
+        raise NotImplementedError('D-W headloss is not currently supported in the WNTRSimulator')
+    if len(wn.pbv_name_list) > 0:
+        raise NotImplementedError('PBV valves are not currently supported in the WNTRSimulator')
+    if len(wn.gpv_name_list) > 0:
+        raise NotImplementedError('GPV valves are not currently supported in the WNTRSimulator')
+
+    m = VectorizedHydraulicModel(wn, HW_approx=HW_approx)
+    model_updater = VectorizedModelUpdater()
+
+    # set the parameter values that change with time
+    param.source_head_param(m, wn)
+    param.expected_demand_param(m, wn)
+    if m._pdd:
+        m.demand.array[:] = m.expected_demand.array
+
+    return m, model_updater
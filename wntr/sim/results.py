@@ -1,5 +1,13 @@
 import datetime
 import enum
+import json
+import os
+import struct
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
 
 
 class ResultsStatus(enum.IntEnum):
@@ -19,3 +27,205 @@ class SimulationResults(object):
         self.network_name = None
         self.link = None
         self.node = None
+
+
+class _LazyResultsDict(Mapping):
+    """
+    A read-only mapping from result attributes (e.g., 'pressure') to DataFrames that are backed by
+    memory-mapped .npy files. Each file is only opened when its attribute is first accessed.
+    """
+    def __init__(self, directory, attributes, names, time):
+        self._directory = directory
+        self._attributes = list(attributes)
+        self._names = list(names)
+        self._time = time
+        self._loaded = dict()
+
+    def __getitem__(self, attr):
+        if attr not in self._attributes:
+            raise KeyError(attr)
+        if attr not in self._loaded:
+            data = np.load(os.path.join(self._directory, attr + '.npy'), mmap_mode='r')
+            self._loaded[attr] = pd.DataFrame(data=data, index=self._time, columns=self._names, copy=False)
+        return self._loaded[attr]
+
+    def __iter__(self):
+        return iter(self._attributes)
+
+    def __len__(self):
+        return len(self._attributes)
+
+
+_NPY_HEADER_SIZE = 256
+
+
+def _npy_header(dtype, shape):
+    """
+    Returns a .npy (version 1.0) header of exactly _NPY_HEADER_SIZE bytes so that the header can be rewritten
+    in place with the final shape once all of the rows have been appended.
+    """
+    header = "{{'descr': {!r}, 'fortran_order': False, 'shape': {!r}, }}".format(
+        np.lib.format.dtype_to_descr(np.dtype(dtype)), tuple(shape)).encode('latin1')
+    header_len = _NPY_HEADER_SIZE - 10
+    if len(header) + 1 > header_len:
+        raise ValueError('shape is too large for the .npy header')
+    header = header + b' ' * (header_len - len(header) - 1) + b'\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', header_len) + header
+
+
+class _NpyAppendWriter(object):
+    """
+    Appends rows to a 2-D .npy file.
+    """
+    def __init__(self, filename, dtype, num_columns):
+        self.filename = filename
+        self.dtype = np.dtype(dtype)
+        self.num_columns = num_columns
+        self.num_rows = 0
+        self._file = open(filename, 'wb')
+        self._file.write(_npy_header(self.dtype, (0, num_columns)))
+
+    def append(self, row):
+        self._file.write(np.ascontiguousarray(row, dtype=self.dtype).tobytes())
+        self.num_rows += 1
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.seek(0)
+        self._file.write(_npy_header(self.dtype, (self.num_rows, self.num_columns)))
+        self._file.close()
+        self._file = None
+
+
+class _StreamingResultsBuffer(object):
+    """
+    Counterpart of wntr.sim.hydraulics._ResultsBuffer that writes every row to .npy files as soon as the next row
+    is started (or the buffer is finalized). Only one row is kept in memory unless keep_in_memory is True.
+    """
+    def __init__(self, directory, elements, attributes, memory_buffer=None, time_filename=None):
+        self.directory = directory
+        self.time_filename = time_filename
+        self.elements = list(elements)
+        self.names = [element.name for element in self.elements]
+        self.num_times = 0
+        self.data = OrderedDict((attr, np.zeros((1, len(self.names)), dtype=dtype))
+                                for attr, dtype in attributes.items())
+        self._writers = OrderedDict((attr, _NpyAppendWriter(os.path.join(directory, attr + '.npy'), dtype,
+                                                            len(self.names)))
+                                    for attr, dtype in attributes.items())
+        self._memory_buffer = memory_buffer
+        self._pending = False
+
+    def keys(self):
+        return self.data.keys()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        if self._memory_buffer is not None:
+            row = self._memory_buffer.next_row()
+        for attr, writer in self._writers.items():
+            writer.append(self.data[attr][0])
+            if self._memory_buffer is not None:
+                self._memory_buffer.data[attr][row] = self.data[attr][0]
+        self._pending = False
+
+    def next_row(self):
+        self._flush()
+        self._pending = True
+        self.num_times += 1
+        return 0
+
+    def __getitem__(self, attr):
+        if self._memory_buffer is None:
+            raise KeyError('Results are not kept in memory; read them from ' + self.directory)
+        self._flush()
+        return self._memory_buffer[attr]
+
+    def close(self):
+        self._flush()
+        for writer in self._writers.values():
+            writer.close()
+
+    def to_dataframes(self, index):
+        self.close()
+        if self.time_filename is not None:
+            np.save(self.time_filename, np.asarray(index, dtype=np.int64))
+        if self._memory_buffer is not None:
+            return self._memory_buffer.to_dataframes(index)
+        return _LazyResultsDict(self.directory, self.data.keys(), self.names, index)
+
+
+class NpyResultsSink(object):
+    """
+    Streams the results of a WNTRSimulator simulation to .npy files as the simulation runs.
+
+    Each result attribute is written to its own 2-D .npy file (one row per report time and one
+    column per node or link) in directory/node or directory/link; the report times are written to
+    directory/time.npy and the node and link names to directory/metadata.json. The results returned by
+    the simulation are backed by memory-mapped files, and can be reopened later with
+    :func:`~wntr.sim.results.load_npy_results`.
+
+    Parameters
+    ----------
+    directory: str
+        Directory to write the results to; it is created if it does not exist
+    keep_in_memory: bool, optional
+        If True, the results are also kept in memory (as without a sink) and returned as regular DataFrames.
+        If False (default), only the current report step is kept in memory.
+    """
+    def __init__(self, directory, keep_in_memory=False):
+        self.directory = directory
+        self.keep_in_memory = keep_in_memory
+
+    def open(self, wn, nodes, node_attributes, links, link_attributes, num_times):
+        """
+        Creates the result buffers for a simulation; called by wntr.sim.hydraulics.initialize_results_dict.
+        """
+        from wntr.sim.hydraulics import _ResultsBuffer
+        buffers = list()
+        metadata = OrderedDict(network_name=wn.name)
+        for element_type, elements, attributes in (('node', nodes, node_attributes),
+                                                   ('link', links, link_attributes)):
+            directory = os.path.join(self.directory, element_type)
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+            memory_buffer = None
+            if self.keep_in_memory:
+                memory_buffer = _ResultsBuffer(elements, attributes, num_times)
+            time_filename = os.path.join(self.directory, 'time.npy') if element_type == 'node' else None
+            buffers.append(_StreamingResultsBuffer(directory, elements, attributes, memory_buffer, time_filename))
+            metadata[element_type] = OrderedDict(names=[element.name for element in elements],
+                                                 attributes=list(attributes.keys()))
+        with open(os.path.join(self.directory, 'metadata.json'), 'w') as f:
+            json.dump(metadata, f)
+        return buffers[0], buffers[1]
+
+
+def load_npy_results(directory):
+    """
+    Opens results written by a :class:`~wntr.sim.results.NpyResultsSink`.
+
+    The returned results are backed by memory-mapped files; each result attribute is only read
+    when (and as far as) it is accessed.
+
+    Parameters
+    ----------
+    directory: str
+
+    Returns
+    -------
+    results: SimulationResults
+    """
+    with open(os.path.join(directory, 'metadata.json'), 'r') as f:
+        metadata = json.load(f)
+    time = np.load(os.path.join(directory, 'time.npy'))
+    results = SimulationResults()
+    results.network_name = metadata['network_name']
+    results.time = time.tolist()
+    results.node = _LazyResultsDict(os.path.join(directory, 'node'), metadata['node']['attributes'],
+                                    metadata['node']['names'], time)
+    results.link = _LazyResultsDict(os.path.join(directory, 'link'), metadata['link']['attributes'],
+                                    metadata['link']['names'], time)
+    return results
@@ -3,6 +3,14 @@ import scipy.sparse as sp
 import warnings
 import logging
 import enum
+try:
+    from sksparse.cholmod import cholesky as _cholesky, CholmodNotPositiveDefiniteError as _CholmodNotPositiveDefiniteError
+except ImportError:
+    _cholesky = None
+try:
+    import scikits.umfpack as _umfpack
+except ImportError:
+    _umfpack = None
 
 warnings.filterwarnings("error",'Matrix is exactly singular', sp.linalg.MatrixRankWarning)
 np.set_printoptions(precision=3, threshold=10000, linewidth=300)
@@ -15,6 +23,247 @@ class SolverStatus(enum.IntEnum):
     error = 0
 
 
+class _LinearSolver(object):
+    """
+    Base class for the sparse linear solvers used by NewtonSolver.
+
+    factorize computes (and keeps) whatever is needed to solve with a matrix, and
+    solve can then be called any number of times with the same factorization.
+    Both raise a RuntimeError if the matrix is singular.
+    """
+    def factorize(self, A, key=None):
+        """
+        Parameters
+        ----------
+        A: scipy.sparse matrix
+        key: hashable
+            An identifier for the structure of A (e.g., the structure version of the model)
+        """
+        raise NotImplementedError('factorize has not been implemented for {0}'.format(type(self).__name__))
+
+    def solve(self, b):
+        """
+        Parameters
+        ----------
+        b: np.ndarray
+
+        Returns
+        -------
+        x: np.ndarray
+        """
+        raise NotImplementedError('solve has not been implemented for {0}'.format(type(self).__name__))
+
+    def clear(self):
+        pass
+
+
+class _SuperLUSolver(_LinearSolver):
+    """
+    SuperLU with a new fill-reducing permutation for every factorization.
+    """
+    def __init__(self, options=None):
+        self._lu = None
+
+    def factorize(self, A, key=None):
+        self._lu = sp.linalg.splu(A.tocsc(), permc_spec='COLAMD')
+
+    def solve(self, b):
+        return self._lu.solve(b)
+
+    def clear(self):
+        self._lu = None
+
+
+class _LUFactorizationCache(_LinearSolver):
+    """
+    SuperLU with a cached fill-reducing column permutation, so that repeated
+    factorizations of matrices with the same sparsity pattern only require a
+    numeric refactorization.
+
+    The cache is keyed on the structure version of the model (see
+    wntr.sim.aml.Model.set_structure). If the version changes, the sparsity
+    pattern of the new matrix is compared to the cached pattern, and the
+    permutation is only recomputed if the pattern actually changed.
+    """
+    def __init__(self, options=None):
+        self._key = None
+        self._indptr = None
+        self._indices = None
+        self._perm_c = None
+        self._lu = None
+        self._permuted = False
+
+    def clear(self):
+        self._key = None
+        self._indptr = None
+        self._indices = None
+        self._perm_c = None
+        self._lu = None
+        self._permuted = False
+
+    def _pattern_matches(self, A):
+        return (self._indptr is not None and
+                np.array_equal(self._indptr, A.indptr) and
+                np.array_equal(self._indices, A.indices))
+
+    def factorize(self, A, key=None):
+        A = A.tocsc()
+        if self._perm_c is None or key is None or key != self._key:
+            if self._pattern_matches(A):
+                self._key = key
+            else:
+                self.clear()
+
+        if self._perm_c is None:
+            self._lu = sp.linalg.splu(A, permc_spec='COLAMD')
+            self._permuted = False
+            self._key = key
+            self._indptr = A.indptr.copy()
+            self._indices = A.indices.copy()
+            # SuperLU factors A*Pc where Pc[i, perm_c[i]] = 1, so the columns of A
+            # appear in the order given by the inverse of perm_c
+            self._perm_c = np.argsort(self._lu.perm_c)
+        else:
+            self._lu = sp.linalg.splu(A[:, self._perm_c], permc_spec='NATURAL')
+            self._permuted = True
+
+    def solve(self, b):
+        if not self._permuted:
+            return self._lu.solve(b)
+        x = np.empty(len(b))
+        x[self._perm_c] = self._lu.solve(b)
+        return x
+
+
+class _KrylovSolver(_LinearSolver):
+    """
+    GMRES or BiCGSTAB preconditioned with an incomplete LU factorization.
+
+    Options (keys of the solver options):
+
+    * KRYLOV_METHOD: 'gmres' (default) or 'bicgstab'
+    * KRYLOV_TOL: relative tolerance of the iterative solver (default = 1e-10)
+    * KRYLOV_MAXITER: maximum number of iterations of the iterative solver (default = 1000)
+    * ILU_DROP_TOL: drop tolerance of the incomplete LU factorization (default = 1e-5)
+    * ILU_FILL_FACTOR: fill factor of the incomplete LU factorization (default = 10)
+    """
+    def __init__(self, options=None):
+        if options is None:
+            options = {}
+        self.method = options.get('KRYLOV_METHOD', 'gmres')
+        if self.method not in {'gmres', 'bicgstab'}:
+            raise ValueError('Unexpected value for KRYLOV_METHOD: ' + str(self.method))
+        self.tol = options.get('KRYLOV_TOL', 1e-10)
+        self.maxiter = options.get('KRYLOV_MAXITER', 1000)
+        self.drop_tol = options.get('ILU_DROP_TOL', 1e-5)
+        self.fill_factor = options.get('ILU_FILL_FACTOR', 10)
+        self._A = None
+        self._M = None
+
+    def factorize(self, A, key=None):
+        self._A = A.tocsc()
+        ilu = sp.linalg.spilu(self._A, drop_tol=self.drop_tol, fill_factor=self.fill_factor)
+        self._M = sp.linalg.LinearOperator(self._A.shape, ilu.solve)
+
+    def solve(self, b):
+        if self.method == 'gmres':
+            func = sp.linalg.gmres
+        else:
+            func = sp.linalg.bicgstab
+        try:
+            x, info = func(self._A, b, M=self._M, rtol=self.tol, atol=0.0, maxiter=self.maxiter)
+        except TypeError:  # older versions of scipy use tol instead of rtol
+            x, info = func(self._A, b, M=self._M, tol=self.tol, atol=0.0, maxiter=self.maxiter)
+        if info != 0:
+            raise RuntimeError('The {0} linear solver did not converge (info = {1})'.format(self.method, info))
+        return x
+
+    def clear(self):
+        self._A = None
+        self._M = None
+
+
+class _UMFPACKSolver(_LinearSolver):
+    """
+    UMFPACK through scikit-umfpack.
+    """
+    def __init__(self, options=None):
+        if _umfpack is None:
+            raise ImportError('The umfpack linear solver requires scikit-umfpack')
+        self._lu = None
+
+    def factorize(self, A, key=None):
+        self._lu = _umfpack.splu(A.tocsc())
+
+    def solve(self, b):
+        return self._lu.solve(b)
+
+    def clear(self):
+        self._lu = None
+
+
+class _CHOLMODSolver(_LinearSolver):
+    """
+    Sparse Cholesky factorization with CHOLMOD through scikit-sparse. The symbolic analysis
+    is reused as long as the sparsity pattern does not change. Only valid for symmetric
+    positive definite matrices (e.g., the reduced system of the GGASolver).
+    """
+    def __init__(self, options=None):
+        if _cholesky is None:
+            raise ImportError('The cholmod linear solver requires scikit-sparse')
+        self._factor = None
+        self._indptr = None
+        self._indices = None
+
+    def factorize(self, A, key=None):
+        A = A.tocsc()
+        A.sort_indices()
+        try:
+            if (self._factor is None or not np.array_equal(self._indptr, A.indptr) or
+                    not np.array_equal(self._indices, A.indices)):
+                self._factor = _cholesky(A)
+                self._indptr = A.indptr.copy()
+                self._indices = A.indices.copy()
+            else:
+                self._factor.cholesky_inplace(A)
+        except _CholmodNotPositiveDefiniteError as e:
+            self.clear()
+            raise RuntimeError(str(e))
+
+    def solve(self, b):
+        return self._factor(b)
+
+    def clear(self):
+        self._factor = None
+        self._indptr = None
+        self._indices = None
+
+
+_linear_solvers = {'superlu': _SuperLUSolver,
+                   'splu_fixed_perm': _LUFactorizationCache,
+                   'krylov': _KrylovSolver,
+                   'umfpack': _UMFPACKSolver,
+                   'cholmod': _CHOLMODSolver}
+
+
+def _get_linear_solver(name, options=None):
+    """
+    Parameters
+    ----------
+    name: str
+        One of 'superlu', 'splu_fixed_perm', 'krylov', 'umfpack', or 'cholmod'
+    options: dict
+        The solver options
+
+    Returns
+    -------
+    linear_solver: _LinearSolver
+    """
+    if name not in _linear_solvers:
+        raise ValueError('Unexpected value for LINEAR_SOLVER: ' + str(name))
+    return _linear_solvers[name](options)
+
+
 class NewtonSolver(object):
     """
     Newton Solver class.
@@ -60,12 +309,58 @@ class NewtonSolver(object):
         else:
             self.num_threads = self._options['THREADS']
 
-    def solve(self, model):
+        if 'LINEAR_SOLVER' not in self._options:
+            self.linear_solver = 'splu_fixed_perm'
+        else:
+            self.linear_solver = self._options['LINEAR_SOLVER']
+        self._linear_solver = _get_linear_solver(self.linear_solver, self._options)
+
+        if 'JAC_REUSE' not in self._options:
+            self.jac_reuse = False
+        else:
+            self.jac_reuse = self._options['JAC_REUSE']
+
+        if 'JAC_REFRESH_RATE' not in self._options:
+            self.jac_refresh_rate = 0.5
+        else:
+            self.jac_refresh_rate = self._options['JAC_REFRESH_RATE']
+
+        self._factorization_key = None
+
+    def _factorize(self, model, J):
+        """
+        Factorize the jacobian so that _solve_factored can be used to compute Newton steps.
+
+        Parameters
+        ----------
+        model: wntr.aml.Model
+        J: scipy.sparse.csr_matrix
+        """
+        self._linear_solver.factorize(J, key=model.structure_version)
+
+    def _solve_factored(self, r):
+        """
+        Solve J d = r with the last jacobian passed to _factorize.
+
+        Parameters
+        ----------
+        r: np.ndarray
+
+        Returns
+        -------
+        d: np.ndarray
+        """
+        return self._linear_solver.solve(r)
+
+    def solve(self, model, x_guess=None):
         """
 
         Parameters
         ----------
         model: wntr.aml.Model
+        x_guess: np.ndarray, optional
+            An alternative starting point (ordered like model.get_x()). It is used instead of the current
+            values of the variables if its residual is smaller than the first residual.
 
         Returns
         -------
@@ -80,6 +375,27 @@ class NewtonSolver(object):
 
         use_r_ = False
 
+        if x_guess is not None and len(x_guess) == len(x):
+            r = model.evaluate_residuals(num_threads=self.num_threads)
+            r_norm = np.max(abs(r))
+            model.load_var_values_from_x(x_guess)
+            r_ = model.evaluate_residuals(num_threads=self.num_threads)
+            new_norm = np.max(abs(r_))
+            if new_norm < r_norm:
+                x = np.array(x_guess, dtype=float)
+            else:
+                model.load_var_values_from_x(x)
+                r_ = r
+                new_norm = r_norm
+            use_r_ = True
+
+        # With JAC_REUSE, the factorization from the last iteration (possibly from the last call to solve) is used
+        # for as long as each step reduces the residual by at least a factor of JAC_REFRESH_RATE. A step that
+        # reduces the residual by less than that is still taken, but the jacobian is refreshed for the next
+        # iteration; a step that does not reduce the residual is discarded, and the jacobian is refreshed.
+        key = (id(model), model.structure_version, len(x))
+        reuse = self.jac_reuse and self._factorization_key == key
+
         # MAIN NEWTON LOOP
         for outer_iter in range(self.maxiter):
             if use_r_:
@@ -96,13 +412,33 @@ class NewtonSolver(object):
             if r_norm < self.tol:
                 return SolverStatus.converged, 'Solved Successfully', outer_iter
 
-            J = model.evaluate_jacobian(x=None)
+            if reuse:
+                d = -self._solve_factored(r)
+                x_ = x + d
+                model.load_var_values_from_x(x_)
+                r_ = model.evaluate_residuals(num_threads=self.num_threads)
+                new_norm = np.max(abs(r_))
+                if new_norm < (1.0 - 0.0001) * r_norm:
+                    if logger_level <= 1:
+                        logger.log(1, 'iter: {0:<4d} norm: {1:<10.2e} (reused jacobian)'.format(outer_iter, new_norm))
+                    x = x_
+                    use_r_ = True
+                    # keep the factorization only if the convergence rate is still good enough
+                    reuse = new_norm < self.jac_refresh_rate * r_norm
+                    continue
+                model.load_var_values_from_x(x)
+
+            J = model.evaluate_jacobian(x=None, num_threads=self.num_threads)
 
             # Call Linear solver
             try:
-                d = -sp.linalg.spsolve(J, r, permc_spec='COLAMD', use_umfpack=False)
-            except sp.linalg.MatrixRankWarning:
+                self._factorize(model, J)
+                d = -self._solve_factored(r)
+            except (RuntimeError, sp.linalg.MatrixRankWarning):
+                self._factorization_key = None
                 return SolverStatus.error, 'Jacobian is singular at iteration ' + str(outer_iter), outer_iter
+            self._factorization_key = key
+            reuse = self.jac_reuse
 
             # Backtracking
             alpha = 1.0
@@ -124,6 +460,7 @@ class NewtonSolver(object):
                 if logger_level <= 1:
                     logger.log(1, 'iter: {0:<4d} norm: {1:<10.2e} alpha: {2:<10.2e}'.format(outer_iter, new_norm, alpha))
             else:
+                use_r_ = False
                 x += d
                 model.load_var_values_from_x(x)
             
@@ -131,3 +468,88 @@ class NewtonSolver(object):
 
 
 
+
+
+class GGASolver(NewtonSolver):
+    """
+    Global Gradient Algorithm (Todini and Pilati) solver class.
+
+    Each Newton step is computed from the Schur complement of the jacobian with respect to the junction
+    heads. The flows, demands, and leak rates only appear in their own equation (besides the mass balances),
+    so they are eliminated, and the reduced system for the heads is symmetric positive definite. The
+    eliminated variables are then recovered from the head step. Links whose equations do not depend on
+    the flow (e.g., active PRVs and PSVs) cannot be eliminated; their flows are kept in the reduced
+    system, which is then no longer symmetric.
+
+    The options are the same as for NewtonSolver. By default, the reduced system is factored with CHOLMOD
+    if scikit-sparse is installed and with SuperLU otherwise; the LINEAR_SOLVER option overrides this. CHOLMOD
+    only reads one triangle of the matrix, so the reduced system is checked to be symmetric first. If it is
+    not symmetric, or the Cholesky factorization fails, SuperLU is used.
+
+    This solver requires a model that pairs each variable with one equation and exposes the indices of
+    the head variables, such as wntr.sim.models.vectorized.VectorizedHydraulicModel.
+    """
+    def __init__(self, options=None):
+        if options is None:
+            options = {}
+        options = dict(options)
+        if 'LINEAR_SOLVER' not in options and _cholesky is not None:
+            options['LINEAR_SOLVER'] = 'cholmod'
+        super(GGASolver, self).__init__(options)
+        self._lu_solver = _LUFactorizationCache()
+
+    def _factorize(self, model, J):
+        if not hasattr(model, 'head_var_indices'):
+            raise ValueError('The GGASolver requires a model that exposes head_var_indices '
+                             '(see wntr.sim.models.vectorized)')
+        n = J.shape[0]
+        diag = J.diagonal()
+        keep = np.zeros(n, dtype=bool)
+        keep[model.head_var_indices] = True
+        keep |= np.abs(diag) < 1e-10
+        K = np.nonzero(keep)[0]
+        E = np.nonzero(~keep)[0]
+
+        J_K = J[K]
+        J_E = J[E]
+        inv_diag = sp.diags(1.0 / diag[E])
+        J_KE_inv = J_K[:, E].dot(inv_diag)
+        J_EK = J_E[:, K]
+        S = (J_K[:, K] - J_KE_inv.dot(J_EK)).tocsc()
+        S.sort_indices()
+
+        self._reduced_solver = None
+        cholmod = isinstance(self._linear_solver, _CHOLMODSolver)
+        if cholmod:
+            # S is not symmetric if flows are kept in the reduced system. Eliminating an equation keeps S
+            # symmetric only if its head coefficients are a multiple of the coefficients of its variable in
+            # the mass balances (true for all current link types), so this is checked explicitly.
+            symmetric = len(K) == len(model.head_var_indices)
+            if symmetric and S.nnz > 0:
+                symmetric = abs(S - S.T).max() <= 1e-10 * abs(S).max()
+        if not cholmod or symmetric:
+            try:
+                self._linear_solver.factorize(S)
+                self._reduced_solver = self._linear_solver
+            except RuntimeError:
+                if not isinstance(self._linear_solver, _CHOLMODSolver):
+                    raise
+        if self._reduced_solver is None:
+            self._lu_solver.factorize(S)
+            self._reduced_solver = self._lu_solver
+
+        self._n = n
+        self._K = K
+        self._E = E
+        self._diag_E = diag[E]
+        self._J_KE_inv = J_KE_inv
+        self._J_EK = J_EK
+
+    def _solve_factored(self, r):
+        K = self._K
+        E = self._E
+        x_K = self._reduced_solver.solve(r[K] - self._J_KE_inv.dot(r[E]))
+        x = np.empty(self._n)
+        x[K] = x_K
+        x[E] = (r[E] - self._J_EK.dot(x_K)) / self._diag_E
+        return x
@@ -336,6 +336,82 @@ class TestCSRJacobian(unittest.TestCase):
                 self.assertTrue(true_jac[c][v] == A[c.index, v.index])
 
 
+class TestStructure(unittest.TestCase):
+    def test_set_structure_only_when_dirty(self):
+        m = aml.Model()
+        m.x = aml.Var(2.0)
+        m.y = aml.Var(3.0)
+        m.c1 = aml.Constraint(m.x + m.y)
+        m.c2 = aml.Constraint(m.x - m.y)
+        self.assertTrue(m.structure_is_dirty)
+        m.set_structure()
+        self.assertFalse(m.structure_is_dirty)
+        version = m.structure_version
+
+        m.set_structure()
+        self.assertEqual(m.structure_version, version)
+        self.assertAlmostEqual(m.evaluate_residuals()[m.c1.index], 5.0)
+
+        del m.c2
+        self.assertTrue(m.structure_is_dirty)
+        m.c2 = aml.Constraint(m.x * m.y)
+        m.set_structure()
+        self.assertEqual(m.structure_version, version + 1)
+        self.assertAlmostEqual(m.evaluate_residuals()[m.c2.index], 6.0)
+
+
+class TestThreads(unittest.TestCase):
+    def _build_model(self):
+        m = aml.Model()
+        n = 3000
+        m.x = aml.VarDict()
+        for i in range(n):
+            m.x[i] = aml.Var(float(i % 7) - 3.0)
+        m.c = aml.ConstraintDict()
+        for i in range(n):
+            if i % 2 == 0:
+                m.c[i] = aml.Constraint(m.x[i] ** 2 - m.x[(i + 1) % n])
+            else:
+                e = aml.ConditionalExpression()
+                e.add_condition(aml.inequality(body=m.x[i], ub=-1), -m.x[i] ** 2 + m.x[(i + 1) % n])
+                e.add_condition(aml.inequality(body=m.x[i], ub=1), 3 * m.x[i])
+                e.add_final_expr(m.x[i] ** 3 - m.x[(i + 1) % n])
+                m.c[i] = aml.Constraint(e)
+        m.set_structure()
+        return m
+
+    def test_threaded_evaluation(self):
+        m = self._build_model()
+        r1 = m.evaluate_residuals(num_threads=1)
+        j1 = m.evaluate_jacobian(num_threads=1)
+        r4 = m.evaluate_residuals(num_threads=4)
+        j4 = m.evaluate_jacobian(num_threads=4)
+        self.assertTrue(np.array_equal(r1, r4))
+        self.assertTrue(np.array_equal(j1.indptr, j4.indptr))
+        self.assertTrue(np.array_equal(j1.indices, j4.indices))
+        self.assertTrue(np.array_equal(j1.data, j4.data))
+
+    def test_reused_threads(self):
+        m = self._build_model()
+        for num_threads in [4, 4, 2, 4]:
+            x = np.random.uniform(-3, 3, len(m.x))
+            m.load_var_values_from_x(x)
+            r1 = m.evaluate_residuals(num_threads=1)
+            j1 = m.evaluate_jacobian(num_threads=1)
+            r = m.evaluate_residuals(num_threads=num_threads)
+            j = m.evaluate_jacobian(num_threads=num_threads)
+            self.assertEqual(m._evaluator.get_num_threads(), num_threads)
+            self.assertTrue(np.array_equal(r1, r))
+            self.assertTrue(np.array_equal(j1.data, j.data))
+
+        del m.c[0]
+        m.c[0] = aml.Constraint(m.x[0] ** 3 - m.x[1])
+        m.set_structure()
+        r1 = m.evaluate_residuals(num_threads=1)
+        r4 = m.evaluate_residuals(num_threads=4)
+        self.assertTrue(np.array_equal(r1, r4))
+
+
 class TestExceptions(unittest.TestCase):
     def test_structure_exception(self):
         m = aml.Model()
@@ -1,4 +1,6 @@
+import shutil
 import sys
+import tempfile
 import unittest
 from os.path import abspath, dirname, join
 
@@ -332,5 +334,62 @@ class TestNet3InpUnitsResults(unittest.TestCase):
                 )
 
 
+class TestBinFileLazy(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        import wntr
+
+        self.wntr = wntr
+        inp_file = join(ex_datadir, "Net3.inp")
+        self.wn = wntr.network.WaterNetworkModel(inp_file)
+        self.wn.options.quality.parameter = "AGE"
+        self.tmpdir = tempfile.mkdtemp()
+        self.binfile = join(self.tmpdir, "temp_lazy.bin")
+        sim = wntr.sim.EpanetSimulator(self.wn)
+        sim.run_sim(file_prefix=join(self.tmpdir, "temp_lazy"))
+
+    @classmethod
+    def tearDownClass(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_lazy(self):
+        import numpy as np
+
+        for convert in [True, False]:
+            results = self.wntr.epanet.io.BinFile().read(self.binfile, convert=convert)
+            lazy = self.wntr.epanet.io.BinFile().read(self.binfile, convert=convert, lazy=True)
+            for element in ["node", "link"]:
+                self.assertEqual(set(getattr(results, element).keys()), set(getattr(lazy, element).keys()))
+                for attr, df in getattr(results, element).items():
+                    view = getattr(lazy, element)[attr]
+                    self.assertEqual(view.shape, df.shape)
+                    self.assertTrue(np.array_equal(view.to_dataframe().values, df.values, equal_nan=True))
+                    names = list(df.columns[::5])
+                    times = list(df.index[1::3])
+                    sub = view.select(names=names, times=times)
+                    self.assertEqual(list(sub.columns), names)
+                    self.assertEqual(list(sub.index), times)
+                    self.assertTrue(np.array_equal(sub.values, df.loc[times, names].values, equal_nan=True))
+                    name = df.columns[0]
+                    self.assertTrue(np.array_equal(view[name].values, df[name].values, equal_nan=True))
+
+    def test_result_types(self):
+        import numpy as np
+        from wntr.epanet.util import ResultType
+
+        results = self.wntr.epanet.io.BinFile().read(self.binfile)
+        result_types = [ResultType.pressure, ResultType.headloss, ResultType.setting]
+        for lazy in [False, True]:
+            selected = self.wntr.epanet.io.BinFile(result_types=result_types).read(self.binfile, lazy=lazy)
+            self.assertEqual(list(selected.node.keys()), ["pressure"])
+            self.assertEqual(list(selected.link.keys()), ["headloss", "setting"])
+            for element, attr in [("node", "pressure"), ("link", "headloss"), ("link", "setting")]:
+                df = getattr(selected, element)[attr]
+                if lazy:
+                    df = df.to_dataframe()
+                expected = getattr(results, element)[attr]
+                self.assertTrue(np.array_equal(df.values, expected.values, equal_nan=True))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,12 @@
+import os
+import shutil
+import tempfile
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from os.path import abspath, dirname, join, exists
 
+import numpy as np
+import wntr
 import wntr.epanet.toolkit
 
 testdir = dirname(abspath(__file__))
@@ -49,6 +55,26 @@ class TestEpanetToolkit(unittest.TestCase):
         link_val = enData.ENgetlinkvalue(link_index, 0) # DIAMETER = 0
         assert(link_val == 14) 
     
+    def test_ENgetnodevalues_ENgetlinkvalues(self):
+        for version in [2.0, 2.2]:
+            enData = wntr.epanet.toolkit.ENepanet(version=version)
+            enData.ENopen(join(datadir, "Net1.inp"), "temp.rpt")
+            enData.ENopenH()
+            enData.ENinitH(0)
+            enData.ENrunH()
+            pressure = enData.ENgetnodevalues(wntr.epanet.util.EN.PRESSURE)
+            self.assertEqual(pressure.shape, (11,))
+            for i in range(11):
+                self.assertAlmostEqual(pressure[i], enData.ENgetnodevalue(i + 1, wntr.epanet.util.EN.PRESSURE))
+            flow = np.zeros(13)
+            result = enData.ENgetlinkvalues(wntr.epanet.util.EN.FLOW, out=flow)
+            self.assertIs(result, flow)
+            for i in range(13):
+                self.assertAlmostEqual(flow[i], enData.ENgetlinkvalue(i + 1, wntr.epanet.util.EN.FLOW), 5)
+            self.assertRaises(wntr.epanet.toolkit.EpanetException, enData.ENgetlinkvalues, 1000)
+            enData.ENcloseH()
+            enData.ENclose()
+
     def test_ENsaveinpfile(self):
         enData = wntr.epanet.toolkit.ENepanet()
         enData.inpfile = join(datadir, "Net1.inp")
@@ -87,5 +113,237 @@ class TestEpanetToolkit(unittest.TestCase):
 
         assert (t == 86400)
 
+    def test_independent_projects(self):
+        enData1 = wntr.epanet.toolkit.ENepanet()
+        enData1.ENopen(join(datadir, "Net1.inp"), "temp.rpt")
+        enData3 = wntr.epanet.toolkit.ENepanet()
+        enData3.ENopen(join(datadir, "Net3.inp"), "temp2.rpt")
+        self.assertEqual(11, enData1.ENgetcount(wntr.epanet.util.EN.NODECOUNT))
+        self.assertEqual(97, enData3.ENgetcount(wntr.epanet.util.EN.NODECOUNT))
+        enData1.ENclose()
+        self.assertEqual(97, enData3.ENgetcount(wntr.epanet.util.EN.NODECOUNT))
+        enData3.ENclose()
+        os.remove("temp2.rpt")
+
+    def test_threads(self):
+        wn = wntr.network.WaterNetworkModel(join(datadir, "Net3.inp"))
+        tmpdir = tempfile.mkdtemp()
+
+        def run(i):
+            sim = wntr.sim.EpanetSimulator(wn)
+            return sim.run_sim(file_prefix=join(tmpdir, "thread" + str(i)))
+
+        try:
+            expected = run("")
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                results = list(executor.map(run, range(8)))
+        finally:
+            shutil.rmtree(tmpdir)
+        for res in results:
+            self.assertTrue((res.node["pressure"] == expected.node["pressure"]).all().all())
+            self.assertTrue((res.link["flowrate"] == expected.link["flowrate"]).all().all())
+
+
+class TestInMemorySimulation(unittest.TestCase):
+
+    def _compare(self, wn, skip=()):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            file_results = wntr.sim.EpanetSimulator(wn).run_sim(file_prefix=join(tmpdir, "temp"))
+        finally:
+            shutil.rmtree(tmpdir)
+        memory_results = wntr.sim.EpanetSimulator(wn).run_sim(in_memory=True)
+        for element in ['node', 'link']:
+            for name, expected in getattr(file_results, element).items():
+                if name in ['reaction_rate', 'friction_factor', 'status'] or name in skip:
+                    continue
+                actual = getattr(memory_results, element)[name]
+                self.assertListEqual(list(expected.index), list(actual.index))
+                self.assertListEqual(list(expected.columns), list(actual.columns))
+                scale = max(1.0, float(np.abs(expected.values).max()))
+                self.assertLess(float(np.abs(expected.values - actual.values).max()), 1e-3 * scale, name)
+        return file_results, memory_results
+
+    def test_Net1_chemical(self):
+        wn = wntr.network.WaterNetworkModel(join(datadir, "Net1.inp"))
+        self._compare(wn)
+
+    def test_Net3_age(self):
+        wn = wntr.network.WaterNetworkModel(join(datadir, "Net3.inp"))
+        wn.options.quality.parameter = 'AGE'
+        # pump 10 is initially closed; the toolkit reports its setting as 0 until it opens
+        self._compare(wn, skip=['setting'])
+
+    def test_accuracy_limits(self):
+        wn = wntr.network.WaterNetworkModel(join(datadir, "Net1.inp"))
+        wn.options.hydraulic.accuracy = 1e-9
+        self._compare(wn)
+
+    def test_no_files_written(self):
+        wn = wntr.network.WaterNetworkModel(join(datadir, "Net1.inp"))
+        tmpdir = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        try:
+            os.chdir(tmpdir)
+            results = wntr.sim.EpanetSimulator(wn).run_sim(in_memory=True)
+            self.assertListEqual(os.listdir(tmpdir), [])
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(tmpdir)
+        self.assertEqual(results.node['pressure'].shape, (25, 11))
+
+    def test_save_hyd_error(self):
+        wn = wntr.network.WaterNetworkModel(join(datadir, "Net1.inp"))
+        sim = wntr.sim.EpanetSimulator(wn)
+        self.assertRaises(ValueError, sim.run_sim, save_hyd=True, in_memory=True)
+
+    def test_gpv(self):
+        wn = wntr.network.WaterNetworkModel(join(testdir, "networks_for_testing", "io.inp"))
+        try:
+            self._compare(wn, skip=['setting', 'head', 'pressure', 'headloss'])
+        except wntr.epanet.toolkit.EpanetException as e:
+            if 'EN_GPV_CURVE' not in str(e):
+                raise
+            self.skipTest(str(e))
+
+    def test_valve_status_controls(self):
+        wn = wntr.network.WaterNetworkModel(join(testdir, "networks_for_testing", "io.inp"))
+        wn.remove_link("v3")
+        valve = wn.get_link("v1")
+        close_action = wntr.network.controls.ControlAction(valve, "status", wntr.network.LinkStatus.Closed)
+        open_action = wntr.network.controls.ControlAction(valve, "status", wntr.network.LinkStatus.Open)
+        condition = wntr.network.controls.SimTimeCondition(wn, "=", 5 * 3600)
+        wn.add_control("close_v1", wntr.network.controls.Control(condition, close_action))
+        condition = wntr.network.controls.TimeOfDayCondition(wn, "=", 10 * 3600)
+        wn.add_control("open_v1", wntr.network.controls.Control(condition, open_action))
+        # heads of the nodes that are disconnected by the closed valves are not defined
+        file_results, results = self._compare(wn, skip=['setting', 'head', 'pressure', 'headloss'])
+        flowrate = results.link["flowrate"]["v1"]
+        self.assertTrue((flowrate.loc[5 * 3600:9 * 3600] == 0).all())
+        self.assertTrue((flowrate.loc[10 * 3600:] > 0).all())
+        tank_head = results.node["head"]["t1"]
+        self.assertLess(float((tank_head - file_results.node["head"]["t1"]).abs().max()), 1e-4)
+
+
+class TestHydraulicsCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = join(self.tmpdir, "cache")
+        self.prefix = join(self.tmpdir, "temp")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_quality_scenarios_reuse_hydraulics(self):
+        wn = wntr.network.WaterNetworkModel(join(datadir, "Net3.inp"))
+        sim = wntr.sim.EpanetSimulator(wn)
+        sim.run_sim(file_prefix=self.prefix, hydraulics_cache=self.cache)
+        hydfiles = os.listdir(self.cache)
+        self.assertEqual(len(hydfiles), 1)
+
+        wn.options.quality.parameter = "TRACE"
+        wn.options.quality.trace_node = "River"
+        wn.options.time.quality_timestep = 60
+        cached = sim.run_sim(file_prefix=self.prefix, hydraulics_cache=self.cache)
+        self.assertListEqual(os.listdir(self.cache), hydfiles)
+        expected = sim.run_sim(file_prefix=self.prefix)
+        self.assertTrue((cached.node["quality"] == expected.node["quality"]).all().all())
+        self.assertTrue((cached.node["pressure"] == expected.node["pressure"]).all().all())
+
+        wn.options.hydraulic.demand_multiplier = 1.1
+        sim.run_sim(file_prefix=self.prefix, hydraulics_cache=self.cache)
+        self.assertEqual(len(os.listdir(self.cache)), 2)
+
+    def test_source_pattern_scenarios_reuse_hydraulics(self):
+        wn = wntr.network.WaterNetworkModel(join(datadir, "Net3.inp"))
+        wn.options.quality.parameter = "CHEMICAL"
+        source_pattern = [0.0] * 24
+        source_pattern[2] = 1.0
+        wn.add_pattern("SourcePattern", source_pattern)
+        wn.add_source("Source1", "121", "SETPOINT", 100, "SourcePattern")
+        sim = wntr.sim.EpanetSimulator(wn)
+        sim.run_sim(file_prefix=self.prefix, hydraulics_cache=self.cache)
+        hydfiles = os.listdir(self.cache)
+        self.assertEqual(len(hydfiles), 1)
+
+        # start the injection at a different time
+        wn.get_pattern("SourcePattern").multipliers = source_pattern[-5:] + source_pattern[:-5]
+        cached = sim.run_sim(file_prefix=self.prefix, hydraulics_cache=self.cache)
+        self.assertListEqual(os.listdir(self.cache), hydfiles)
+        expected = sim.run_sim(file_prefix=self.prefix)
+        self.assertTrue((cached.node["quality"] == expected.node["quality"]).all().all())
+        self.assertTrue((cached.node["pressure"] == expected.node["pressure"]).all().all())
+
+        # a pattern that is also used by a demand changes the hydraulics
+        wn.get_node("121").demand_timeseries_list[0].pattern_name = "SourcePattern"
+        sim.run_sim(file_prefix=self.prefix, hydraulics_cache=self.cache)
+        self.assertEqual(len(os.listdir(self.cache)), 2)
+
+    def test_errors(self):
+        wn = wntr.network.WaterNetworkModel(join(datadir, "Net1.inp"))
+        sim = wntr.sim.EpanetSimulator(wn)
+        self.assertRaises(ValueError, sim.run_sim, file_prefix=self.prefix, save_hyd=True,
+                          hydraulics_cache=self.cache)
+        self.assertRaises(ValueError, sim.run_sim, in_memory=True, hydraulics_cache=self.cache)
+
+
+class TestEpanetSession(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.wn = wntr.network.WaterNetworkModel(join(datadir, "Net3.inp"))
+        self.wn.options.quality.parameter = "NONE"
+
+    def _assert_same_hydraulics(self, session_results, modify):
+        wn = wntr.network.WaterNetworkModel(join(datadir, "Net3.inp"))
+        wn.options.quality.parameter = "NONE"
+        modify(wn)
+        tmpdir = tempfile.mkdtemp()
+        try:
+            expected = wntr.sim.EpanetSimulator(wn).run_sim(file_prefix=join(tmpdir, "temp"))
+        finally:
+            shutil.rmtree(tmpdir)
+        for name in ["pressure", "head", "demand"]:
+            self.assertLess(float((session_results.node[name] - expected.node[name]).abs().max().max()), 1e-3)
+        self.assertLess(float((session_results.link["flowrate"] - expected.link["flowrate"]).abs().max().max()), 1e-6)
+
+    def test_setters(self):
+        def multiplier(wn):
+            wn.options.hydraulic.demand_multiplier = 1.5
+
+        def status(wn):
+            multiplier(wn)
+            wn.get_link("101").initial_status = wntr.network.LinkStatus.Closed
+
+        def emitter(wn):
+            status(wn)
+            wn.get_node("123").emitter_coefficient = 0.01
+
+        def pattern(wn):
+            emitter(wn)
+            wn.get_pattern("1").multipliers = [1.2] * 24
+
+        with wntr.sim.EpanetSession(self.wn) as session:
+            self._assert_same_hydraulics(session.run_sim(), lambda wn: None)
+            session.set_demand_multiplier(1.5)
+            self._assert_same_hydraulics(session.run_sim(), multiplier)
+            session.set_link_status({"101": "Closed"})
+            self._assert_same_hydraulics(session.run_sim(), status)
+            session.set_emitter_coefficients({"123": 0.01})
+            self._assert_same_hydraulics(session.run_sim(), emitter)
+            session.set_pattern("1", [1.2] * 24)
+            self._assert_same_hydraulics(session.run_sim(), pattern)
+        # the water network model is not modified
+        self.assertEqual(self.wn.options.hydraulic.demand_multiplier, 1.0)
+
+    def test_errors(self):
+        session = wntr.sim.EpanetSession(self.wn)
+        self.assertRaises(ValueError, session.set_link_status, {"10": "Active"})
+        session.close()
+        self.assertFalse(session.is_open)
+        self.assertRaises(RuntimeError, session.run_sim)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,7 +1,9 @@
 # These tests test controls
+import random
 import unittest
 import warnings
 from os.path import abspath, dirname, join
+from unittest import mock
 
 import wntr
 
@@ -473,5 +475,251 @@ class TestControlCombinations(unittest.TestCase):
         self.assertEqual(flag1, True)
 
 
+class TestControlManager(unittest.TestCase):
+    def setUp(self):
+        wn = wntr.network.WaterNetworkModel()
+        wn.add_reservoir("r1", base_head=10)
+        wn.add_junction("j1", base_demand=0)
+        wn.add_pipe("p1", "r1", "j1")
+        wn.add_pipe("p2", "r1", "j1")
+        self.wn = wn
+        self.junction = wn.get_node("j1")
+        self.junction._pressure = 20.0
+
+        self.evaluations = 0
+        condition = wntr.network.ValueCondition(self.junction, "pressure", "<", 10)
+        evaluate = condition.evaluate
+
+        def counting_evaluate():
+            self.evaluations += 1
+            return evaluate()
+
+        condition.evaluate = counting_evaluate
+        action = wntr.network.ControlAction(wn.get_link("p1"), "status", wntr.network.LinkStatus.Closed)
+        self.pressure_control = wntr.network.Control(condition, action)
+        action = wntr.network.ControlAction(wn.get_link("p2"), "status", wntr.network.LinkStatus.Closed)
+        self.time_control = wntr.network.Control(wntr.network.SimTimeCondition(wn, ">", 1800), action)
+
+        self.manager = wntr.network.ControlManager()
+        self.manager.register_control(self.time_control)
+        self.manager.register_control(self.pressure_control)
+
+    def test_only_changed_inputs_are_evaluated(self):
+        self.assertEqual(self.manager.check(), [])
+        self.assertEqual(self.evaluations, 1)
+        self.assertEqual(self.manager.check(), [])
+        self.assertEqual(self.evaluations, 1)
+
+        self.junction._pressure = 5.0
+        self.assertEqual(self.manager.check(), [(self.pressure_control, 0)])
+        self.assertEqual(self.evaluations, 2)
+        self.assertEqual(self.manager.check(), [(self.pressure_control, 0)])
+        self.assertEqual(self.evaluations, 2)
+
+        # time conditions are evaluated at every check; controls are returned in registration order
+        self.wn.sim_time = 3600
+        self.assertEqual(self.manager.check(), [(self.time_control, 0), (self.pressure_control, 0)])
+        self.assertEqual(self.evaluations, 2)
+
+    def test_deregister(self):
+        self.junction._pressure = 5.0
+        self.assertEqual(self.manager.check(), [(self.pressure_control, 0)])
+        self.manager.deregister(self.pressure_control)
+        self.assertEqual(self.manager.check(), [])
+        self.assertEqual(list(self.manager), [self.time_control])
+
+    def test_changes(self):
+        self.manager.reset()
+        self.junction._pressure = 5.0
+        for control, backtrack in self.manager.check():
+            control.run_control_action()
+        self.assertTrue(self.manager.changes_made())
+        self.assertEqual(list(self.manager.get_changes()), [(self.wn.get_link("p1"), "status")])
+        self.manager.reset()
+        self.assertFalse(self.manager.changes_made())
+
+
+class TestCompiledConditions(unittest.TestCase):
+    def setUp(self):
+        inp_file = join(ex_datadir, "Net3.inp")
+        self.wn = wntr.network.WaterNetworkModel(inp_file)
+        self.junctions = [node for name, node in self.wn.junctions()]
+        self.links = [link for name, link in self.wn.links()]
+        random.seed(0)
+
+    def _randomize(self):
+        for junction in self.junctions:
+            junction._pressure = random.choice([float(10 * random.randint(0, 5)), random.uniform(-5, 50)])
+        for link in self.links:
+            link._user_status = random.choice([wntr.network.LinkStatus.Open, wntr.network.LinkStatus.Closed])
+
+    def test_compiled_conditions_match_evaluate(self):
+        relations = ["<", "<=", ">", ">=", "=", "!="]
+        values = []
+        for i, junction in enumerate(self.junctions):
+            values.append(wntr.network.ValueCondition(junction, "pressure", relations[i % 6], 10 * (i % 5)))
+        for i, link in enumerate(self.links):
+            values.append(wntr.network.ValueCondition(link, "status", relations[4 + i % 2], wntr.network.LinkStatus.Closed))
+        relative = []
+        for i, junction in enumerate(self.junctions):
+            relative.append(wntr.network.RelativeCondition(junction, "pressure", relations[i % 6], self.junctions[-i - 1], "pressure"))
+        combined = []
+        for i in range(len(relative)):
+            cond1 = values[i]
+            cond2 = relative[i] if i % 3 else values[-i - 1]
+            combined.append(wntr.network.AndCondition(cond1, cond2) if i % 2 else wntr.network.OrCondition(cond1, cond2))
+        for conditions in [values, relative, combined]:
+            func = wntr.network.controls._compile_conditions(conditions)
+            for trial in range(50):
+                self._randomize()
+                self.assertEqual(func().tolist(), [c.evaluate() for c in conditions])
+
+            # missing values cannot be evaluated at once
+            self.junctions[0]._pressure = None
+            self.assertRaises(ValueError, func)
+
+    def test_conditions_that_cannot_be_compiled(self):
+        tank = self.wn.get_node("1")
+        conditions = [
+            wntr.network.AndCondition(wntr.network.ValueCondition(self.junctions[0], "pressure", ">", 10),
+                                      wntr.network.SimTimeCondition(self.wn, ">", 3600)),
+            wntr.network.OrCondition(wntr.network.ValueCondition(self.junctions[0], "pressure", ">", 10),
+                                     wntr.network.TankLevelCondition(tank, "level", "<", 5)),
+        ]
+        for condition in conditions:
+            self.assertIsNone(type(condition)._compile([condition]))
+
+    def test_same_results_as_evaluating_each_control(self):
+        def build_network():
+            inp_file = join(ex_datadir, "Net3.inp")
+            wn = wntr.network.WaterNetworkModel(inp_file)
+            # junction pressures are not available before the first solve
+            wn.options.time.duration = 0
+            wntr.sim.WNTRSimulator(wn).run_sim()
+            junctions = [junction for name, junction in wn.junctions()]
+            initial_values = [(junction.head, junction.pressure) for junction in junctions]
+            wn.reset_initial_values()
+            for junction, (head, pressure) in zip(junctions, initial_values):
+                junction._head = head
+                junction._pressure = pressure
+            wn.options.time.duration = 24 * 3600
+            for i in range(40):
+                junction = junctions[i]
+                condition = wntr.network.ValueCondition(junction, "pressure", "<", junction.pressure - 0.5 * (i % 5))
+                if i % 2:
+                    other = junctions[-i - 1]
+                    condition = wntr.network.AndCondition(
+                        condition, wntr.network.RelativeCondition(junction, "head", ">", other, "head")
+                    )
+                link = wn.get_link(wn.pipe_name_list[i])
+                action = wntr.network.ControlAction(link, "status", wntr.network.LinkStatus.Closed)
+                wn.add_control("r%d" % i, wntr.network.Rule(condition, [action], name="r%d" % i))
+            return wn
+
+        manager = wntr.network.ControlManager
+        results = wntr.sim.WNTRSimulator(build_network()).run_sim()
+        min_compiled = manager._min_compiled
+        manager._min_compiled = float("inf")
+        try:
+            expected = wntr.sim.WNTRSimulator(build_network()).run_sim()
+        finally:
+            manager._min_compiled = min_compiled
+
+        self.assertEqual(len(results.time), 97)
+        self.assertLess((results.node["head"] - expected.node["head"]).abs().max().max(), 1e-6)
+        self.assertTrue((results.link["status"] == expected.link["status"]).all().all())
+        # some of the rules closed their pipes
+        self.assertTrue((results.link["status"] == wntr.network.LinkStatus.Closed).any().any())
+
+
+class TestRuleTimestepSkipping(unittest.TestCase):
+    def _build_network(self):
+        inp_file = join(ex_datadir, "Net3.inp")
+        wn = wntr.network.WaterNetworkModel(inp_file)
+        wn.options.time.duration = 30 * 3600
+        wn.options.time.rule_timestep = 7
+        wn.options.time.start_clocktime = 13 * 3600 + 17
+
+        tank = wn.get_node("1")
+        rules = [
+            (
+                wntr.network.ValueCondition(tank, "level", "<=", tank.init_level - 0.5),
+                "147",
+            ),
+            (wntr.network.TimeOfDayCondition(wn, None, "8:09 PM"), "137"),
+            (
+                wntr.network.AndCondition(
+                    wntr.network.TimeOfDayCondition(wn, "after", "5:00 PM"),
+                    wntr.network.ValueCondition(wn.get_node("2"), "level", "<=", 6.6),
+                ),
+                "135",
+            ),
+            (wntr.network.SimTimeCondition(wn, ">=", 20 * 3600 + 13, repeat=6 * 3600), "129"),
+        ]
+        for i, (condition, link_name) in enumerate(rules):
+            link = wn.get_link(link_name)
+            then_action = wntr.network.ControlAction(link, "status", wntr.network.LinkStatus.Closed)
+            else_action = wntr.network.ControlAction(link, "status", wntr.network.LinkStatus.Open)
+            rule = wntr.network.Rule(condition, [then_action], [else_action], name="rule" + str(i))
+            wn.add_control(rule.name, rule)
+        return wn
+
+    def test_same_results_as_checking_every_rule_timestep(self):
+        wn = self._build_network()
+        sim = wntr.sim.WNTRSimulator(wn)
+        results = sim.run_sim()
+
+        wn = self._build_network()
+        sim = wntr.sim.WNTRSimulator(wn)
+        sim._skip_rule_timesteps = lambda max_rule_iter: None
+        expected = sim.run_sim()
+
+        self.assertEqual(list(results.node["head"].index), list(expected.node["head"].index))
+        self.assertLess((results.node["head"] - expected.node["head"]).abs().max().max(), 1e-6)
+        self.assertTrue((results.link["status"] == expected.link["status"]).all().all())
+
+    def test_next_change_time(self):
+        wn = wntr.network.WaterNetworkModel()
+        wn.options.time.start_clocktime = 3600
+        condition = wntr.network.TimeOfDayCondition(wn, "after", "6:00 AM")
+        self.assertEqual(condition._next_change_time(0), 5 * 3600 - 1)
+        self.assertEqual(condition._next_change_time(5 * 3600), 5 * 3600)
+        condition = wntr.network.SimTimeCondition(wn, ">=", 3600)
+        self.assertEqual(condition._next_change_time(0), 3600)
+        self.assertEqual(condition._next_change_time(7200), float("inf"))
+
+
 if __name__ == "__main__":
     unittest.main()
+
+
+class TestIsolatedJunctions(unittest.TestCase):
+    def test_isolated_junctions_only_searched_when_links_open_or_close(self):
+        wn = wntr.network.WaterNetworkModel()
+        wn.add_reservoir("r1", base_head=50)
+        wn.add_junction("j1", base_demand=0.01)
+        wn.add_junction("j2", base_demand=0.01)
+        wn.add_junction("j3", base_demand=0.01)
+        wn.add_pipe("p1", "r1", "j1")
+        wn.add_pipe("p2", "j1", "j2")
+        wn.add_pipe("p3", "r1", "j3")
+        wn.options.time.duration = 6 * 3600
+        wn.options.time.hydraulic_timestep = 3600
+        wn.options.time.report_timestep = 3600
+        p1 = wn.get_link("p1")
+        for name, (time, status) in {"close": (2 * 3600, "Closed"), "open": (4 * 3600, "Open")}.items():
+            condition = wntr.network.SimTimeCondition(wn, "=", time)
+            action = wntr.network.ControlAction(p1, "status", wntr.network.LinkStatus[status])
+            wn.add_control(name, wntr.network.Control(condition, action))
+
+        with mock.patch("wntr.sim.core.check_for_isolated_junctions",
+                        wraps=wntr.sim.core.check_for_isolated_junctions) as search:
+            results = wntr.sim.WNTRSimulator(wn).run_sim()
+        # once at the start, once after p1 closes, and once after p1 opens
+        self.assertEqual(search.call_count, 3)
+
+        for t in results.time:
+            isolated = 2 * 3600 <= t < 4 * 3600
+            for name in ["j1", "j2"]:
+                self.assertEqual(results.node["demand"].at[t, name] == 0, isolated)
+            self.assertAlmostEqual(results.node["demand"].at[t, "j3"], 0.01)
@@ -0,0 +1,77 @@
+import unittest
+from os.path import abspath, dirname, join
+
+import wntr
+from wntr.sim import BatchScenario
+
+testdir = dirname(abspath(str(__file__)))
+ex_datadir = join(testdir, "..", "..", "examples", "networks")
+
+
+def _make_network():
+    wn = wntr.network.WaterNetworkModel(join(ex_datadir, "Net1.inp"))
+    wn.options.time.duration = 12 * 3600
+    wn.options.hydraulic.demand_model = 'PDD'
+    return wn
+
+
+def _make_scenarios():
+    return [BatchScenario('base'),
+            BatchScenario('closed', closed_links=['122']),
+            BatchScenario('closed_later', closed_links=['110'], closure_time=4 * 3600),
+            BatchScenario('multiplier', demand_multiplier=1.5),
+            BatchScenario('leak', leaks={'23': dict(area=0.01, start_time=3 * 3600, end_time=9 * 3600)}),
+            BatchScenario('base_again')]
+
+
+class TestRunBatch(unittest.TestCase):
+    def _compare(self, model_backend):
+        wn = _make_network()
+        sim = wntr.sim.WNTRSimulator(wn)
+        batch_results = sim.run_batch(_make_scenarios(), model_backend=model_backend)
+        self.assertEqual(list(batch_results.keys()), [s.name for s in _make_scenarios()])
+
+        for scenario in _make_scenarios():
+            wn = _make_network()
+            scenario.apply(wn)
+            wn.reset_initial_values()
+            sim = wntr.sim.WNTRSimulator(wn)
+            results = sim.run_sim(model_backend=model_backend)
+            batch_res = batch_results[scenario.name]
+            self.assertEqual(list(results.time), list(batch_res.time))
+            for key in ['head', 'demand', 'pressure', 'leak_demand']:
+                diff = (results.node[key] - batch_res.node[key]).abs().max().max()
+                self.assertLess(diff, 1e-4, (scenario.name, key))
+            for key in ['flowrate', 'status']:
+                diff = (results.link[key] - batch_res.link[key]).abs().max().max()
+                self.assertLess(diff, 1e-6, (scenario.name, key))
+
+        self.assertGreater(batch_results['leak'].node['leak_demand']['23'].max(), 0)
+        self.assertEqual(batch_results['closed'].link['status']['122'].max(), 0)
+
+    def test_aml(self):
+        self._compare('aml')
+
+    def test_vectorized(self):
+        self._compare('vectorized')
+
+    def test_network_restored(self):
+        wn = _make_network()
+        num_controls = len(wn.control_name_list)
+        status = wn.get_link('122').initial_status
+        sim = wntr.sim.WNTRSimulator(wn)
+        sim.run_batch(_make_scenarios())
+        self.assertEqual(len(wn.control_name_list), num_controls)
+        self.assertEqual(wn.get_link('122').initial_status, status)
+        self.assertEqual(wn.options.hydraulic.demand_multiplier, 1.0)
+        self.assertFalse(wn.get_node('23')._leak)
+
+    def test_duplicate_names(self):
+        wn = _make_network()
+        sim = wntr.sim.WNTRSimulator(wn)
+        with self.assertRaises(ValueError):
+            sim.run_batch([BatchScenario('a'), BatchScenario('a')])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import unittest
+from os.path import abspath, dirname, join
+
+import wntr
+from wntr.sim.ensemble import Ensemble, SelectResults, SummaryStatistics, run_ensemble
+
+testdir = dirname(abspath(str(__file__)))
+ex_datadir = join(testdir, "..", "..", "examples", "networks")
+
+
+def _make_network():
+    wn = wntr.network.WaterNetworkModel(join(ex_datadir, "Net1.inp"))
+    wn.options.time.duration = 6 * 3600
+    return wn
+
+
+def _scale_demands(wn, multiplier):
+    if multiplier < 0:
+        raise ValueError('negative multiplier')
+    wn.options.hydraulic.demand_multiplier = multiplier
+
+
+def _exit_worker(wn, multiplier):
+    if multiplier < 0:
+        os._exit(1)
+    _scale_demands(wn, multiplier)
+
+
+def _close_pipe_10(wn):
+    wn.get_link('10').initial_status = wntr.network.LinkStatus.Closed
+    wn.reset_initial_values()
+
+
+class TestEnsemble(unittest.TestCase):
+    def _expected(self, multiplier):
+        wn = _make_network()
+        _scale_demands(wn, multiplier)
+        return wntr.sim.WNTRSimulator(wn).run_sim()
+
+    def test_select_results(self):
+        members = [0.5, 1.0, 1.5]
+        reducer = SelectResults(node={'pressure': ['10', '22']}, link={'flowrate': None})
+        for num_workers in [0, 2]:
+            results = run_ensemble(_make_network(), members, modifier=_scale_demands, reducer=reducer,
+                                   num_workers=num_workers)
+            self.assertEqual([res.index for res in results], [0, 1, 2])
+            for res, multiplier in zip(results, members):
+                self.assertTrue(res.success)
+                self.assertEqual(res.member, multiplier)
+                expected = self._expected(multiplier)
+                pressure = res.value[('node', 'pressure')]
+                self.assertEqual(list(pressure.columns), ['10', '22'])
+                diff = (pressure - expected.node['pressure'].loc[:, ['10', '22']]).abs().max().max()
+                self.assertLess(diff, 1e-6)
+                self.assertEqual(res.value[('link', 'flowrate')].shape, expected.link['flowrate'].shape)
+
+    def test_summary_statistics(self):
+        reducer = SummaryStatistics(node={'pressure': None}, statistics=['min', 'max'])
+        ensemble = Ensemble(_make_network(), modifier=_scale_demands, reducer=reducer, num_workers=2, chunksize=2)
+        results = ensemble.run([1.0, 1.2, 0.8])
+        expected = self._expected(1.2).node['pressure']
+        stats = results[1].value[('node', 'pressure')]
+        self.assertEqual(list(stats.index), ['min', 'max'])
+        self.assertLess((stats.loc['min'] - expected.min()).abs().max(), 1e-6)
+        self.assertLess((stats.loc['max'] - expected.max()).abs().max(), 1e-6)
+
+    def test_failures_are_captured(self):
+        results = run_ensemble(_make_network(), [1.0, -1.0, 1.0], modifier=_scale_demands, num_workers=2)
+        self.assertEqual([res.success for res in results], [True, False, True])
+        self.assertIsNone(results[1].value)
+        self.assertIn('negative multiplier', results[1].error)
+        self.assertIsInstance(results[0].value, wntr.sim.SimulationResults)
+
+    def test_worker_crash(self):
+        results = run_ensemble(_make_network(), [1.0, -1.0, 1.0, 1.0, 1.0, 1.0], modifier=_exit_worker,
+                               num_workers=1, max_pending=2)
+        self.assertEqual([res.index for res in results], [0, 1, 2, 3, 4, 5])
+        self.assertFalse(results[1].success)
+        self.assertIn('BrokenProcessPool', results[1].error)
+        # the members after the crash are simulated by a new worker process
+        self.assertTrue(results[0].success)
+        self.assertTrue(all(res.success for res in results[3:]))
+
+    def test_members_are_consumed_lazily(self):
+        consumed = list()
+
+        def members():
+            for multiplier in [1.0] * 20:
+                consumed.append(multiplier)
+                yield multiplier
+
+        ensemble = Ensemble(_make_network(), modifier=_scale_demands, reducer=SelectResults(), num_workers=1,
+                            max_pending=2)
+        results = ensemble.imap(members())
+        self.assertTrue(next(results).success)
+        self.assertLessEqual(len(consumed), 3)
+        results.close()
+        self.assertLessEqual(len(consumed), 3)
+
+    def test_callable_members_and_epanet(self):
+        wn = _make_network()
+        reducer = SelectResults(link={'flowrate': ['10']})
+        results = run_ensemble(wn, [None, _close_pipe_10], simulator='EPANET', reducer=reducer, num_workers=2)
+        self.assertTrue(all(res.success for res in results))
+        self.assertGreater(results[0].value[('link', 'flowrate')]['10'].abs().max(), 0)
+        self.assertEqual(results[1].value[('link', 'flowrate')]['10'].abs().max(), 0)
+        # the original network is not modified
+        self.assertEqual(wn.get_link('10').initial_status, wntr.network.LinkStatus.Open)
+
+
+if __name__ == "__main__":
+    unittest.main()
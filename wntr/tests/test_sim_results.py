@@ -1,6 +1,12 @@
+import math
+import random
+import shutil
+import tempfile
 import unittest
+from unittest import mock
 from os.path import abspath, dirname, join
 #import matplotlib.pylab as plt
+import numpy as np
 import wntr
 
 testdir = dirname(abspath(str(__file__)))
@@ -47,6 +53,157 @@ class TestSimulationResults(unittest.TestCase):
  
 
 
+class TestResultsBuffer(unittest.TestCase):
+
+    def test_growth(self):
+        wn = wntr.network.WaterNetworkModel(join(datadir, "Net1.inp"))
+        wn.options.time.duration = 3600
+        node_res, link_res = wntr.sim.hydraulics.initialize_results_dict(wn)
+        self.assertEqual(node_res.data['head'].shape, (2, wn.num_nodes))
+        for i in range(5):
+            row = node_res.next_row()
+            node_res.data['head'][row] = i
+        self.assertEqual(node_res.num_times, 5)
+        self.assertEqual(node_res['head'].shape, (5, wn.num_nodes))
+        df = node_res.to_dataframes(list(range(5)))['head']
+        self.assertEqual(list(df.columns), wn.junction_name_list + wn.tank_name_list + wn.reservoir_name_list)
+        self.assertEqual(list(df.iloc[:, 0]), [0, 1, 2, 3, 4])
+
+    def test_report_all(self):
+        wn = wntr.network.WaterNetworkModel(join(datadir, "Net1.inp"))
+        wn.options.time.duration = 6 * 3600
+        wn.options.time.report_timestep = 'ALL'
+        sim = wntr.sim.WNTRSimulator(wn)
+        results = sim.run_sim()
+        self.assertGreaterEqual(len(results.time), 7)
+        for key, df in results.node.items():
+            self.assertEqual(df.shape, (len(results.time), wn.num_nodes))
+        self.assertEqual(results.link['status'].dtypes.iloc[0], int)
+
+
+class TestStoreResultsInNetwork(unittest.TestCase):
+
+    def test_source_demands(self):
+        for model_backend in ['aml', 'vectorized']:
+            wn = wntr.network.WaterNetworkModel(join(datadir, "Net3.inp"))
+            wn.options.time.duration = 0
+            wn.get_node('123').add_leak(wn, area=0.001, start_time=0)
+            sim = wntr.sim.WNTRSimulator(wn)
+            sim.run_sim(model_backend=model_backend)
+            for name, node in list(wn.tanks()) + list(wn.reservoirs()):
+                inflow = sum(wn.get_link(l).flow for l in wn.get_links_for_node(name, 'INLET'))
+                outflow = sum(wn.get_link(l).flow for l in wn.get_links_for_node(name, 'OUTLET'))
+                self.assertAlmostEqual(node.demand, inflow - outflow)
+            junction = wn.get_node('123')
+            self.assertAlmostEqual(junction.leak_demand, sim._model.leak_rate['123'].value)
+            self.assertGreater(junction.leak_demand, 0)
+            self.assertAlmostEqual(junction.pressure, junction.head - junction.elevation)
+
+
+class TestUpdateTankHeads(unittest.TestCase):
+
+    def _expected_head(self, wn, tank):
+        dV = tank.demand * (wn.sim_time - wn._prev_sim_time)
+        if tank.vol_curve is None:
+            return tank._prev_head + 4.0 * dV / (math.pi * tank.diameter ** 2)
+        vcurve = np.array(sorted(tank.vol_curve.points))
+        if tank.head == tank._prev_head:
+            cur_level = tank.level
+        else:
+            cur_level = tank._prev_head - (tank.head - tank.level)
+        V1 = np.interp(cur_level, vcurve[:, 0], vcurve[:, 1]) + dV
+        return tank._prev_head + (np.interp(V1, vcurve[:, 1], vcurve[:, 0]) - cur_level)
+
+    def test_update_tank_heads(self):
+        wn = wntr.network.WaterNetworkModel(join(datadir, "Net3.inp"))
+        for i in range(6):
+            wn.add_tank("t%d" % i, elevation=10.0 * i, init_level=3, min_level=0, max_level=40, diameter=10 + i)
+        # the points of a volume curve do not have to be sorted
+        wn.add_curve("vc1", "VOLUME", [(0, 0), (10, 3000), (5, 500), (40, 30000), (20, 9000)])
+        wn.add_curve("vc2", "VOLUME", [(0, 0), (40, 20000)])
+        for name, curve_name in [("1", "vc1"), ("t1", "vc1"), ("t3", "vc1"), ("t4", "vc2")]:
+            wn.get_node(name).vol_curve_name = curve_name
+
+        ndx = wntr.sim.hydraulics._TankHeadIndex(wn)
+        random.seed(0)
+        for trial in range(20):
+            wn._prev_sim_time = 3600.0 * trial
+            wn.sim_time = wn._prev_sim_time + random.choice([60, 900, 3600])
+            expected = dict()
+            for name, tank in wn.tanks():
+                tank._prev_head = tank.elevation + random.uniform(1, 35)
+                # the head may already have been updated since the previous time step
+                tank._head = random.choice([tank._prev_head, tank._prev_head + random.uniform(-1, 1)])
+                tank._demand = random.uniform(-0.1, 0.1)
+                expected[name] = self._expected_head(wn, tank)
+            wntr.sim.hydraulics.update_tank_heads(wn, ndx if trial % 2 else None)
+            for name, tank in wn.tanks():
+                self.assertAlmostEqual(tank.head, expected[name], 10)
+
+
+class TestNpyResultsSink(unittest.TestCase):
+
+    def _run(self, results_sink=None):
+        wn = wntr.network.WaterNetworkModel(join(datadir, "Net1.inp"))
+        wn.options.time.duration = 12 * 3600
+        sim = wntr.sim.WNTRSimulator(wn)
+        return sim.run_sim(results_sink=results_sink)
+
+    def _compare(self, results1, results2):
+        self.assertEqual(list(results1.time), list(results2.time))
+        for element in ['node', 'link']:
+            res1 = getattr(results1, element)
+            res2 = getattr(results2, element)
+            self.assertEqual(list(res1.keys()), list(res2.keys()))
+            for key in res1.keys():
+                self.assertEqual(list(res1[key].columns), list(res2[key].columns))
+                self.assertEqual(list(res1[key].index), list(res2[key].index))
+                self.assertLess((res1[key] - res2[key]).abs().max().max(), 1e-8)
+
+    def test_sink(self):
+        expected = self._run()
+        for keep_in_memory in [False, True]:
+            directory = tempfile.mkdtemp()
+            try:
+                sink = wntr.sim.results.NpyResultsSink(directory, keep_in_memory=keep_in_memory)
+                results = self._run(sink)
+                self._compare(expected, results)
+                loaded = wntr.sim.results.load_npy_results(directory)
+                self._compare(expected, loaded)
+                self.assertEqual(loaded.link['status'].dtypes.iloc[0], int)
+                del results, loaded
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    def test_sink_closed_on_error(self):
+        wn = wntr.network.WaterNetworkModel(join(datadir, "Net1.inp"))
+        wn.options.time.duration = 12 * 3600
+        sim = wntr.sim.WNTRSimulator(wn)
+        solver_helper = wntr.sim.core._solver_helper
+        num_calls = [0]
+
+        def failing_solver_helper(model, solver, solver_options, x_guess=None):
+            # the solver fails after the first few time steps
+            num_calls[0] += 1
+            if num_calls[0] > 5:
+                return wntr.sim.solvers.SolverStatus.error, 'forced failure', 0
+            return solver_helper(model, solver, solver_options, x_guess=x_guess)
+
+        directory = tempfile.mkdtemp()
+        try:
+            sink = wntr.sim.results.NpyResultsSink(directory)
+            with mock.patch('wntr.sim.core._solver_helper', failing_solver_helper):
+                with self.assertRaises(RuntimeError):
+                    sim.run_sim(results_sink=sink, convergence_error=True)
+            head = np.load(join(directory, "node", "head.npy"))
+            self.assertGreater(head.shape[0], 0)
+            self.assertEqual(head.shape[1], len(wn.node_name_list))
+            self.assertTrue(np.all(np.isfinite(head)))
+            del head
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
 if __name__ == "__main__":
     unittest.main()
 
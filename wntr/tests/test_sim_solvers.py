@@ -0,0 +1,318 @@
+import unittest
+from unittest import mock
+from os.path import abspath, dirname, join
+
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg
+import wntr
+from wntr.sim.core import _WarmStart
+from wntr.sim.models.vectorized import create_vectorized_hydraulic_model
+from wntr.sim.solvers import _LUFactorizationCache, _get_linear_solver, _cholesky, _umfpack, GGASolver
+
+testdir = dirname(abspath(str(__file__)))
+ex_datadir = join(testdir, "..", "..", "examples", "networks")
+
+
+class TestLUFactorizationCache(unittest.TestCase):
+    def test_reuse_permutation(self):
+        np.random.seed(0)
+        A = (sp.random(30, 30, 0.1, format='csr') + 5 * sp.eye(30)).tocsr()
+        b = np.random.rand(30)
+        cache = _LUFactorizationCache()
+
+        cache.factorize(A, key=1)
+        x = cache.solve(b)
+        self.assertTrue(np.allclose(A.dot(x), b))
+        perm_c = cache._perm_c
+
+        # same structure, new values
+        A.data *= 2.0
+        cache.factorize(A, key=1)
+        x = cache.solve(b)
+        self.assertTrue(np.allclose(A.dot(x), b))
+        self.assertIs(cache._perm_c, perm_c)
+
+        # new key, but the same sparsity pattern
+        cache.factorize(A, key=2)
+        x = cache.solve(b)
+        self.assertTrue(np.allclose(A.dot(x), b))
+        self.assertIs(cache._perm_c, perm_c)
+
+        # new sparsity pattern
+        A = (A + sp.eye(30, k=1)).tocsr()
+        cache.factorize(A, key=3)
+        x = cache.solve(b)
+        self.assertTrue(np.allclose(A.dot(x), b))
+        self.assertIsNot(cache._perm_c, perm_c)
+
+    def test_singular(self):
+        A = sp.csr_matrix(np.array([[1.0, 1.0], [1.0, 1.0]]))
+        cache = _LUFactorizationCache()
+        with self.assertRaises(RuntimeError):
+            cache.factorize(A)
+
+
+class TestLinearSolvers(unittest.TestCase):
+    def _available(self):
+        names = ['superlu', 'splu_fixed_perm', 'krylov']
+        if _umfpack is not None:
+            names.append('umfpack')
+        if _cholesky is not None:
+            names.append('cholmod')
+        return names
+
+    def test_solve(self):
+        np.random.seed(0)
+        A = (sp.random(50, 50, 0.1, format='csr') + 5 * sp.eye(50)).tocsr()
+        A = (A + A.T).tocsr()  # symmetric positive definite so that cholmod can be tested too
+        b = np.random.rand(50)
+        for name in self._available():
+            linear_solver = _get_linear_solver(name)
+            linear_solver.factorize(A)
+            x = linear_solver.solve(b)
+            self.assertTrue(np.allclose(A.dot(x), b), name)
+            # the factorization can be reused with another right hand side
+            x = linear_solver.solve(2 * b)
+            self.assertTrue(np.allclose(A.dot(x), 2 * b), name)
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            _get_linear_solver('foo')
+
+    def test_newton(self):
+        results = dict()
+        for name in ['superlu', 'splu_fixed_perm', 'krylov']:
+            wn = wntr.network.WaterNetworkModel(join(ex_datadir, "Net1.inp"))
+            wn.options.time.duration = 6 * 3600
+            sim = wntr.sim.WNTRSimulator(wn)
+            results[name] = sim.run_sim(solver_options={'LINEAR_SOLVER': name})
+        for name in ['superlu', 'krylov']:
+            head_diff = (results['splu_fixed_perm'].node['head'] - results[name].node['head']).abs().max().max()
+            self.assertLess(head_diff, 1e-4)
+
+
+class TestWarmStart(unittest.TestCase):
+    def test_results_unchanged(self):
+        inp_file = join(ex_datadir, "Net3.inp")
+        results = dict()
+        for warm_start in [None, 'linear', 'quadratic']:
+            wn = wntr.network.WaterNetworkModel(inp_file)
+            wn.options.time.duration = 12 * 3600
+            sim = wntr.sim.WNTRSimulator(wn)
+            results[warm_start] = sim.run_sim(warm_start=warm_start)
+        for warm_start in ['linear', 'quadratic']:
+            head_diff = (results[None].node['head'] - results[warm_start].node['head']).abs().max().max()
+            flow_diff = (results[None].link['flowrate'] - results[warm_start].link['flowrate']).abs().max().max()
+            self.assertLess(head_diff, 1e-4)
+            self.assertLess(flow_diff, 1e-5)
+
+    def test_extrapolation(self):
+        wn = wntr.network.WaterNetworkModel(join(ex_datadir, "Net1.inp"))
+        m, updater = create_vectorized_hydraulic_model(wn)
+        x0 = m.get_x()
+        slope = np.linspace(0.1, 1.0, len(x0))
+        ws = _WarmStart(m, order=1)
+
+        # constant demands; the solution changes linearly in time
+        for t in [0.0, 3600.0]:
+            m.load_var_values_from_x(x0 + slope * t / 3600.0)
+            ws.record(t)
+        weights = ws._get_weights(7200.0)
+        x = sum(w * h[2] for w, h in zip(weights, ws._history))
+        self.assertTrue(np.allclose(x, x0 + 2 * slope))
+
+        # the demands change; the solution changes linearly with the total demand and with time
+        m.total_expected_demand *= 1.5
+        weights = ws._get_weights(10800.0)
+        self.assertIsNone(weights)  # not enough history to separate the effects of demand and time
+        m.load_var_values_from_x(x0 + 2 * slope + 0.5)
+        ws.record(7200.0)
+        m.total_expected_demand *= 2.0
+        weights = ws._get_weights(10800.0)
+        x = sum(w * h[2] for w, h in zip(weights, ws._history))
+        self.assertTrue(np.allclose(x, x0 + 3 * slope + 2.0))
+
+    def test_solver_guess(self):
+        wn = wntr.network.WaterNetworkModel(join(ex_datadir, "Net1.inp"))
+        m, updater = create_vectorized_hydraulic_model(wn)
+        x0 = m.get_x()
+        solver = wntr.sim.NewtonSolver()
+        status, msg, num_iter = solver.solve(m)
+        self.assertEqual(status, wntr.sim.solvers.SolverStatus.converged)
+        x_sol = m.get_x()
+
+        # a good guess is used; the first residual is only evaluated once for each starting point
+        m.load_var_values_from_x(x0)
+        with mock.patch.object(m, 'evaluate_residuals', wraps=m.evaluate_residuals) as evaluate_residuals:
+            status, msg, guess_iter = solver.solve(m, x_guess=x_sol)
+        self.assertEqual(status, wntr.sim.solvers.SolverStatus.converged)
+        self.assertEqual(guess_iter, 0)
+        self.assertEqual(evaluate_residuals.call_count, 2)
+
+        # a bad guess is discarded
+        m.load_var_values_from_x(x0)
+        status, msg, bad_guess_iter = solver.solve(m, x_guess=x0 + 1000.0)
+        self.assertEqual(status, wntr.sim.solvers.SolverStatus.converged)
+        self.assertEqual(bad_guess_iter, num_iter)
+        self.assertTrue(np.allclose(m.get_x(), x_sol))
+
+
+class TestGGASolver(unittest.TestCase):
+    def _compare(self, wn_factory):
+        wn = wn_factory()
+        results1 = wntr.sim.WNTRSimulator(wn).run_sim()
+        wn = wn_factory()
+        results2 = wntr.sim.WNTRSimulator(wn).run_sim(solver=GGASolver)
+        head_diff = (results1.node['head'] - results2.node['head']).abs().max().max()
+        flow_diff = (results1.link['flowrate'] - results2.link['flowrate']).abs().max().max()
+        self.assertLess(head_diff, 1e-4)
+        self.assertLess(flow_diff, 1e-6)
+
+    def test_dd(self):
+        def wn_factory():
+            wn = wntr.network.WaterNetworkModel(join(ex_datadir, "Net3.inp"))
+            wn.options.time.duration = 12 * 3600
+            return wn
+        self._compare(wn_factory)
+
+    def test_pdd(self):
+        def wn_factory():
+            wn = wntr.network.WaterNetworkModel(join(ex_datadir, "Net1.inp"))
+            wn.options.time.duration = 12 * 3600
+            wn.options.hydraulic.demand_model = 'PDD'
+            wn.get_node('23').add_leak(wn, area=0.01, start_time=3 * 3600, end_time=9 * 3600)
+            return wn
+        self._compare(wn_factory)
+
+    def test_active_prv(self):
+        def wn_factory():
+            wn = wntr.network.WaterNetworkModel()
+            wn.options.time.duration = 3600 * 2
+            wn.add_reservoir(name="r1", base_head=60.0)
+            wn.add_junction(name="j1", base_demand=0.0)
+            wn.add_junction(name="j2", base_demand=0.01)
+            wn.add_junction(name="j3", base_demand=0.02)
+            wn.add_pipe("p1", "r1", "j1", length=100.0, diameter=0.3048, roughness=100)
+            wn.add_valve("prv", "j1", "j2", diameter=0.3048, valve_type="PRV", initial_setting=40.0)
+            wn.add_pipe("p2", "j2", "j3", length=100.0, diameter=0.3048, roughness=100)
+            return wn
+        self._compare(wn_factory)
+
+
+class _LowerTriangleFactor(object):
+    """Stand-in for a CHOLMOD factor; like CHOLMOD, only the lower triangle of the matrix is read"""
+    asymmetry = list()
+
+    def __init__(self, A):
+        self.cholesky_inplace(A)
+
+    def cholesky_inplace(self, A):
+        self.asymmetry.append(abs(A - A.T).max() / abs(A).max())
+        self._lu = sp.linalg.splu((sp.tril(A) + sp.tril(A, -1).T).tocsc())
+
+    def __call__(self, b):
+        return self._lu.solve(b)
+
+
+class TestGGASolverCholmod(unittest.TestCase):
+    def _power_pump(self):
+        wn = wntr.network.WaterNetworkModel()
+        wn.options.time.duration = 3600 * 2
+        wn.add_reservoir(name="r1", base_head=10.0)
+        wn.add_junction(name="j1", base_demand=0.0, elevation=10.0)
+        wn.add_junction(name="j2", base_demand=0.02, elevation=10.0)
+        wn.add_junction(name="j3", base_demand=0.01, elevation=10.0)
+        wn.add_pump("pump1", "r1", "j1", pump_type="POWER", pump_parameter=5000.0)
+        wn.add_pipe("p1", "j1", "j2", length=100.0, diameter=0.3048, roughness=100)
+        wn.add_pipe("p2", "j2", "j3", length=100.0, diameter=0.3048, roughness=100)
+        return wn
+
+    def _active_prv(self):
+        wn = wntr.network.WaterNetworkModel()
+        wn.options.time.duration = 3600 * 2
+        wn.add_reservoir(name="r1", base_head=60.0)
+        wn.add_junction(name="j1", base_demand=0.0)
+        wn.add_junction(name="j2", base_demand=0.01)
+        wn.add_junction(name="j3", base_demand=0.02)
+        wn.add_pipe("p1", "r1", "j1", length=100.0, diameter=0.3048, roughness=100)
+        wn.add_valve("prv", "j1", "j2", diameter=0.3048, valve_type="PRV", initial_setting=40.0)
+        wn.add_pipe("p2", "j2", "j3", length=100.0, diameter=0.3048, roughness=100)
+        return wn
+
+    def _compare(self, wn_factory, solver):
+        results1 = wntr.sim.WNTRSimulator(wn_factory()).run_sim()
+        results2 = wntr.sim.WNTRSimulator(wn_factory()).run_sim(solver=solver)
+        head_diff = (results1.node['head'] - results2.node['head']).abs().max().max()
+        self.assertLess(head_diff, 1e-4)
+        return results2
+
+    def test_one_triangle_factorization(self):
+        # only symmetric reduced systems are passed to the Cholesky factorization
+        for wn_factory, use_cholesky in [(self._power_pump, True), (self._active_prv, False)]:
+            _LowerTriangleFactor.asymmetry = list()
+            with mock.patch.object(wntr.sim.solvers, '_cholesky', _LowerTriangleFactor):
+                solver = GGASolver({'LINEAR_SOLVER': 'cholmod'})
+                self._compare(wn_factory, solver)
+            self.assertEqual(len(_LowerTriangleFactor.asymmetry) > 0, use_cholesky)
+            self.assertLessEqual(max(_LowerTriangleFactor.asymmetry + [0.0]), 1e-10)
+
+    @unittest.skipIf(_cholesky is None, 'scikit-sparse is not installed')
+    def test_power_pump(self):
+        solver = GGASolver({'LINEAR_SOLVER': 'cholmod'})
+        results = self._compare(self._power_pump, solver)
+        self.assertGreater(results.link['flowrate']['pump1'].min(), 0.0)
+
+
+class TestJacobianReuse(unittest.TestCase):
+    def _run(self, solver):
+        solver.num_factorizations = 0
+        factorize = solver._factorize
+
+        def counted(model, J):
+            solver.num_factorizations += 1
+            factorize(model, J)
+        solver._factorize = counted
+
+        wn = wntr.network.WaterNetworkModel(join(ex_datadir, "Net3.inp"))
+        wn.options.time.duration = 12 * 3600
+        sim = wntr.sim.WNTRSimulator(wn)
+        return sim.run_sim(solver=solver, model_backend='vectorized')
+
+    def test_reuse(self):
+        for solver_class in [wntr.sim.NewtonSolver, GGASolver]:
+            solver1 = solver_class()
+            results1 = self._run(solver1)
+            solver2 = solver_class({'JAC_REUSE': True})
+            results2 = self._run(solver2)
+            head_diff = (results1.node['head'] - results2.node['head']).abs().max().max()
+            self.assertLess(head_diff, 1e-4)
+            self.assertLess(solver2.num_factorizations, solver1.num_factorizations)
+
+    def test_reuse_without_backtracking(self):
+        wn = wntr.network.WaterNetworkModel(join(ex_datadir, "Net3.inp"))
+        m, updater = create_vectorized_hydraulic_model(wn)
+        solver = wntr.sim.NewtonSolver({'JAC_REUSE': True, 'BACKTRACKING': False, 'JAC_REFRESH_RATE': 0.01})
+        status, message, iterations = solver.solve(m)
+        self.assertEqual(status, wntr.sim.solvers.SolverStatus.converged)
+
+        # every Newton step has to be computed from the residual at the current point
+        solve_factored = solver._solve_factored
+        residual_errors = list()
+
+        def checked(r):
+            residual_errors.append(np.max(np.abs(r - m.evaluate_residuals())))
+            return solve_factored(r)
+        solver._solve_factored = checked
+
+        x = m.get_x()
+        m.load_var_values_from_x(x + np.random.RandomState(0).uniform(-0.01, 0.01, len(x)))
+        status, message, iterations = solver.solve(m)
+        self.assertEqual(status, wntr.sim.solvers.SolverStatus.converged)
+        self.assertLess(np.max(np.abs(m.evaluate_residuals())), solver.tol)
+        self.assertLess(iterations, 20)
+        self.assertEqual(max(residual_errors), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+from os.path import abspath, dirname, join
+
+import numpy as np
+import wntr
+from wntr.sim.models.vectorized import create_vectorized_hydraulic_model
+
+testdir = dirname(abspath(str(__file__)))
+test_datadir = join(testdir, "networks_for_testing")
+ex_datadir = join(testdir, "..", "..", "examples", "networks")
+
+
+def _run(wn_factory, model_backend, HW_approx='default'):
+    wn = wn_factory()
+    sim = wntr.sim.WNTRSimulator(wn)
+    return sim.run_sim(model_backend=model_backend, HW_approx=HW_approx)
+
+
+class TestVectorizedModel(unittest.TestCase):
+    def _compare(self, wn_factory, HW_approx='default'):
+        res1 = _run(wn_factory, 'aml', HW_approx)
+        res2 = _run(wn_factory, 'vectorized', HW_approx)
+        self.assertEqual(list(res1.time), list(res2.time))
+        for key in ['head', 'demand', 'pressure', 'leak_demand']:
+            diff = (res1.node[key] - res2.node[key]).abs().max().max()
+            self.assertLess(diff, 1e-9, key)
+        for key in ['flowrate', 'status']:
+            diff = (res1.link[key] - res2.link[key]).abs().max().max()
+            self.assertLess(diff, 1e-9, key)
+
+    def test_net1_dd(self):
+        def wn_factory():
+            wn = wntr.network.WaterNetworkModel(join(ex_datadir, "Net1.inp"))
+            wn.options.time.duration = 24 * 3600
+            return wn
+        self._compare(wn_factory)
+        self._compare(wn_factory, HW_approx='piecewise')
+
+    def test_net1_pdd_with_leak_and_closed_pipe(self):
+        def wn_factory():
+            wn = wntr.network.WaterNetworkModel(join(ex_datadir, "Net1.inp"))
+            wn.options.time.duration = 12 * 3600
+            wn.options.hydraulic.demand_model = 'PDD'
+            wn.get_node('23').add_leak(wn, area=0.01, start_time=3 * 3600, end_time=9 * 3600)
+            pipe = wn.get_link('122')
+            pipe.initial_status = wntr.network.LinkStatus.Closed
+            wn.reset_initial_values()
+            return wn
+        self._compare(wn_factory)
+
+    def test_net3(self):
+        for demand_model in ['DD', 'PDD']:
+            def wn_factory():
+                wn = wntr.network.WaterNetworkModel(join(ex_datadir, "Net3.inp"))
+                wn.options.time.duration = 24 * 3600
+                wn.options.hydraulic.demand_model = demand_model
+                return wn
+            self._compare(wn_factory)
+
+    def test_valves(self):
+        def wn_factory():
+            wn = wntr.network.WaterNetworkModel()
+            wn.options.time.duration = 3600 * 4
+            wn.add_reservoir(name="r1", base_head=60.0)
+            for name, demand in [("j1", 0.0), ("j2", 0.01), ("j3", 0.0), ("j4", 0.02), ("j5", 0.0),
+                                 ("j6", 0.03), ("j7", 0.01)]:
+                wn.add_junction(name=name, base_demand=demand)
+            wn.add_pipe("p1", "r1", "j1", length=100.0, diameter=0.3048, roughness=100)
+            wn.add_valve("prv", "j1", "j2", diameter=0.3048, valve_type="PRV", initial_setting=40.0)
+            wn.add_pipe("p2", "j2", "j3", length=100.0, diameter=0.3048, roughness=100)
+            wn.add_valve("tcv", "j3", "j4", diameter=0.3048, valve_type="TCV", minor_loss=10.0,
+                         initial_setting=20.0)
+            wn.add_pipe("p3", "j4", "j5", length=100.0, diameter=0.3048, roughness=100)
+            wn.add_valve("fcv", "j5", "j6", diameter=0.3048, valve_type="FCV", initial_setting=0.005)
+            wn.add_pipe("p4", "j1", "j6", length=1000.0, diameter=0.1524, roughness=100)
+            wn.add_valve("psv", "j1", "j7", diameter=0.3048, valve_type="PSV", initial_setting=50.0)
+            return wn
+        self._compare(wn_factory)
+
+    def test_jacobian(self):
+        wn = wntr.network.WaterNetworkModel(join(ex_datadir, "Net3.inp"))
+        wn.options.hydraulic.demand_model = 'PDD'
+        m, updater = create_vectorized_hydraulic_model(wn)
+        x = m.get_x() + np.random.RandomState(0).uniform(-0.01, 0.01, len(m.get_x()))
+        J = m.evaluate_jacobian(x).toarray()
+        r = m.evaluate_residuals(x)
+        eps = 1e-7
+        for col in range(len(x)):
+            x2 = x.copy()
+            x2[col] += eps
+            fd = (m.evaluate_residuals(x2) - r) / eps
+            self.assertTrue(np.allclose(fd, J[:, col], rtol=1e-3, atol=1e-3))
+        m.load_var_values_from_x(x)
+        self.assertTrue(np.allclose(m.get_x(), x))
+
+
+if __name__ == "__main__":
+    unittest.main()